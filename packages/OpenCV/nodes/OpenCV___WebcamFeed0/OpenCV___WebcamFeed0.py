@@ -19,7 +19,7 @@ class WebcamFeed_NodeInstance(NodeInstance):
 
     def video_picture_updated(self, img):
         self.log.log('video picture updated')
-        self.outputs[0].set_val(img)
+        self.stream_output_val(0, img)
         # self.update()
 
 
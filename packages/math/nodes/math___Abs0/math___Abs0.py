@@ -1,6 +1,11 @@
 from custom_src.NodeInstance import NodeInstance
 from custom_src.Node import Node
 
+try:
+    import numpy
+except ImportError:  # no array support then
+    numpy = None
+
 
 # GENERAL
 # self.input(index)                   <- access to input data
@@ -23,6 +28,8 @@ from custom_src.Node import Node
 
 
 class Abs_NodeInstance(NodeInstance):
+    """Element-wise for numpy arrays. Lists and tuples aren't arrays here, just like in + - * /."""
+
     def __init__(self, parent_node: Node, flow, configuration=None):
         super(Abs_NodeInstance, self).__init__(parent_node, flow, configuration)
 
@@ -33,7 +40,11 @@ class Abs_NodeInstance(NodeInstance):
 
 
     def update_event(self, input_called=-1):
-        self.outputs[0].set_val(abs(self.input(0)))
+        val = self.input(0)
+        if numpy is not None and isinstance(val, numpy.ndarray):
+            self.outputs[0].set_val(numpy.abs(val))  # element-wise
+        else:
+            self.outputs[0].set_val(abs(val))
 
     def get_data(self):
         data = {}
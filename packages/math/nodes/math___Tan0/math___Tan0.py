@@ -3,6 +3,11 @@ from custom_src.Node import Node
 
 import math
 
+try:
+    import numpy
+except ImportError:  # no array support then
+    numpy = None
+
 
 # GENERAL
 # self.input(index)                   <- access to input data
@@ -25,6 +30,8 @@ import math
 
 
 class Tan_NodeInstance(NodeInstance):
+    """Element-wise for numpy arrays. Lists and tuples aren't arrays here, just like in + - * /."""
+
     def __init__(self, parent_node: Node, flow, configuration=None):
         super(Tan_NodeInstance, self).__init__(parent_node, flow, configuration)
 
@@ -35,7 +42,11 @@ class Tan_NodeInstance(NodeInstance):
 
 
     def update_event(self, input_called=-1):
-        self.outputs[0].set_val(math.tan(self.input(0)))
+        val = self.input(0)
+        if numpy is not None and isinstance(val, numpy.ndarray):
+            self.outputs[0].set_val(numpy.tan(val))  # element-wise
+        else:
+            self.outputs[0].set_val(math.tan(val))
 
     def get_data(self):
         data = {}
@@ -1,6 +1,8 @@
 from custom_src.NodeInstance import NodeInstance
 from custom_src.Node import Node
 
+import ast
+
 
 # GENERAL
 # self.input(index)                   <- access to input data
@@ -28,10 +30,16 @@ class %NODE_TITLE%_NodeInstance(NodeInstance):
 
         self.special_actions['add exec input'] = {'method': self.action_add_exec_input}
         self.special_actions['add data input'] = {'method': self.action_add_data_input}
+        self.special_actions['enable function mode'] = {'method': self.action_enable_function_mode}
 
         self.num_scripts = 1
         self.num_data_inputs = 0
 
+        # In function mode, every script is the body of a function taking the data inputs as arguments input0,
+        # input1, ... (and self, input_called), so the values don't have to be read with self.input() in the script.
+        self.function_mode = False
+        self.compiled_scripts = {}  # {script index: CompiledScript}, see get_compiled_script()
+
         self.initialized()
 
 
@@ -49,6 +57,7 @@ class %NODE_TITLE%_NodeInstance(NodeInstance):
         self.delete_output(-1)
         self.num_scripts -= 1
         self.main_widget.delete_script()  # shape gets updated in main_widget
+        self.compiled_scripts.pop(self.num_scripts, None)
         if self.num_scripts == 1:
             del self.special_actions['remove exec input']
 
@@ -65,14 +74,41 @@ class %NODE_TITLE%_NodeInstance(NodeInstance):
             del self.special_actions['remove data input']
         self.update_shape()
 
+    def action_enable_function_mode(self):
+        self.function_mode = True
+        del self.special_actions['enable function mode']
+        self.special_actions['disable function mode'] = {'method': self.action_disable_function_mode}
+
+    def action_disable_function_mode(self):
+        self.function_mode = False
+        del self.special_actions['disable function mode']
+        self.special_actions['enable function mode'] = {'method': self.action_enable_function_mode}
+
     def update_event(self, input_called=-1):
         if input_called > -1 < self.num_scripts:
             try:
-                exec(self.main_widget.get_code(input_called))
+                compiled_script = self.get_compiled_script(input_called)
+                if self.function_mode:
+                    compiled_script.code(self, input_called,
+                                         *[self.input(i.index) for i in self.inputs if i.type_ == 'data'])
+                else:
+                    exec(compiled_script.code, globals(), {'self': self, 'input_called': input_called})
                 self.exec_output(input_called)
             except Exception as e:
                 self.log_message('couldn\'t execute script number '+str(input_called+1)+'\n    '+str(e), 'error')
 
+    def get_compiled_script(self, index):
+        """Compiles the script only if its code, the mode or the number of data inputs changed since the last
+        time - not on every execution."""
+        code = self.main_widget.get_code(index)
+        compiled_script = self.compiled_scripts.get(index)
+        if compiled_script is None or compiled_script.source != code or \
+                compiled_script.function_mode != self.function_mode or \
+                compiled_script.num_data_inputs != self.num_data_inputs:
+            compiled_script = CompiledScript(code, self.function_mode, self.num_data_inputs)
+            self.compiled_scripts[index] = compiled_script
+        return compiled_script
+
     def get_data(self):
         codes = []
         for i in range(self.num_scripts):
@@ -80,7 +116,8 @@ class %NODE_TITLE%_NodeInstance(NodeInstance):
             codes.append(code)
         data = {'num scripts': self.num_scripts,
                 'num data inputs': self.num_data_inputs,
-                'codes': codes}
+                'codes': codes,
+                'function mode': self.function_mode}
         return data
 
     def set_data(self, data):
@@ -94,8 +131,34 @@ class %NODE_TITLE%_NodeInstance(NodeInstance):
             c = data['codes'][i]
             self.main_widget.set_code(i, c)
 
+        if data.get('function mode', False) and not self.function_mode:
+            self.action_enable_function_mode()
+
 
 
     # optional - important for threading - stop everything here
     def removing(self):
         pass
+
+
+class CompiledScript:
+    def __init__(self, source, function_mode, num_data_inputs):
+        self.source = source
+        self.function_mode = function_mode
+        self.num_data_inputs = num_data_inputs
+
+        if function_mode:
+            # the script's statements become the body of a function, without touching the source text (indenting it
+            # would also indent lines inside multi-line strings)
+            module = ast.parse(source, '<Code node script>')
+            args = ['self', 'input_called'] + ['input'+str(i) for i in range(num_data_inputs)]
+            function = ast.parse('def code_node_function('+', '.join(args)+'):\n    pass\n').body[0]
+            if len(module.body) > 0:
+                function.body = module.body
+            module.body = [function]
+            ast.fix_missing_locations(module)
+            namespace = {}
+            exec(compile(module, '<Code node script>', 'exec'), globals(), namespace)
+            self.code = namespace['code_node_function']
+        else:
+            self.code = compile(source, '<Code node script>', 'exec')
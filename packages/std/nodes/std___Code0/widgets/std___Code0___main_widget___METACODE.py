@@ -15,6 +15,7 @@ class %NODE_TITLE%_NodeInstance_MainWidget(QWidget):
         # ------------------------------------------------
 
         self.code_text_edits = []
+        self.codes = []  # the scripts' texts, kept up to date so executing doesn't have to get them from the editors
 
         # UI
         self.code_font = QFont('Courier New', 12)
@@ -39,21 +40,27 @@ class %NODE_TITLE%_NodeInstance_MainWidget(QWidget):
         code_text_edit = QPlainTextEdit()
         code_text_edit.setPlainText('test code')
         code_text_edit.setFont(self.code_font)
+        code_text_edit.textChanged.connect(lambda e=code_text_edit: self.code_changed(e))
         # code_text_edit.setStyleSheet('background: black; color: grey;')
         self.code_text_edits.append(code_text_edit)
+        self.codes.append(code_text_edit.toPlainText())
         # print('before: ', self.height())
         self.layout().addWidget(code_text_edit)
         # print('after: ', self.height())
         self.parent_node_instance.update_shape()
 
     def delete_script(self):
-        code_text_edit = self.code_text_edits[-1]
+        code_text_edit = self.code_text_edits.pop()
+        self.codes.pop()
         self.layout().removeWidget(code_text_edit)
         code_text_edit.setParent(None)
         self.parent_node_instance.update_shape()
 
+    def code_changed(self, code_text_edit):
+        self.codes[self.code_text_edits.index(code_text_edit)] = code_text_edit.toPlainText()
+
     def get_code(self, index):
-        return self.code_text_edits[index].toPlainText()
+        return self.codes[index]
 
     def set_code(self, index, code):
         self.code_text_edits[index].setPlainText(code)
@@ -1,6 +1,11 @@
 from custom_src.NodeInstance import NodeInstance
 from custom_src.Node import Node
 
+try:
+    import numpy
+except ImportError:  # map mode doesn't vectorize then
+    numpy = None
+
 
 # USEFUL
 # self.input(index)                   <- access to input data
@@ -18,26 +23,91 @@ class ForEach_NodeInstance(NodeInstance):
     def __init__(self, parent_node: Node, flow, configuration=None):
         super(ForEach_NodeInstance, self).__init__(parent_node, flow, configuration)
 
+        self.map_mode = False  # collects the results of the body for all elements, see map()
+        self.update_map_mode_actions()
 
         self.initialized()
 
 
+    def action_enable_map_mode(self):
+        self.create_new_input('data', 'result')
+        self.create_new_output('data', 'results')
+        self.map_mode = True
+        self.update_map_mode_actions()
+        self.update_shape()
+
+    def action_disable_map_mode(self):
+        self.delete_input(2)
+        self.delete_output(3)
+        self.map_mode = False
+        self.update_map_mode_actions()
+        self.update_shape()
+
+    def update_map_mode_actions(self):
+        self.special_actions.pop('enable map mode', None)
+        self.special_actions.pop('disable map mode', None)
+        if self.map_mode:
+            self.special_actions['disable map mode'] = {'method': self.action_disable_map_mode}
+        else:
+            self.special_actions['enable map mode'] = {'method': self.action_enable_map_mode}
+
     def update_event(self, input_called=-1):
         if input_called == 0:
-            for obj in self.input(1):
-                self.set_output_val(1, obj)
-                self.exec_output(0)
+            if self.map_mode:
+                self.set_output_val(3, self.map(self.input(1)))
+            else:
+                for obj in self.input(1):
+                    self.set_output_val(1, obj)
+                    self.exec_output(0)
 
             self.exec_output(2)
 
+    def map(self, elements):
+        """Computes the body (the NIs between the obj output and the result input) for every element and returns the
+        results in a list - or in an array, if the elements are a numpy array. If nothing gets executed in the loop
+        and all NIs of the body are vectorizable (like sin or +), the body gets computed only once, with the whole
+        array as obj."""
+        loop = len(self.outputs[0].connected_port_instances) > 0
+
+        if numpy is not None and isinstance(elements, numpy.ndarray) and elements.ndim > 0 and not loop and \
+                all(ni.parent_node.vectorizable for ni in self.get_body()):
+            self.outputs[1].val = None  # the array might have been changed in place, push it in any case
+            self.set_output_val(1, elements)
+            results = self.input(2)
+            if isinstance(results, numpy.ndarray) and results.shape[:1] == elements.shape[:1]:
+                return results
+            # the result isn't one per element (like when it doesn't depend on obj), so it has to be done one by one
+
+        results = []
+        for obj in elements:
+            self.set_output_val(1, obj)
+            if loop:
+                self.exec_output(0)
+            results.append(self.input(2))
+
+        if numpy is not None and isinstance(elements, numpy.ndarray):
+            return numpy.array(results)
+        return results
+
+    def get_body(self):
+        """Returns all NIs depending on the obj output through data connections."""
+        body = set()
+        ports = [self.outputs[1]]
+        while len(ports) > 0:
+            for cpi in ports.pop().connected_port_instances:
+                ni = cpi.parent_node_instance
+                if ni is not self and ni not in body:
+                    body.add(ni)
+                    ports.extend([o for o in ni.outputs if o.type_ == 'data'])
+        return body
+
     def get_data(self):
-        data = {}
-        # ...
+        data = {'map mode': self.map_mode}
         return data
 
     def set_data(self, data):
-        pass
-        # ...
+        self.map_mode = data.get('map mode', False)  # the ports are already there
+        self.update_map_mode_actions()
 
 
 
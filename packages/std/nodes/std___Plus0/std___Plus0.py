@@ -1,6 +1,11 @@
 from custom_src.NodeInstance import NodeInstance
 from custom_src.Node import Node
 
+try:
+    import numpy
+except ImportError:  # no array support then
+    numpy = None
+
 
 # USEFUL
 # self.input(index)                   <- access to input data
@@ -15,6 +20,9 @@ from custom_src.Node import Node
 
 
 class Plus_NodeInstance(NodeInstance):
+    """Sums the inputs. If one of them is a numpy array, the sum broadcasts; lists, tuples and strings keep
+    their Python meaning (concatenation)."""
+
     def __init__(self, parent_node: Node, flow, configuration=None):
         super(Plus_NodeInstance, self).__init__(parent_node, flow, configuration)
 
@@ -25,17 +33,23 @@ class Plus_NodeInstance(NodeInstance):
 
 
     def update_event(self, input_called=-1):
+        vals = [self.input(i) for i in range(len(self.inputs))]
+        if numpy is not None and any(isinstance(val, numpy.ndarray) for val in vals):
+            sum_val = vals[0]
+            for val in vals[1:]:
+                sum_val = sum_val + val  # broadcasts
+            self.outputs[0].set_val(sum_val)
+            return
         try:
-            sum_val = sum([self.input(i) for i in range(len(self.inputs))])
+            sum_val = sum(vals)
             self.outputs[0].set_val(sum_val)
         except Exception as e:
             sum_val = ''
-            for i in range(len(self.inputs)):
-                val = self.input(i)
+            for val in vals:
                 if val is None:
                     self.set_output_val(0, None)
                     return
-                sum_val += str(self.input(i))
+                sum_val += str(val)
             self.outputs[0].set_val(sum_val)
 
     def action_add_input(self):
@@ -15,6 +15,9 @@ from custom_src.Node import Node
 
 
 class %NODE_TITLE%_NodeInstance(NodeInstance):
+    """Multiplies the inputs. Numpy arrays broadcast, lists and tuples keep their Python meaning (a list times
+    an int repeats it, like in +)."""
+
     def __init__(self, parent_node: Node, flow, configuration=None):
         super(%NODE_TITLE%_NodeInstance, self).__init__(parent_node, flow, configuration)
 
@@ -27,7 +30,7 @@ class %NODE_TITLE%_NodeInstance(NodeInstance):
     def update_event(self, input_called=-1):
         sum_val = self.input(0)
         for i in range(1, len(self.inputs)):
-            sum_val *= self.input(i)
+            sum_val = sum_val * self.input(i)  # not in place, the first input might be an array
         self.outputs[0].set_val(sum_val)
 
     def action_add_input(self):
@@ -0,0 +1,62 @@
+import asyncio
+
+from PySide2.QtCore import QTimer
+
+from custom_src.global_tools.Debugger import Debugger
+from custom_src.global_tools.GUIThread import GUIThread
+
+
+class AsyncLoop:
+    """Lets nodes define update_event() as 'async def'. The coroutines run as tasks on an asyncio event loop, so
+    many I/O bound NIs can wait at the same time instead of one after another. The loop runs in the GUI thread: while
+    there are tasks, a QTimer steps it every few milliseconds. The headless runner runs it directly, see wait().
+    Everything a coroutine does between its awaits (like set_output_val() or exec_output()) happens in the GUI
+    thread, just as if it was a normal update_event()."""
+
+    loop = None
+    timer = None
+    tasks = set()
+    step_interval = 5  # ms
+
+    def get_loop():
+        if AsyncLoop.loop is None:
+            AsyncLoop.loop = asyncio.new_event_loop()
+        return AsyncLoop.loop
+
+    def run(coro, node_instance):
+        """Called from NodeInstance.run_update_event() when update_event() returned a coroutine."""
+        if not GUIThread.is_current():  # see ScriptExecutor
+            GUIThread.call(AsyncLoop.run, coro, node_instance, wait=False)
+            return
+
+        task = AsyncLoop.get_loop().create_task(AsyncLoop.run_update_event(coro, node_instance))
+        AsyncLoop.tasks.add(task)
+        task.add_done_callback(AsyncLoop.tasks.discard)
+
+        if GUIThread.invoker is not None:  # there is a Qt event loop
+            if AsyncLoop.timer is None:
+                AsyncLoop.timer = QTimer()
+                AsyncLoop.timer.timeout.connect(AsyncLoop.step)
+            if not AsyncLoop.timer.isActive():
+                AsyncLoop.timer.start(AsyncLoop.step_interval)
+
+    async def run_update_event(coro, node_instance):
+        try:
+            await coro
+        except Exception as e:
+            Debugger.debug('EXCEPTION IN', node_instance.parent_node.title, 'NI:', e)
+
+    def step():
+        """Runs one iteration of the event loop without blocking."""
+        loop = AsyncLoop.get_loop()
+        loop.call_soon(loop.stop)
+        loop.run_forever()
+        if len(AsyncLoop.tasks) == 0:
+            AsyncLoop.timer.stop()
+
+    def wait():
+        """Runs the event loop until all tasks (including the ones created meanwhile) are done. Used by the headless
+        runner."""
+        loop = AsyncLoop.get_loop()
+        while len(AsyncLoop.tasks) > 0:
+            loop.run_until_complete(asyncio.wait(list(AsyncLoop.tasks)))
@@ -0,0 +1,238 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+from custom_src.global_tools.Debugger import Debugger
+from custom_src.global_tools.GUIThread import GUIThread
+
+
+class BranchFanOut:
+    """Runs the branches of an exec output that is connected to several exec inputs concurrently on a thread pool
+    (used when ExecutionSettings.parallel_fan_out is enabled), instead of one after another. Each flow has one.
+
+    Branches only run in parallel if a static analysis of the flow says they are independent (see analyze()). A
+    branch is everything the connected exec input can reach: the NIs executed from there (exec connections), the
+    passive NIs their data changes get pushed to, and the NIs providing data on request they pull from. Two branches
+    are independent if none of them touches NIs the other one touches or reads from. A passive NI consuming data of
+    more than one branch doesn't make them dependent - it's a join NI: updates of it get held back while the branches
+    are running and it gets updated once (in topological order) after all of them have finished.
+    Only the flow's connections are analyzed, state shared in other ways (like script variables) is not.
+
+    The branches' NIs run in pool threads, so everything they do with widgets goes through GUIThread, like with
+    ScriptExecutor. Branches of branches run sequentially in their thread. The fan-out isn't used together with
+    trampolined exec scheduling or glitch-free push propagation, whose engines are not thread-safe."""
+
+    max_workers = None  # default of ThreadPoolExecutor
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.plans = {}  # {output port: FanOutPlan or None if not independent}, reset whenever connections change
+        self.executor = None
+        self.thread_info = threading.local()
+
+        # state of the running fan-out
+        self.join_node_instances = set()
+        self.deferred_updates = {}  # {join NI: latest input index}
+        self.deferred_lock = threading.Lock()
+
+        # STATS
+        self.parallel_fan_outs = 0
+        self.sequential_fan_outs = 0  # because the branches weren't independent
+        self.parallel_branches = 0
+        self.deferred_join_updates = 0
+
+    def connections_changed(self):
+        self.plans = {}
+
+    def exec(self, output_port):
+        """Called from PortInstance.exec(). Returns False if the connected exec inputs have to be executed
+        sequentially."""
+        if getattr(self.thread_info, 'in_branch', False):
+            return False
+
+        if output_port not in self.plans:
+            self.plans[output_port] = self.analyze(output_port)
+        plan = self.plans[output_port]
+        if plan is None:
+            self.sequential_fan_outs += 1
+            return False
+
+        if Debugger.enabled:
+            Debugger.debug('running', len(plan.input_ports), 'branches of',
+                           output_port.parent_node_instance.parent_node.title, 'in parallel')
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=BranchFanOut.max_workers, thread_name_prefix='branch')
+
+        self.join_node_instances = plan.join_node_instances
+        try:
+            futures = [self.executor.submit(self.run_branch, cpi) for cpi in plan.input_ports]
+            self.wait(futures)
+        finally:
+            self.join_node_instances = set()
+        self.parallel_fan_outs += 1
+        self.parallel_branches += len(plan.input_ports)
+
+        for future in futures:
+            future.result()  # raises exceptions of the branches here
+
+        self.update_join_node_instances(plan)
+        return True
+
+    def run_branch(self, input_port):
+        self.thread_info.in_branch = True
+        try:
+            input_port.update()
+        finally:
+            self.thread_info.in_branch = False
+
+    def wait(self, futures):
+        if GUIThread.invoker is not None and GUIThread.is_current():
+            # the branches might need the GUI thread (for widgets) while it's blocked here
+            not_done = futures
+            while len(not_done) > 0:
+                done, not_done = wait(not_done, timeout=0.005, return_when=FIRST_EXCEPTION)
+                GUIThread.process_pending_calls()
+        else:
+            wait(futures)
+
+    def defer(self, input_port):
+        """Called from PortInstance.update() while a fan-out is running. Returns True if the update got held back."""
+        ni = input_port.parent_node_instance
+        if ni not in self.join_node_instances:
+            return False
+        with self.deferred_lock:
+            self.deferred_updates[ni] = input_port.index
+        return True
+
+    def update_join_node_instances(self, plan):
+        updates = self.deferred_updates
+        self.deferred_updates = {}
+        for ni in plan.join_order:
+            if ni in updates:
+                self.deferred_join_updates += 1
+                ni.update(updates[ni])
+
+    #   ANALYSIS
+
+    def analyze(self, output_port):
+        """Returns a FanOutPlan if the branches of the exec output are independent, None otherwise."""
+        input_ports = [cpi for cpi in output_port.connected_port_instances if cpi.type_ == 'exec']
+        if len(input_ports) < 2:
+            return None
+        source = output_port.parent_node_instance
+
+        exec_regions = [self.exec_region(cpi.parent_node_instance) for cpi in input_ports]
+
+        # passive NIs reached from more than one branch
+        push_regions = [self.push_region(region, set()) for region in exec_regions]
+        join_node_instances = set()
+        for i in range(len(push_regions)):
+            for j in range(i+1, len(push_regions)):
+                join_node_instances |= push_regions[i] & push_regions[j]
+        if len(join_node_instances) > 0:
+            # whatever comes after a join NI gets reached after the join
+            push_regions = [self.push_region(region, join_node_instances) for region in exec_regions]
+
+        writes = []
+        reads = []
+        for i in range(len(input_ports)):
+            touched = (exec_regions[i] | push_regions[i]) - join_node_instances
+            pulled = self.pull_region(touched)
+            writes.append(touched | pulled)
+            reads.append(self.read_region(touched | pulled))
+
+        for i in range(len(input_ports)):
+            if source in writes[i]:
+                Debugger.debug('branch', i, 'of', source.parent_node.title, 'loops back')
+                return None
+            if len(reads[i] & join_node_instances) > 0:  # would read the value from before the join
+                Debugger.debug('branch', i, 'of', source.parent_node.title, 'reads from a join NI')
+                return None
+            for j in range(len(input_ports)):
+                if i != j and len(writes[i] & (writes[j] | reads[j])) > 0:
+                    Debugger.debug('branches', i, 'and', j, 'of', source.parent_node.title, 'are not independent')
+                    return None
+
+        return FanOutPlan(input_ports, join_node_instances, self.join_order(join_node_instances))
+
+    def exec_region(self, node_instance):
+        """All NIs reachable from the NI via exec connections (including the NI)."""
+        region = {node_instance}
+        stack = [node_instance]
+        while len(stack) > 0:
+            ni = stack.pop()
+            for o in ni.outputs:
+                if o.type_ != 'exec':
+                    continue
+                for cpi in o.connected_port_instances:
+                    if cpi.parent_node_instance not in region:
+                        region.add(cpi.parent_node_instance)
+                        stack.append(cpi.parent_node_instance)
+        return region
+
+    def push_region(self, region, barrier):
+        """All passive NIs data changes of the region get pushed to. The barrier NIs are included but not passed."""
+        pushed = set()
+        stack = list(region)
+        while len(stack) > 0:
+            ni = stack.pop()
+            for o in ni.outputs:
+                if o.type_ != 'data':
+                    continue
+                for cpi in o.connected_port_instances:
+                    target = cpi.parent_node_instance
+                    if target.is_active() or target in pushed or target in region:
+                        continue
+                    pushed.add(target)
+                    if target not in barrier:
+                        stack.append(target)
+        return pushed
+
+    def pull_region(self, region):
+        """All NIs generating data on request that NIs of the region pull from, directly or indirectly."""
+        pulled = set()
+        stack = list(region)
+        while len(stack) > 0:
+            ni = stack.pop()
+            for i in ni.inputs:
+                if i.type_ != 'data' or len(i.connected_port_instances) == 0:
+                    continue
+                source = i.connected_port_instances[0].parent_node_instance
+                if source.gen_data_on_request and source not in pulled and source not in region:
+                    pulled.add(source)
+                    stack.append(source)
+        return pulled
+
+    def read_region(self, region):
+        """All NIs whose output values NIs of the region read."""
+        read = set()
+        for ni in region:
+            for i in ni.inputs:
+                if i.type_ == 'data' and len(i.connected_port_instances) > 0:
+                    read.add(i.connected_port_instances[0].parent_node_instance)
+        return read
+
+    def join_order(self, join_node_instances):
+        engine = self.flow.propagation_engine
+        if engine.ranks is None:
+            engine.compute_ranks()
+        return sorted(join_node_instances, key=lambda ni: engine.ranks.get(ni, 0))
+
+    def reset_stats(self):
+        self.parallel_fan_outs = 0
+        self.sequential_fan_outs = 0
+        self.parallel_branches = 0
+        self.deferred_join_updates = 0
+
+    def get_stats_str(self):
+        return 'parallel fan-outs: '+str(self.parallel_fan_outs) + \
+               ', parallel branches: '+str(self.parallel_branches) + \
+               ', sequential fan-outs: '+str(self.sequential_fan_outs) + \
+               ', deferred join updates: '+str(self.deferred_join_updates)
+
+
+class FanOutPlan:
+    def __init__(self, input_ports, join_node_instances, join_order):
+        self.input_ports = input_ports
+        self.join_node_instances = join_node_instances
+        self.join_order = join_order
@@ -0,0 +1,113 @@
+import itertools
+
+
+class ConnectionTable:
+    """All connections between the NIs of a flow, keyed by the ids of their ports (see PortInstance), so saving,
+    copying and removing components don't have to search the flow's lists for the indices of NIs and ports. Each
+    Flow has one, it gets updated by Flow.add_node_instance(), Flow.remove_node_instance() and Flow.connect_gates().
+
+    Removed NIs keep the connections between each other in their ports (so undo can restore them), but they aren't
+    in the table until the NIs get added again."""
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.connections = {}  # {(output port id, input port id): (output port, input port)}, in connecting order
+        self.order = {}  # {key: number}, for sorting the connections of some NIs in connecting order
+        self.numbers = itertools.count()
+        self.node_connections = {}  # {NI id: set of the keys of its connections} of the flow's NIs
+
+    def __len__(self):
+        return len(self.connections)
+
+    def __contains__(self, ports):
+        output_port, input_port = ports
+        return (output_port.id, input_port.id) in self.connections
+
+    def has_node_instance(self, ni):
+        return ni.id in self.node_connections
+
+    def node_instance_added(self, ni):
+        self.node_connections[ni.id] = set()
+        for o in ni.outputs:
+            for cpi in o.connected_port_instances:
+                self.add(o, cpi)
+        for i in ni.inputs:
+            for cpi in i.connected_port_instances:
+                self.add(cpi, i)
+
+    def node_instance_removed(self, ni):
+        for key in self.node_connections.pop(ni.id, ()):
+            output_port, input_port = self.connections.pop(key)
+            del self.order[key]
+            other_ni = input_port.parent_node_instance if output_port.parent_node_instance is ni else \
+                output_port.parent_node_instance
+            if other_ni is not ni:
+                self.node_connections[other_ni.id].discard(key)
+
+    def gates_connected(self, parent_port, child_port, connected):
+        output_port, input_port = (parent_port, child_port) if parent_port.direction == 'output' else \
+            (child_port, parent_port)
+        if connected:
+            self.add(output_port, input_port)
+        else:
+            self.remove(output_port, input_port)
+
+    def add(self, output_port, input_port):
+        """Only connections between NIs of the flow get added."""
+        output_connections = self.node_connections.get(output_port.parent_node_instance.id)
+        input_connections = self.node_connections.get(input_port.parent_node_instance.id)
+        if output_connections is None or input_connections is None:
+            return
+        key = (output_port.id, input_port.id)
+        self.connections[key] = (output_port, input_port)
+        self.order[key] = next(self.numbers)
+        output_connections.add(key)
+        input_connections.add(key)
+
+    def remove(self, output_port, input_port):
+        key = (output_port.id, input_port.id)
+        if self.connections.pop(key, None) is None:
+            return
+        del self.order[key]
+        for ni in (output_port.parent_node_instance, input_port.parent_node_instance):
+            self.node_connections[ni.id].discard(key)
+
+    def get_connections(self, node_instances):
+        """Returns the connections [(output port, input port), ...] with at least one of the NIs, in connecting
+        order."""
+        keys = set()
+        for ni in node_instances:
+            keys.update(self.node_connections.get(ni.id, ()))
+        if len(keys) == len(self.connections):  # like when saving
+            return list(self.connections.values())
+        return [self.connections[key] for key in sorted(keys, key=self.order.__getitem__)]
+
+    def get_json_data(self, node_instances, only_with_connections_to=None):
+        """The connections going out of the NIs in the flow's config format (see Flow.connect_nodes_from_config()),
+        they're referred to by their indices in node_instances. The connected NI and input port indices are None if
+        the connection leads outside node_instances (like when copying components). If only_with_connections_to is
+        given, only the connections with at least one of its NIs are included."""
+        indices = {ni.id: index for index, ni in enumerate(node_instances)}
+        only_ids = None if only_with_connections_to is None else {ni.id for ni in only_with_connections_to}
+
+        connections = []
+        for output_port, input_port in self.get_connections(node_instances):
+            parent_ni_index = indices.get(output_port.parent_node_instance.id)
+            if parent_ni_index is None:
+                continue
+            if only_ids is not None and output_port.parent_node_instance.id not in only_ids and \
+                    input_port.parent_node_instance.id not in only_ids:
+                continue
+            connected_ni_index = indices.get(input_port.parent_node_instance.id)
+            connections.append({'parent node instance index': parent_ni_index,
+                                'output port index': output_port.index,
+                                'connected node instance': connected_ni_index,
+                                'connected input port index': input_port.index if connected_ni_index is not None else
+                                                              None})
+        return connections
+
+    def get_outer_connections(self, node_instances):
+        """The connections between the NIs and NIs not among them, [(output port, input port), ...]."""
+        ids = {ni.id for ni in node_instances}
+        return [(output_port, input_port) for output_port, input_port in self.get_connections(node_instances)
+                if output_port.parent_node_instance.id not in ids or input_port.parent_node_instance.id not in ids]
@@ -26,7 +26,11 @@ class DrawingObject(QGraphicsItem):
         self.movement_state = None  # ugly - should get replaced later, see NodeInstance, same issue
         self.movement_pos_from = None
 
-        if 'points' in config:
+        if 'packed points' in config:  # from binary project files, {'x': [...], 'y': [...], 'w': [...]} (ProjectFile)
+            packed_points = config['packed points']
+            self.points = [QPointF(x, y) for x, y in zip(packed_points['x'], packed_points['y'])]
+            self.stroke_weights = list(packed_points['w'])
+        elif 'points' in config:
             for p in config['points']:  # config = 'points' array
                 x = p['x']
                 y = p['y']
@@ -0,0 +1,153 @@
+from custom_src.Execution import ExecutionSettings
+from custom_src.global_tools.Debugger import Debugger
+
+
+class ExecScheduler:
+    """Runs exec signals iteratively instead of recursively (used when ExecutionSettings.trampolined_exec is
+    enabled). Each flow has one.
+
+    Normally exec_output() calls update() of the connected NIs directly, which call exec_output() again and so on,
+    so every hop in an exec chain adds a few frames to the Python stack. Here, exec_output() only remembers the
+    output in the frame of the currently running NI. When the NI's update_event() returns, the connected NIs get
+    pushed on a work stack, which is processed by a plain loop - so the exec hops themselves don't make the stack
+    deeper, no matter how long the chain is.
+
+    To keep the order of everything exactly as before, the remembered exec output gets executed right away (in a
+    nested loop) as soon as the NI does anything else that could be observed by the NIs connected to it: reading an
+    input, setting an output value, updating its data outputs or executing another exec output. So a ForEach or a
+    While NI executes its loop body before the next iteration, but an exec_output() at the very end of an
+    update_event() doesn't nest.
+    NIs that don't run right here - the ones of a stream stage or running in the process pool, and all of them
+    while the loop runs in the GUI thread with background execution on - get handed over like in
+    NodeInstance.update(), see NodeInstance.dispatch_update().
+    Data doesn't go through the scheduler: values pushed from an NI of the chain to passive NIs (see
+    PortInstance.updated_val()) still update them recursively, as deep as the data connections they go through."""
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.work = []  # stack of (NI, input index)
+        self.frames = []  # ExecFrames of the NIs whose update_event() is running right now
+
+        # STATS
+        self.hops = 0  # update_event() calls run by the scheduler
+        self.deferred_execs = 0  # exec outputs that got executed after their NI's update_event() returned
+        self.flushed_execs = 0  # exec outputs that had to be executed right away (nested)
+        self.loop_depth = 0
+        self.max_loop_depth = 0
+        self.max_work_size = 0
+
+    def execute(self, node_instance, input_called):
+        """Called from NodeInstance.update(). Runs the update and all exec signals resulting from it."""
+        exec_pulse = self.flow.exec_pulse
+        exec_pulse.begin()
+        try:
+            self.run_loop([(node_instance, input_called)])
+        finally:
+            exec_pulse.end()
+
+    def run_loop(self, items):
+        work = self.work
+        frames = self.frames
+        base = len(work)
+        self.push_work(items)
+
+        self.loop_depth += 1
+        if self.loop_depth > self.max_loop_depth:
+            self.max_loop_depth = self.loop_depth
+
+        # this loop runs once per exec hop, so everything it needs is local
+        pop_work = work.pop
+        append_work = work.append
+        append_frame = frames.append
+        pop_frame = frames.pop
+        hops = 0
+        deferred_execs = 0
+        dispatch_all = ExecutionSettings.background_execution
+        try:
+            while len(work) > base:
+                ni, input_called = pop_work()
+                if (dispatch_all or ni.stream_stage is not None or ni.parent_node.run_in_process_pool) and \
+                        ni.dispatch_update(input_called):
+                    continue
+                frame = ExecFrame(ni)
+                append_frame(frame)
+                try:
+                    ni.run_update_event(input_called)
+                finally:
+                    pop_frame()
+                hops += 1
+
+                output_port = frame.pending_exec_output
+                if output_port is not None:
+                    deferred_execs += 1
+                    targets = output_port.connected_port_instances
+                    if len(targets) == 1:  # a plain chain, the work stack doesn't grow
+                        cpi = targets[0]
+                        append_work((cpi.parent_node_instance, cpi.index))
+                    else:
+                        self.push_work(self.get_exec_targets(output_port))
+        finally:
+            del work[base:]  # only matters if something went terribly wrong (like KeyboardInterrupt)
+            self.loop_depth -= 1
+            self.hops += hops
+            self.deferred_execs += deferred_execs
+
+    def push_work(self, items):
+        self.work.extend(reversed(items))  # the first item gets processed first
+        if len(self.work) > self.max_work_size:
+            self.max_work_size = len(self.work)
+
+    def get_exec_targets(self, output_port):
+        return [(cpi.parent_node_instance, cpi.index)
+                for cpi in output_port.connected_port_instances]
+
+    def exec_output(self, output_port):
+        """Called from PortInstance.exec()."""
+        ni = output_port.parent_node_instance
+        if len(self.frames) == 0 or self.frames[-1].node_instance is not ni:
+            # not called from within the NI's update_event() (e.g. from a widget) - just run it now
+            Debugger.debug('executing', ni.parent_node.title, 'exec output directly')
+            self.run_loop(self.get_exec_targets(output_port))
+            return
+
+        frame = self.frames[-1]
+        if frame.pending_exec_output is not None:
+            self.flush(ni)
+        frame.pending_exec_output = output_port
+
+    def flush(self, node_instance):
+        """Executes the remembered exec output of the NI (if there is one) right now. Called before the NI does
+        anything the NIs connected to it could notice."""
+        frames = self.frames
+        if not frames:
+            return
+        frame = frames[-1]
+        output_port = frame.pending_exec_output
+        if output_port is None or frame.node_instance is not node_instance:
+            return
+
+        frame.pending_exec_output = None
+        self.flushed_execs += 1
+        self.run_loop(self.get_exec_targets(output_port))
+
+    def reset_stats(self):
+        self.hops = 0
+        self.deferred_execs = 0
+        self.flushed_execs = 0
+        self.max_loop_depth = 0
+        self.max_work_size = 0
+
+    def get_stats_str(self):
+        return 'exec hops: '+str(self.hops) + \
+               ', deferred execs: '+str(self.deferred_execs) + \
+               ', flushed execs: '+str(self.flushed_execs) + \
+               ', max loop depth: '+str(self.max_loop_depth) + \
+               ', max work stack size: '+str(self.max_work_size)
+
+
+class ExecFrame:
+    __slots__ = ('node_instance', 'pending_exec_output')
+
+    def __init__(self, node_instance):
+        self.node_instance = node_instance
+        self.pending_exec_output = None
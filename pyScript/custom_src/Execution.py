@@ -0,0 +1,61 @@
+import threading
+
+
+class ExecutionSettings:
+    """Global switches for how flows get executed (set via the 'Execution' menu or the headless runner's options)."""
+
+    # Every upstream node providing data on request (gen_data_on_request) gets computed at most once per exec pulse.
+    memoized_pull = False
+
+    # Data changes get pushed glitch-free in topological order instead of depth first, see PropagationEngine.
+    glitch_free_push = False
+
+    # Exec signals get processed by a work stack loop instead of recursive calls, see ExecScheduler.
+    trampolined_exec = False
+
+    # Exec pulses run in a worker thread per Script instead of the GUI thread, see ScriptExecutor.
+    background_execution = False
+
+    # NIs of nodes declared pure skip update_event() if their inputs didn't change, see PureMemo.
+    pure_memo = False
+
+    # Text input widgets evaluate texts that aren't Python literals as Python expressions, see InputValue.
+    eval_input_expressions = False
+
+    # Exec chains get compiled into Python functions which do what the NIs would do, see FlowCompiler.
+    compiled_exec = False
+
+    # Independent branches of an exec output connected to several exec inputs run concurrently, see BranchFanOut.
+    parallel_fan_out = False
+
+    # Values of stream sources (like video frames) get processed by a pipeline with one thread per NI, see
+    # StreamingPipeline. When a stage's queue is full: 'drop oldest', 'drop newest' or 'block'.
+    streaming_pipelines = False
+    stream_backpressure = 'drop oldest'
+    stream_queue_size = 2
+
+
+class ExecPulse:
+    """An exec pulse is everything that happens from the outermost NodeInstance.update() call (a button click, a
+    variable change, a triggered exec input, ...) until that call returns. Each flow has one of these.
+    The branches of a parallel fan-out (see BranchFanOut) belong to the pulse of the NI they come from."""
+
+    def __init__(self):
+        self.id = 0
+        self.depth = 0
+        self.lock = threading.Lock()
+
+    def begin(self):
+        # always locked, NIs also get updated in other threads by stream stages, the ScriptExecutor and fan-outs
+        with self.lock:
+            if self.depth == 0:
+                self.id += 1
+            self.depth += 1
+
+    def end(self):
+        with self.lock:
+            self.depth -= 1
+
+    def running(self, pulse_id):
+        """Returns True if the given pulse id is the one of the pulse that is currently running."""
+        return self.depth > 0 and pulse_id == self.id
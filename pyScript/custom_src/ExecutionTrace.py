@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+import time
+
+from custom_src.NodeInstance import NodeInstance
+from custom_src.PortInstance import PortInstance
+from custom_src.global_tools.MethodPatch import MethodPatch
+from custom_src.headless.HeadlessNodeInstance import HeadlessNodeInstance
+
+
+class ExecutionTrace:
+    """Records what happens during execution and saves it as Chrome trace JSON, which can be opened in Perfetto
+    (ui.perfetto.dev) or chrome://tracing.
+
+    Traced are NodeInstance.update(), NodeInstance.run_update_event() (where update_event() actually runs - might be
+    another thread than the update() call, see ScriptExecutor, ProcessPool, StreamingPipeline) and PortInstance.exec(),
+    get_val() and set_val(), each with node title, package, port index, start and end time, thread and the exec
+    pulse id. While recording, these methods get replaced by tracing wrappers on the classes (see MethodPatch); when
+    not recording, the original methods are in place, so the trace doesn't cost anything then."""
+
+    recording = False
+    events = []  # (kind, NI or PortInstance, input called, pulse id, start, end, thread id)
+    thread_names = {}  # {thread id: name}
+    patches = []
+
+    def start():
+        if ExecutionTrace.recording:
+            return
+        ExecutionTrace.events = []
+        ExecutionTrace.thread_names = {}
+        for cls, name, kind in TRACED_METHODS:
+            ExecutionTrace.patches.append(MethodPatch(cls, name, lambda func, kind=kind: traced(func, kind)))
+        ExecutionTrace.recording = True
+
+    def stop():
+        if not ExecutionTrace.recording:
+            return
+        for patch in ExecutionTrace.patches:
+            patch.remove()
+        ExecutionTrace.patches = []
+        ExecutionTrace.recording = False
+
+    def get_trace_events():
+        """Returns the recorded events in the Chrome trace event format."""
+        pid = os.getpid()
+        trace_events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                        for tid, name in ExecutionTrace.thread_names.items()]
+
+        for kind, obj, arg, pulse_id, start, end, tid in ExecutionTrace.events:
+            if kind in ('update', 'update_event'):
+                ni = obj
+                name = ni.parent_node.title
+                args = {'input': arg}
+            else:
+                ni = obj.parent_node_instance
+                name = kind+' '+ni.parent_node.title+' '+obj.direction+' '+str(obj.index)
+                args = {'port index': obj.index}
+            args['node'] = ni.parent_node.title
+            args['package'] = ni.parent_node.package
+            args['pulse'] = pulse_id
+            trace_events.append({'name': name, 'cat': kind, 'ph': 'X', 'pid': pid, 'tid': tid,
+                                 'ts': start/1000, 'dur': (end-start)/1000, 'args': args})
+        return trace_events
+
+    def save(file_path):
+        f = open(file_path, 'w')
+        json.dump({'traceEvents': ExecutionTrace.get_trace_events(), 'displayTimeUnit': 'ms'}, f)
+        f.close()
+
+
+TRACED_METHODS = [
+    (NodeInstance, 'update', 'update'),
+    (NodeInstance, 'run_update_event', 'update_event'),
+    (HeadlessNodeInstance, 'update', 'update'),
+    (HeadlessNodeInstance, 'run_update_event', 'update_event'),
+    (PortInstance, 'exec', 'exec'),
+    (PortInstance, 'get_val', 'get_val'),
+    (PortInstance, 'set_val', 'set_val'),
+]
+
+
+def traced(func, kind):
+    takes_input = kind in ('update', 'update_event')
+
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            end = time.perf_counter_ns()
+            thread = threading.current_thread()
+            if thread.ident not in ExecutionTrace.thread_names:
+                ExecutionTrace.thread_names[thread.ident] = thread.name
+            input_called = -1
+            if takes_input:
+                input_called = args[0] if len(args) > 0 else kwargs.get('input_called', -1)
+            # the pulse id doesn't change until the next pulse begins, so the end is as good as the start
+            ExecutionTrace.events.append((kind, self, input_called, get_pulse_id(self), start, end, thread.ident))
+
+    return wrapper
+
+
+def get_pulse_id(obj):
+    ni = obj.parent_node_instance if isinstance(obj, PortInstance) else obj
+    exec_pulse = ni.flow.exec_pulse
+    return exec_pulse.id if exec_pulse is not None else -1
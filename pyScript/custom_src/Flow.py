@@ -2,21 +2,32 @@ from PySide2.QtCore import Qt, QPointF, QPoint, QRectF, QSizeF
 from PySide2.QtGui import QPainter, QPainterPath, QPen, QColor, QRadialGradient, QKeySequence, QTabletEvent, \
     QImage, QGuiApplication
 from PySide2.QtWidgets import QGraphicsView, QGraphicsScene, QListWidgetItem, QShortcut, QMenu, QGraphicsItem, \
-    QUndoStack
+    QUndoStack, QInputDialog
 
 import json
 import math
 
 from custom_src.DrawingObject import DrawingObject
+from custom_src.BranchFanOut import BranchFanOut
+from custom_src.ConnectionTable import ConnectionTable
+from custom_src.ExecScheduler import ExecScheduler
+from custom_src.Execution import ExecPulse
 from custom_src.FlowCommands import MoveComponents_Command, PlaceNodeInstanceInScene_Command, \
     PlaceDrawingObject_Command, RemoveComponents_Command, ConnectGates_Command, Paste_Command
+from custom_src.FlowCompiler import FlowCompiler, CompileError
 from custom_src.FlowProxyWidget import FlowProxyWidget
 from custom_src.FlowStylusModesWidget import FlowStylusModesWidget
 from custom_src.FlowZoomWidget import FlowZoomWidget
+from custom_src.HeatOverlay import HeatOverlay
 from custom_src.Node import Node
 from custom_src.node_choice_widget.NodeChoiceWidget import NodeChoiceWidget
 from custom_src.NodeInstance import NodeInstance
 from custom_src.PortInstance import PortInstance, PortInstanceGate
+from custom_src.ProjectJournal import FlowJournal
+from custom_src.PropagationEngine import PropagationEngine
+from custom_src.PureMemo import PureMemo
+from custom_src.StreamingPipeline import StreamingPipeline
+from custom_src.SubFlows import SubFlowDefinition, get_sub_flow_config
 from custom_src.global_tools.Debugger import Debugger
 from custom_src.global_tools.class_inspection import find_type_in_object, find_type_in_objects
 from custom_src.global_tools.math import pythagoras
@@ -46,6 +57,8 @@ class Flow(QGraphicsView):
         cut_shortcut.activated.connect(self.cut)
         paste_shortcut = QShortcut(QKeySequence.Paste, self)
         paste_shortcut.activated.connect(self.paste)
+        collapse_shortcut = QShortcut(QKeySequence('Ctrl+G'), self)
+        collapse_shortcut.activated.connect(self.collapse_selected_node_instances)
 
         # UNDO/REDO
         self.undo_stack = QUndoStack(self)
@@ -64,6 +77,16 @@ class Flow(QGraphicsView):
         self.all_node_instances: [NodeInstance] = []
         self.all_node_instance_classes = main_window.all_node_instance_classes  # ref
         self.all_nodes = main_window.all_nodes  # ref
+        self.exec_pulse = ExecPulse()
+        self.propagation_engine = PropagationEngine(self)
+        self.exec_scheduler = ExecScheduler(self)
+        self.branch_fan_out = BranchFanOut(self)
+        self.streaming_pipeline = StreamingPipeline(self)
+        self.pure_memo = PureMemo(self)
+        self.flow_compiler = FlowCompiler(self)
+        self.heat_overlay = HeatOverlay(self)
+        self.journal = FlowJournal(self)
+        self.connection_table = ConnectionTable(self)
         self.gate_selected: PortInstanceGate = None
         self.dragging_connection = False
         self.ignore_mouse_event = False  # for stylus - see tablet event
@@ -73,6 +96,7 @@ class Flow(QGraphicsView):
         self.mouse_press_pos: QPointF = None
         self.tablet_press_pos: QPointF = None
         self.auto_connection_gate = None  # stores the gate that we may try to auto connect to a newly placed NI
+        self.changing_components = False  # see place_nodes_from_config() and remove_components()
         self.panning = False
         self.pan_last_x = None
         self.pan_last_y = None
@@ -131,11 +155,14 @@ class Flow(QGraphicsView):
                 # the if is here just because it's very new feature and not all project files have drawings arr just yet
                 self.place_drawings_from_config(config['drawings'])
             self.undo_stack.clear()
+        self.journal.recording = True
 
     def design_style_changed(self):
         self.viewport().update()
 
     def selection_changed(self):
+        if self.changing_components:
+            return
         selected_items = self.scene().selectedItems()
         selected_node_instances = list(filter(find_NI_in_object, selected_items))
         if len(selected_node_instances) == 1:
@@ -153,6 +180,9 @@ class Flow(QGraphicsView):
             if find_type_in_object(i, NodeInstance):
                 ni: NodeInstance = i
                 menu: QMenu = ni.get_context_menu()
+                if ni in self.selected_node_instances():
+                    menu.addSeparator()
+                    menu.addAction('collapse selection into sub flow', self.collapse_selected_node_instances)
                 menu.exec_(event.globalPos())
                 event.accept()
 
@@ -333,6 +363,7 @@ class Flow(QGraphicsView):
             if self.stylus_mode == 'comment' and self.drawing:
                 Debugger.debug('drawing obj finished')
                 self.current_drawing.finished()
+                self.journal.drawing_finished(self.current_drawing)
                 self.current_drawing = None
                 self.drawing = False
 
@@ -425,6 +456,10 @@ class Flow(QGraphicsView):
                     self.connection_path(self.last_mouse_move_pos, gate_pos)
                 )
 
+        # DRAW HEAT OVERLAY
+        if HeatOverlay.enabled:
+            self.heat_overlay.draw(painter)
+
         # DRAW SELECTED NIs BORDER
         for ni in self.selected_node_instances():
             pen = QPen(QColor('#245d75'))
@@ -605,14 +640,22 @@ class Flow(QGraphicsView):
         ni.setSelected(True)
 
         self.all_node_instances.append(ni)
+        self.connection_table.node_instance_added(ni)
+        self.propagation_engine.node_instance_added(ni)
+        self.journal.node_instance_added(ni)
 
     def remove_node_instance(self, ni):
         ni.about_to_remove_from_scene()  # to stop running threads
+        self.journal.node_instance_removed(ni)
 
         self.scene().removeItem(ni)
 
         Debugger.debug('calling ni removed')
         self.all_node_instances.remove(ni)
+        self.connection_table.node_instance_removed(ni)
+        self.propagation_engine.node_instance_removed(ni)
+        self.pure_memo.node_instance_removed(ni)
+        self.heat_overlay.node_instance_removed(ni)
 
     def place_new_node_by_shortcut(self):  # Shift+P
         point_in_viewport = None
@@ -634,21 +677,27 @@ class Flow(QGraphicsView):
     def place_nodes_from_config(self, nodes_config, offset_pos: QPoint = QPoint(0, 0)):
         new_node_instances = []
 
-        for n_c in nodes_config:
-            # find parent node by title, type, package name and description as identifiers
-            parent_node_title = n_c['parent node title']
-            parent_node_package_name = n_c['parent node package']
-            parent_node = None
-            for pn in self.all_nodes:
-                pn: Node = pn
-                if pn.title == parent_node_title and \
-                        pn.package == parent_node_package_name:
-                    parent_node = pn
-                    break
-
-            new_NI = self.create_node_instance(parent_node, n_c)
-            self.add_node_instance(new_NI, QPoint(n_c['position x'], n_c['position y']) + offset_pos)
-            new_node_instances.append(new_NI)
+        # every added NI gets selected, the code preview only needs to show the last one
+        self.changing_components = True
+        try:
+            for n_c in nodes_config:
+                # find parent node by title, type, package name and description as identifiers
+                parent_node_title = n_c['parent node title']
+                parent_node_package_name = n_c['parent node package']
+                parent_node = None
+                for pn in self.all_nodes:
+                    pn: Node = pn
+                    if pn.title == parent_node_title and \
+                            pn.package == parent_node_package_name:
+                        parent_node = pn
+                        break
+
+                new_NI = self.create_node_instance(parent_node, n_c)
+                self.add_node_instance(new_NI, QPoint(n_c['position x'], n_c['position y']) + offset_pos)
+                new_node_instances.append(new_NI)
+        finally:
+            self.changing_components = False
+        self.selection_changed()
 
         return new_node_instances
 
@@ -685,11 +734,12 @@ class Flow(QGraphicsView):
             c_connected_input_port_index = c['connected input port index']
 
             if c_connected_node_instance is not None:  # which can be the case when pasting
-                parent_node_instance = node_instances[c_parent_node_instance_index]
-                connected_node_instance = node_instances[c_connected_node_instance]
+                output_port = node_instances[c_parent_node_instance_index].outputs[c_output_port_index]
+                input_port = node_instances[c_connected_node_instance].inputs[c_connected_input_port_index]
 
-                self.connect_gates(parent_node_instance.outputs[c_output_port_index].gate,
-                                   connected_node_instance.inputs[c_connected_input_port_index].gate)
+                # connect_gates() would disconnect them again if a connection appears twice in the config
+                if (output_port, input_port) not in self.connection_table:
+                    self.connect_gates(output_port.gate, input_port.gate)
 
     # DRAWINGS
     def create_drawing(self, config=None):
@@ -701,8 +751,10 @@ class Flow(QGraphicsView):
         if pos:
             drawing_obj.setPos(pos)
         self.drawings.append(drawing_obj)
+        self.journal.drawing_added(drawing_obj)
 
     def remove_drawing(self, drawing):
+        self.journal.drawing_removed(drawing)
         self.scene().removeItem(drawing)
         self.drawings.remove(drawing)
 
@@ -842,6 +894,50 @@ class Flow(QGraphicsView):
 
         self.undo_stack.push(Paste_Command(self, data, offset_for_middle_pos))
 
+    def collapse_selected_node_instances(self):  # ctrl+g
+        node_instances = self.selected_node_instances()
+        if len(node_instances) == 0:
+            return
+        name, ok = QInputDialog.getText(self, 'collapse into sub flow', 'name of the sub flow:')
+        if ok and len(name) > 0:
+            self.collapse_node_instances__cmd(node_instances, name)
+
+    def collapse_node_instances__cmd(self, node_instances, name):
+        """Replaces the NIs by one NI of a new sub flow (see SubFlowDefinition) with the given name, keeping the
+        connections to the other NIs. Returns the new NI or None if the sub flow can't be created."""
+        main_window = self.parent_script.main_window
+        logger = self.parent_script.logger
+        if main_window.get_sub_flow(name) is not None:
+            logger.log_message(self, 'there already is a sub flow \''+name+'\'', 'error')
+            return None
+
+        config, input_connections, output_connections = get_sub_flow_config(self, name, node_instances)
+        definition = SubFlowDefinition(main_window, config)
+        try:
+            definition.get_plan(self.parent_script)
+        except CompileError as e:
+            logger.log_message(self, 'couldn\'t create the sub flow \''+name+'\': '+str(e), 'error')
+            return None
+        main_window.add_sub_flow(definition)
+
+        pos = QPointF(0, 0)
+        for ni in node_instances:
+            pos += ni.pos()
+        pos /= len(node_instances)
+
+        new_NI = self.create_node_instance(definition.node, None)
+        self.undo_stack.beginMacro('collapse into sub flow')
+        self.undo_stack.push(RemoveComponents_Command(self, node_instances))
+        self.undo_stack.push(PlaceNodeInstanceInScene_Command(self, new_NI, pos))
+        for outer_port, index in input_connections:
+            self.undo_stack.push(ConnectGates_Command(self, parent_port=outer_port, child_port=new_NI.inputs[index]))
+        for index, outer_port in output_connections:
+            self.undo_stack.push(ConnectGates_Command(self, parent_port=new_NI.outputs[index], child_port=outer_port))
+        self.undo_stack.endMacro()
+
+        self.viewport().update()
+        return new_NI
+
     def add_component(self, e):
         if find_type_in_object(e, NodeInstance):
             self.add_node_instance(e)
@@ -854,6 +950,24 @@ class Flow(QGraphicsView):
         elif find_type_in_object(e, DrawingObject):
             self.remove_drawing(e)
 
+    def add_components(self, items):
+        self.changing_components = True  # the selection changes with every item, see selection_changed()
+        try:
+            for i in items:
+                self.add_component(i)
+        finally:
+            self.changing_components = False
+        self.selection_changed()
+
+    def remove_components(self, items):
+        self.changing_components = True
+        try:
+            for i in items:
+                self.remove_component(i)
+        finally:
+            self.changing_components = False
+        self.selection_changed()
+
     def remove_selected_components(self):
         self.undo_stack.push(
             RemoveComponents_Command(self, self.scene().selectedItems()))
@@ -878,28 +992,32 @@ class Flow(QGraphicsView):
         if parent_port_instance.direction != child_port_instance.direction and \
                 parent_port_instance.parent_node_instance != child_port_instance.parent_node_instance and \
                 parent_port_instance.type_ == child_port_instance.type_:
-            try:  # remove connection if port instances are already connected
-                index = parent_port_instance.connected_port_instances.index(child_port_instance)
+            if child_port_instance in parent_port_instance.connected_port_instances:
+                # remove connection if port instances are already connected
                 parent_port_instance.connected_port_instances.remove(child_port_instance)
                 parent_port_instance.disconnected()
                 child_port_instance.connected_port_instances.remove(parent_port_instance)
                 child_port_instance.disconnected()
+                self.connection_table.gates_connected(parent_port_instance, child_port_instance, False)
+                self.journal.gates_connected(parent_port_instance, child_port_instance, False)
 
-            except ValueError:  # connect port instances
+            else:  # connect port instances
                 # remove all connections from parent port instance if it's a data input
                 if parent_port_instance.direction == 'input' and parent_port_instance.type_ == 'data':
-                    for cpi in parent_port_instance.connected_port_instances:
+                    for cpi in parent_port_instance.connected_port_instances.copy():
                         self.connect_gates__cmd(parent_gate, cpi.gate)  # actually disconnects the gates
 
                 # remove all connections from child port instance it it's a data input
                 if child_port_instance.direction == 'input' and child_port_instance.type_ == 'data':
-                    for cpi in child_port_instance.connected_port_instances:
+                    for cpi in child_port_instance.connected_port_instances.copy():
                         self.connect_gates__cmd(child_gate, cpi.gate)  # actually disconnects the gates
 
                 parent_port_instance.connected_port_instances.append(child_port_instance)
                 child_port_instance.connected_port_instances.append(parent_port_instance)
                 parent_port_instance.connected()
                 child_port_instance.connected()
+                self.connection_table.gates_connected(parent_port_instance, child_port_instance, True)
+                self.journal.gates_connected(parent_port_instance, child_port_instance, True)
 
         self.viewport().repaint()
 
@@ -961,38 +1079,8 @@ class Flow(QGraphicsView):
         return script_node_instances_list
 
     def get_connections_json_data(self, node_instances, only_with_connections_to=None):
-        script_ni_connections_list = []
-        for ni in node_instances:
-            for out in ni.outputs:
-                if len(out.connected_port_instances) > 0:
-                    for connected_port in out.connected_port_instances:
-
-                        # this only applies when saving config data through deleting node instances:
-                        if only_with_connections_to is not None and \
-                                connected_port.parent_node_instance not in only_with_connections_to and \
-                                ni not in only_with_connections_to:
-                            continue
-                        # because I am not allowed to save connections between nodes connected to each other and both
-                        # connected to the deleted node, only the connections to the deleted node shall be saved
-
-                        connection_dict = {'parent node instance index': node_instances.index(ni),
-                                           'output port index': ni.outputs.index(out)}
-
-                        # yes, very important: when copying components, there might be connections going outside the
-                        # selected lists, these should be ignored. When saving a project, all components are considered,
-                        # so then the index values will never be none
-                        connected_ni_index = node_instances.index(connected_port.parent_node_instance) if \
-                            node_instances.__contains__(connected_port.parent_node_instance) else \
-                            None
-                        connection_dict['connected node instance'] = connected_ni_index
-
-                        connected_ip_index = connected_port.parent_node_instance.inputs.index(connected_port) if \
-                            connected_ni_index is not None else None
-                        connection_dict['connected input port index'] = connected_ip_index
-
-                        script_ni_connections_list.append(connection_dict)
-
-        return script_ni_connections_list
+        """The connections going out of the NIs, see ConnectionTable.get_json_data()."""
+        return self.connection_table.get_json_data(node_instances, only_with_connections_to)
 
     def get_drawings_json_data(self, drawings):
         drawings_list = []
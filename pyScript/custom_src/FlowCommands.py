@@ -19,11 +19,13 @@ class MoveComponents_Command(QUndoCommand):
         items_group.setPos(self.p_from)
         self.last_item_group_pos = items_group.pos()
         self.destroy_items_group(items_group)
+        self.flow.journal.components_moved(self.items_list)
 
     def redo(self):
         items_group = self.items_group()
         items_group.setPos(self.p_to - self.last_item_group_pos)
         self.destroy_items_group(items_group)
+        self.flow.journal.components_moved(self.items_list)
 
 
     def items_group(self):
@@ -77,43 +79,26 @@ class RemoveComponents_Command(QUndoCommand):
 
         self.flow = flow
         self.items = items
-        self.broken_connections = []  # the connections that go beyond the removed ports and need to be restored in undo
 
         self.node_instances = []
         for i in self.items:
             if find_type_in_object(i, NodeInstance):
                 self.node_instances.append(i)
 
-        self.connected_node_instances_indices_not_in_del_selection = []
-        for n in self.node_instances:
-            for i in n.inputs:
-                for cpi in i.connected_port_instances:
-                    cni = cpi.parent_node_instance
-                    if cni not in self.node_instances:
-                        self.broken_connections.append({
-                            cpi: i
-                        })
-            for o in n.outputs:
-                for cpi in o.connected_port_instances:
-                    cni = cpi.parent_node_instance
-                    if cni not in self.node_instances:
-                        self.broken_connections.append({
-                            o: cpi
-                        })
+        # the connections that go beyond the removed ports and need to be restored in undo, [(output, input), ...]
+        self.broken_connections = self.flow.connection_table.get_outer_connections(self.node_instances)
 
     def undo(self):
-        for i in self.items:
-            self.flow.add_component(i)
+        self.flow.add_components(self.items)
         self.connect_gates()
 
     def redo(self):
         self.connect_gates()
-        for i in self.items:
-            self.flow.remove_component(i)
+        self.flow.remove_components(self.items)
 
     def connect_gates(self):
-        for b_c in self.broken_connections:
-            self.flow.connect_gates(list(b_c.keys())[0].gate, list(b_c.values())[0].gate)
+        for output_port, input_port in self.broken_connections:
+            self.flow.connect_gates(output_port.gate, input_port.gate)
 
 
 class ConnectGates_Command(QUndoCommand):
@@ -141,8 +126,7 @@ class Paste_Command(QUndoCommand):
         self.pasted_items = []
 
     def undo(self):
-        for i in self.pasted_items:
-            self.flow.remove_component(i)
+        self.flow.remove_components(self.pasted_items)
 
         self.pasted_items.clear()
 
@@ -0,0 +1,704 @@
+import ast
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from custom_src.global_tools.Debugger import Debugger
+
+
+class FlowCompiler:
+    """Compiles exec chains into plain Python functions (used when ExecutionSettings.compiled_exec is enabled). Each
+    flow has one.
+
+    When an exec output gets executed, everything happening downstream of it gets compiled once into a function doing
+    the same as the NIs would do, but without update(), input(), get_val(), set_val() and exec() for every NI: the
+    logic of the std, math and variable nodes gets inlined (see ACTIVE_TEMPLATES and DATA_TEMPLATES), data inputs
+    become expressions and data NIs get computed where their values are needed. All other NIs get called. The
+    functions are cached per exec output until the flow changes (connections, ports).
+
+    Compared to executing the NIs one by one:
+        - the data output values of inlined NIs are kept in local variables and get set (and pushed) once, when the
+          function returns (or before a NI gets called which might need them) - not after every change
+        - data NIs get computed when an inlined NI needs their value, not when their inputs change
+        - an exception aborts the whole chain, not only the branch of the NI
+
+    The same code can be exported as a Python module which doesn't need pyScript at all (see get_module_source()), as
+    long as all NIs of the exported chains can be inlined."""
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.functions = {}  # {exec output: compiled function or None if it can't be compiled}
+        self.variables_access = VariablesAccess(flow)
+
+        # STATS
+        self.compiled_chains = 0
+        self.not_compilable = 0
+        self.compiled_runs = 0
+        self.fallback_node_instances = 0  # NIs in compiled chains which get called instead of being inlined
+
+    def flow_changed(self):
+        self.functions = {}
+
+    def exec(self, output_port):
+        """Called from PortInstance.exec(). Returns False if the chain can't be compiled, it has to be executed
+        normally then."""
+        function = self.functions.get(output_port, False)
+        if function is False:
+            function = self.compile(output_port)
+            self.functions[output_port] = function
+        if function is None:
+            return False
+
+        self.compiled_runs += 1
+        try:
+            function()
+        except Exception as e:
+            Debugger.debug('EXCEPTION IN compiled chain of', output_port.parent_node_instance.parent_node.title,
+                           'NI:', e)
+        return True
+
+    def compile(self, output_port):
+        generator = FlowCodeGenerator(self.flow)
+        try:
+            source = generator.generate_function('run', [output_port])
+            namespace = generator.get_namespace(self.variables_access)
+            exec(compile(generator.get_helpers_source()+source, '<compiled chain>', 'exec'), namespace)
+        except (CompileError, SyntaxError, RecursionError, MemoryError) as e:  # SyntaxError: too deeply nested
+            Debugger.debug('exec chain of', output_port.parent_node_instance.parent_node.title, 'NI can\'t be '
+                           'compiled:', e)
+            self.not_compilable += 1
+            return None
+
+        self.compiled_chains += 1
+        self.fallback_node_instances += generator.fallbacks
+        return namespace['run']
+
+    def get_module_source(self, node_instances=None):
+        """Returns the source of a standalone module with a function run_<index>() for each of the given NIs (default:
+        all NIs which have connected exec outputs but no exec inputs, like buttons) doing what happens when their exec
+        outputs get executed. Raises a CompileError if something can't be exported."""
+        all_node_instances = self.flow.all_node_instances
+        if node_instances is None:
+            node_instances = [ni for ni in all_node_instances
+                              if not any(i.type_ == 'exec' for i in ni.inputs) and
+                              any(o.type_ == 'exec' and len(o.connected_port_instances) > 0 for o in ni.outputs)]
+
+        generator = FlowCodeGenerator(self.flow, export=True)
+        functions_source = ''
+        function_names = []
+        for ni in node_instances:
+            index = all_node_instances.index(ni)
+            function_name = 'run_'+str(index)
+            functions_source += '\n\n# '+ni.parent_node.title+' (node instance '+str(index)+')\n' + \
+                                generator.generate_function(function_name,
+                                                            [o for o in ni.outputs if o.type_ == 'exec'])
+            function_names.append((index, function_name))
+
+        script_name = self.flow.parent_script.name
+        variables = ''.join('    '+repr(v.name)+': Variable('+generator.literal(v.val)+'),\n'
+                            for v in self.flow.parent_script.variables_handler.variables)
+        return EXPORT_MODULE_TEMPLATE % {
+            'script': repr(script_name)[1:-1],
+            'variables': variables,
+            'helpers': generator.get_helpers_source(),
+            'functions': functions_source,
+            'function names': ''.join('    '+str(i)+': '+name+',\n' for i, name in function_names)}
+
+    def export(self, file_path, node_instances=None):
+        source = self.get_module_source(node_instances)
+        f = open(file_path, 'w')
+        f.write(source)
+        f.close()
+
+    def reset_stats(self):
+        self.compiled_chains = 0
+        self.not_compilable = 0
+        self.compiled_runs = 0
+        self.fallback_node_instances = 0
+
+    def get_stats_str(self):
+        return 'compiled chains: '+str(self.compiled_chains) + \
+               ', not compilable: '+str(self.not_compilable) + \
+               ', compiled runs: '+str(self.compiled_runs) + \
+               ', called (not inlined) NIs: '+str(self.fallback_node_instances)
+
+
+class CompileError(Exception):
+    pass
+
+
+class NotInlinable(Exception):
+    """Raised by templates if the NI's current state isn't supported, the NI gets called then."""
+    pass
+
+
+FLUSH = object()  # marker: set the values of all local outputs and variables before a NI gets called
+RELOAD = object()  # marker: get the values of all local outputs again after a NI got called
+
+
+class FlowCodeGenerator:
+    """Generates the Python source of functions executing the exec chains starting at some exec outputs. In export
+    mode, the code doesn't refer to any objects of the flow."""
+
+    max_inlined_node_instances = 50000  # exec cycles (or many joining branches) would inline forever
+
+    def __init__(self, flow, export=False):
+        self.flow = flow
+        self.export = export
+        self.indices = {ni: i for i, ni in enumerate(flow.all_node_instances)}
+        self.namespace = {}  # {name: object the generated code refers to}
+        self.helpers = []  # names of HELPERS used
+        self.fallbacks = 0
+
+        # per function
+        self.lines = []  # (indentation, line or marker)
+        self.indentation = 1
+        self.tmp_counter = 0
+        self.output_locals = {}  # {data output of an active NI: local variable name}
+        self.assigned_outputs = {}  # {data output: None}, the outputs set by the function (ordered)
+        self.data_values = {}  # {data NI: expressions of its output values}, valid until something changed
+        self.inlined = 0
+
+    def generate_function(self, function_name, exec_outputs):
+        self.begin_function()
+        for o in exec_outputs:
+            self.inline_exec_output(o)
+        return self.end_function(function_name)
+
+    def begin_function(self):
+        self.lines = []
+        self.indentation = 1
+        self.output_locals = {}
+        self.assigned_outputs = {}
+        self.inlined = 0
+
+    def end_function(self, function_name, arguments=()):
+        source = 'def '+function_name+'('+', '.join(arguments)+'):\n'
+        for port, name in self.output_locals.items():
+            source += '    '+name+' = '+('None' if self.export else self.port_name(port)+'.val')+'\n'
+        body = self.expand_markers(self.lines)
+        if self.export:
+            source += ''.join(body) if len(body) > 0 else '    pass\n'
+        else:
+            source += '    try:\n'
+            source += ''.join('    '+line for line in body) if len(body) > 0 else '        pass\n'
+            source += '    finally:\n'
+            source += ''.join('    '+line for line in self.expand_markers([(1, FLUSH)]))
+        return source
+
+    def expand_markers(self, lines):
+        expanded = []
+        for indentation, line in lines:
+            if line is FLUSH:
+                expanded += [(indentation, self.port_name(p)+'.set_val('+self.output_locals[p]+')')
+                             for p in self.assigned_outputs]
+                expanded.append((indentation, 'flush_vars()'))
+            elif line is RELOAD:
+                expanded += [(indentation, name+' = '+self.port_name(p)+'.val')
+                             for p, name in self.output_locals.items()]
+            else:
+                expanded.append((indentation, line))
+        return ['    '*indentation+line+'\n' for indentation, line in expanded]
+
+    def get_namespace(self, variables_access):
+        namespace = {'math': math, 'numpy': numpy, 'call_node_instance': call_node_instance,
+                     'get_var': variables_access.get_var, 'set_var': variables_access.set_var,
+                     'flush_vars': variables_access.flush}
+        namespace.update(self.namespace)
+        return namespace
+
+    def get_helpers_source(self):
+        return ''.join(HELPERS[name]+'\n\n' for name in self.helpers)
+
+    #   EMITTING
+
+    def line(self, line):
+        self.lines.append((self.indentation, line))
+
+    def statement(self, line):
+        """A line which might change values."""
+        self.line(line)
+        self.data_values = {}
+
+    def block(self):
+        return CodeBlock(self)
+
+    def tmp(self):
+        self.tmp_counter += 1
+        return 't'+str(self.tmp_counter)
+
+    def tmp_value(self, expression):
+        t = self.tmp()
+        self.line(t+' = '+expression)
+        return t
+
+    def helper(self, name):
+        if name not in self.helpers:
+            self.helpers.append(name)
+        return name
+
+    def literal(self, val):
+        source = repr(val)
+        try:
+            if ast.literal_eval(source) == val:
+                return source
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            pass
+        raise CompileError('the value '+source[:40]+' can\'t be exported')
+
+    #   NAMES
+
+    def bind(self, name, obj):
+        if self.export:
+            raise CompileError('can\'t refer to '+name+' when exporting')
+        self.namespace[name] = obj
+        return name
+
+    def node_instance_name(self, ni):
+        return self.bind('n'+str(self.indices[ni]), ni)
+
+    def port_name(self, output_port):
+        return self.bind('p'+str(self.indices[output_port.parent_node_instance])+'_'+str(output_port.index),
+                         output_port)
+
+    def output_local(self, output_port):
+        name = self.output_locals.get(output_port)
+        if name is None:
+            name = 'o'+str(self.indices[output_port.parent_node_instance])+'_'+str(output_port.index)
+            self.output_locals[output_port] = name
+        return name
+
+    #   EXEC
+
+    def inline_exec_output(self, output_port):
+        """Inlines everything that happens when the exec output gets executed at the current position."""
+        self.inline_exec_inputs(self.exec_output_targets(output_port))
+
+    def inline_exec_inputs(self, inputs):
+        """Inlines what happens when the exec inputs get triggered one after another. Sequences of NIs get generated
+        in a loop, not recursively, so long chains don't hit the recursion limit."""
+        self.data_values = {}
+        work = list(reversed(inputs))
+        while len(work) > 0:
+            inp = work.pop()
+            for o in reversed(self.inline_node_instance(inp.parent_node_instance, inp.index)):
+                work.extend(reversed(self.exec_output_targets(o)))
+
+    def exec_output_targets(self, output_port):
+        """The exec inputs getting triggered by the exec output, in order."""
+        return output_port.connected_port_instances
+
+    def inline_node_instance(self, ni, input_index):
+        """Generates what the NI does when the exec input gets triggered and returns the exec outputs which get
+        executed at the end."""
+        self.inlined += 1
+        if self.inlined > FlowCodeGenerator.max_inlined_node_instances:
+            raise CompileError('too many NIs, the exec connections might contain cycles')
+
+        self.data_values = {}
+        template = ACTIVE_TEMPLATES.get((ni.parent_node.package, ni.parent_node.title))
+        if template is not None:
+            num_lines = len(self.lines)
+            indentation = self.indentation
+            try:
+                return template(self, ni, input_index)
+            except NotInlinable:
+                del self.lines[num_lines:]
+                self.indentation = indentation
+
+        if self.export:
+            raise CompileError('node \''+ni.parent_node.title+'\' can\'t be exported')
+        self.fallbacks += 1
+        self.line(FLUSH)
+        self.statement(self.update_node_instance(ni, input_index))
+        self.line(RELOAD)
+        return []
+
+    def update_node_instance(self, ni, input_index):
+        """Returns the statement calling a NI which can't be inlined."""
+        return self.node_instance_name(ni)+'.update('+str(input_index)+')'
+
+    def set_output(self, ni, index, expression):
+        port = ni.outputs[index]
+        self.assigned_outputs[port] = None
+        self.statement(self.output_local(port)+' = '+expression)
+
+    #   DATA
+
+    def input(self, ni, index):
+        """Returns an expression of the input's current value."""
+        port = ni.inputs[index]
+        if len(port.connected_port_instances) > 0:
+            output_port = port.connected_port_instances[0]
+            parent_ni = output_port.parent_node_instance
+            if parent_ni.is_active():
+                return self.output_local(output_port)
+            return self.data_value(parent_ni)[output_port.index]
+        if port.widget is None:
+            return 'None'
+        if self.export:
+            return self.literal(port.get_val())
+        return self.bind('w'+str(self.indices[ni])+'_'+str(index), port.get_val)+'()'
+
+    def data_value(self, ni):
+        """Generates the computation of a data NI (and all data NIs it depends on which didn't get computed since the
+        last change) and returns expressions of its output values."""
+        if ni in self.data_values:
+            return self.data_values[ni]
+
+        # order by dependencies, without recursion (data chains can be very long)
+        order = []
+        done = set()
+        in_progress = {ni}
+        stack = [(ni, iter(self.data_parents(ni)))]
+        while len(stack) > 0:
+            node_instance, parents = stack[-1]
+            parent = next(parents, None)
+            if parent is None:
+                stack.pop()
+                in_progress.remove(node_instance)
+                order.append(node_instance)
+                done.add(node_instance)
+                continue
+            if parent in self.data_values or parent in done:
+                continue
+            if parent in in_progress:
+                raise CompileError('the data connections contain cycles')
+            in_progress.add(parent)
+            stack.append((parent, iter(self.data_parents(parent))))
+
+        for node_instance in order:
+            self.data_values[node_instance] = self.compute_data_node_instance(node_instance)
+        return self.data_values[ni]
+
+    def data_parents(self, ni):
+        for i in ni.inputs:
+            if len(i.connected_port_instances) > 0:
+                parent_ni = i.connected_port_instances[0].parent_node_instance
+                if not parent_ni.is_active():
+                    yield parent_ni
+
+    def compute_data_node_instance(self, ni):
+        args = [self.input(ni, i) for i in range(len(ni.inputs))]
+        template = DATA_TEMPLATES.get((ni.parent_node.package, ni.parent_node.title))
+        if template is not None and len(ni.outputs) == 1:
+            try:
+                return [self.tmp_value(template(self, ni, args))]
+            except NotInlinable:
+                pass
+
+        if self.export:
+            raise CompileError('node \''+ni.parent_node.title+'\' can\'t be exported')
+        self.fallbacks += 1
+        t = self.tmp_value('call_node_instance('+self.node_instance_name(ni)+', {' +
+                           ', '.join(str(i)+': '+args[i] for i in range(len(args)))+'})')
+        return [t+'['+str(i)+']' for i in range(len(ni.outputs))]
+
+
+class CodeBlock:
+    def __init__(self, generator):
+        self.generator = generator
+        self.num_lines = 0
+
+    def __enter__(self):
+        self.num_lines = len(self.generator.lines)
+        self.generator.indentation += 1
+        self.generator.data_values = {}
+
+    def __exit__(self, exc_type=None, exc_val=None, exc_tb=None):
+        if len(self.generator.lines) == self.num_lines:
+            self.generator.line('pass')
+        self.generator.indentation -= 1
+        self.generator.data_values = {}
+
+
+class VariablesAccess:
+    """The script variables for compiled chains. Updating the get var NIs of a changed variable is deferred until the
+    chain is done (or calls a NI), compiled code reads the variables directly."""
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.changed_vars = []
+
+    def get_var(self, name):
+        return self.flow.parent_script.variables_handler.get_var(name)
+
+    def set_var(self, name, val):
+        var = self.get_var(name)
+        if var is None:
+            return False
+        var.val = val
+        if var not in self.changed_vars:
+            self.changed_vars.append(var)
+        return True
+
+    def flush(self):
+        changed_vars = self.changed_vars
+        self.changed_vars = []
+        for var in changed_vars:
+            self.flow.parent_script.variables_handler.update_variable_usages(var)
+
+
+def call_node_instance(ni, input_vals):
+    """Runs a data NI which can't be inlined with the given input values and returns its output values."""
+    stream_input_vals = ni.stream_input_vals
+    ni.stream_input_vals = input_vals
+    try:
+        ni.run_update_event(-1)
+    finally:
+        ni.stream_input_vals = stream_input_vals
+    return [o.val for o in ni.outputs]
+
+
+#   TEMPLATES
+# Active templates generate what a NI does when an exec input gets triggered and return the exec outputs that get
+# executed at the end. Data templates return an expression of the output value from expressions of the inputs. Both
+# raise NotInlinable if the NI's state isn't supported.
+
+def compile_inc(c, ni, input_index, change='+ 1'):
+    if input_index != 0:
+        return []
+    name = c.tmp_value(c.input(ni, 1))
+    new_val = c.tmp_value('get_var('+name+').val '+change)
+    c.statement('set_var('+name+', '+new_val+')')
+    c.set_output(ni, 1, new_val)
+    return [ni.outputs[0]]
+
+
+def compile_decr(c, ni, input_index):
+    return compile_inc(c, ni, input_index, '- 1')
+
+
+def compile_set_var(c, ni, input_index):
+    if input_index != 0:
+        return []
+    name = c.tmp_value(c.input(ni, 1))
+    val = c.tmp_value(c.input(ni, 2))
+    c.line('if set_var('+name+', '+val+'):')
+    with c.block():
+        c.set_output(ni, 1, val)
+    return [ni.outputs[0]]
+
+
+def compile_print(c, ni, input_index):
+    if input_index != 0:
+        return []
+    c.statement('print('+c.input(ni, 1)+')')
+    return [ni.outputs[0]]
+
+
+def compile_arr_append(c, ni, input_index):
+    if input_index != 0:
+        return []
+    arr = c.tmp_value(c.input(ni, 1))
+    c.statement(arr+'.append('+c.input(ni, 2)+')')
+    c.set_output(ni, 1, arr)
+    return [ni.outputs[0]]
+
+
+def compile_arr_insert(c, ni, input_index):
+    if input_index != 0:
+        return []
+    arr = c.tmp_value(c.input(ni, 1))
+    index = c.tmp_value(c.input(ni, 2))
+    c.statement(arr+'.insert('+index+', '+c.input(ni, 3)+')')
+    c.set_output(ni, 1, arr)
+    return [ni.outputs[0]]
+
+
+def compile_if(c, ni, input_index):
+    if input_index != 0:
+        return []
+    num_conditions = len(ni.inputs)-1
+    if num_conditions < 1 or len(ni.outputs) != num_conditions+1:
+        raise NotInlinable()
+    else_blocks = []  # the conditions get computed one after another, like in do_if()
+    for i in range(num_conditions):
+        c.line('if '+c.input(ni, 1+i)+':')
+        with c.block():
+            c.inline_exec_output(ni.outputs[i])
+        c.line('else:')
+        else_block = c.block()
+        else_block.__enter__()
+        else_blocks.append(else_block)
+    c.inline_exec_output(ni.outputs[-1])
+    for else_block in reversed(else_blocks):
+        else_block.__exit__()
+    return []
+
+
+def compile_while(c, ni, input_index):
+    if input_index != 0:
+        return []
+    c.line('while True:')
+    with c.block():
+        c.line('if not '+c.input(ni, 1)+':')
+        with c.block():
+            c.line('break')
+        c.inline_exec_output(ni.outputs[0])
+    return []
+
+
+def compile_for_each(c, ni, input_index):
+    if input_index != 0:
+        return []
+    if getattr(ni, 'map_mode', False):
+        raise NotInlinable()
+    obj = c.tmp()
+    c.line('for '+obj+' in '+c.input(ni, 1)+':')
+    with c.block():
+        c.set_output(ni, 1, obj)
+        c.inline_exec_output(ni.outputs[0])
+    return [ni.outputs[2]]
+
+
+def compile_for_n_dim(c, ni, input_index):
+    if input_index != 0:
+        return []
+    if len(ni.inputs) != 3:  # more than one dimension
+        raise NotInlinable()
+    i = c.tmp()
+    c.line('for '+i+' in range('+c.input(ni, 1)+', '+c.input(ni, 2)+'):')
+    with c.block():
+        c.set_output(ni, 1, i)
+        c.inline_exec_output(ni.outputs[0])
+    return []
+
+
+ACTIVE_TEMPLATES = {  # {(package, node title): template}
+    ('std', 'inc'): compile_inc,
+    ('std', 'decr'): compile_decr,
+    ('std', 'Print'): compile_print,
+    ('std', 'Arr Append'): compile_arr_append,
+    ('std', 'Arr Insert'): compile_arr_insert,
+    ('std', 'If'): compile_if,
+    ('std', 'While'): compile_while,
+    ('std', 'For Each'): compile_for_each,
+    ('std', 'For n Dim'): compile_for_n_dim,
+    ('built in', 'set var'): compile_set_var,
+}
+
+
+def operator_template(operator):
+    return lambda c, ni, args: '('+(' '+operator+' ').join(args)+')'
+
+
+def comparison_template(operator):
+    return lambda c, ni, args: '('+' and '.join(args[i]+' '+operator+' '+args[i+1]
+                                                 for i in range(len(args)-1))+')'
+
+
+def helper_template(helper):
+    return lambda c, ni, args: c.helper(helper)+'('+', '.join(args)+')'
+
+
+DATA_TEMPLATES = {  # {(package, node title): template}
+    ('std', '+'): helper_template('plus'),
+    ('std', '-'): operator_template('-'),
+    ('std', '*'): operator_template('*'),
+    ('std', '/'): operator_template('/'),
+    ('std', '>'): comparison_template('>'),
+    ('std', '<'): comparison_template('<'),
+    ('std', '>='): comparison_template('>='),
+    ('std', '<='): comparison_template('<='),
+    ('std', '=='): comparison_template('=='),
+    ('std', '!='): comparison_template('!='),
+    ('std', 'and'): operator_template('and'),
+    ('std', 'or'): operator_template('or'),
+    ('std', 'not'): lambda c, ni, args: '(not '+args[0]+')',
+    ('std', 'len'): lambda c, ni, args: 'len('+args[0]+')',
+    ('std', 'arr get'): lambda c, ni, args: args[0]+'['+args[1]+']',
+    ('std', 'arr in'): lambda c, ni, args: '('+args[0]+' in '+args[1]+')',
+    ('math', 'sin'): helper_template('sin'),
+    ('math', 'cos'): helper_template('cos'),
+    ('math', 'tan'): helper_template('tan'),
+    ('math', 'abs'): helper_template('abs_'),
+    ('built in', 'get var'): helper_template('get_var_val'),
+}
+
+
+HELPERS = {  # functions used by the generated code, the same as the nodes' update_event()s
+    'plus': '''def plus(*vals):
+    if numpy is not None and any(isinstance(val, numpy.ndarray) for val in vals):
+        sum_val = vals[0]
+        for val in vals[1:]:
+            sum_val = sum_val + val
+        return sum_val
+    try:
+        return sum(vals)
+    except Exception:
+        sum_val = ''
+        for val in vals:
+            if val is None:
+                return None
+            sum_val += str(val)
+        return sum_val''',
+    'sin': '''def sin(val):
+    if numpy is not None and isinstance(val, numpy.ndarray):
+        return numpy.sin(val)
+    return math.sin(val)''',
+    'cos': '''def cos(val):
+    if numpy is not None and isinstance(val, numpy.ndarray):
+        return numpy.cos(val)
+    return math.cos(val)''',
+    'tan': '''def tan(val):
+    if numpy is not None and isinstance(val, numpy.ndarray):
+        return numpy.tan(val)
+    return math.tan(val)''',
+    'abs_': '''def abs_(val):
+    if numpy is not None and isinstance(val, numpy.ndarray):
+        return numpy.abs(val)
+    return abs(val)''',
+    'get_var_val': '''def get_var_val(name):
+    var = get_var(name)
+    return var.val if var is not None else None''',
+}
+
+
+EXPORT_MODULE_TEMPLATE = '''"""Generated by pyScript from the script '%(script)s', runs without pyScript.
+Every run_<index>() function does what happens when the exec outputs of the node instance with that index get executed
+(like when a button gets clicked). Usage: python <this file> [INDEX ...] (default: all of them, in this order)"""
+
+import math
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Variable:
+    def __init__(self, val):
+        self.val = val
+
+
+variables = {  # the script's variables
+%(variables)s}
+
+
+def get_var(name):
+    return variables.get(name)
+
+
+def set_var(name, val):
+    var = variables.get(name)
+    if var is None:
+        return False
+    var.val = val
+    return True
+
+
+%(helpers)s%(functions)s
+
+RUN_FUNCTIONS = {
+%(function names)s}
+
+
+if __name__ == '__main__':
+    for index in (sys.argv[1:] or list(RUN_FUNCTIONS.keys())):
+        RUN_FUNCTIONS[int(index)]()
+'''
@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import deque
+
+from PySide2.QtCore import Qt, QTimer, QRectF
+from PySide2.QtGui import QColor, QPen, QFont
+
+from custom_src.NodeInstance import NodeInstance
+from custom_src.PortInstance import PortInstance
+from custom_src.global_tools.MethodPatch import MethodPatch
+
+
+class HeatOverlay:
+    """Shows which NIs and connections of a flow are hot while it's running: every NI gets tinted by its share of
+    the execution time of the last few seconds and every connection is labeled with the number of signals per
+    second that went through it. Each Flow has one, it gets drawn in Flow.drawForeground().
+
+    While enabled, NodeInstance.run_update_event(), PortInstance.exec() and PortInstance.updated_val() just add to
+    plain counters (see MethodPatch; the time a NI spent in the updates it caused itself isn't counted twice). A
+    timer samples the counters at a fixed rate into ring buffers holding the last window_seconds, so drawing the
+    overlay doesn't influence what it measures."""
+
+    enabled = False
+    sample_rate = 4  # per second
+    window_seconds = 10
+    busy_times = {}  # {NI: total seconds spent in its own update_event()}
+    signal_counts = {}  # {output port: total number of exec signals / data pushes}
+    lock = threading.Lock()  # NIs might run in other threads (see ScriptExecutor, BranchFanOut, StreamingPipeline)
+    thread_info = threading.local()
+    patches = []
+
+    def enable():
+        if HeatOverlay.enabled:
+            return
+        HeatOverlay.patches = [
+            MethodPatch(NodeInstance, 'run_update_event', measure_update),
+            MethodPatch(PortInstance, 'exec', count_signals),
+            MethodPatch(PortInstance, 'updated_val', count_signals),
+        ]
+        HeatOverlay.enabled = True
+
+    def disable():
+        if not HeatOverlay.enabled:
+            return
+        for patch in HeatOverlay.patches:
+            patch.remove()
+        HeatOverlay.patches = []
+        with HeatOverlay.lock:
+            HeatOverlay.busy_times = {}
+            HeatOverlay.signal_counts = {}
+        HeatOverlay.enabled = False
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.sample)
+        self.last_busy_times = {}
+        self.last_signal_counts = {}
+        self.busy_time_samples = {}  # {NI: deque of the busy time per sample interval}
+        self.signal_samples = {}  # {output port: deque of the signals per sample interval}
+        self.samples_taken = 0
+
+        if HeatOverlay.enabled:
+            self.start()
+
+    def start(self):
+        self.timer.start(1000 // HeatOverlay.sample_rate)
+
+    def stop(self):
+        self.timer.stop()
+        self.last_busy_times = {}
+        self.last_signal_counts = {}
+        self.busy_time_samples = {}
+        self.signal_samples = {}
+        self.samples_taken = 0
+        self.flow.viewport().update()
+
+    def node_instance_removed(self, ni):
+        """Called from Flow.remove_node_instance(), so the counters don't keep removed NIs alive."""
+        with HeatOverlay.lock:
+            HeatOverlay.busy_times.pop(ni, None)
+            for o in ni.outputs:
+                HeatOverlay.signal_counts.pop(o, None)
+        self.last_busy_times.pop(ni, None)
+        self.busy_time_samples.pop(ni, None)
+        for o in ni.outputs:
+            self.last_signal_counts.pop(o, None)
+            self.signal_samples.pop(o, None)
+
+    def sample(self):
+        buffer_size = HeatOverlay.sample_rate * HeatOverlay.window_seconds
+        busy_time_samples = {}
+        signal_samples = {}
+        for ni in self.flow.all_node_instances:
+            busy_time = HeatOverlay.busy_times.get(ni, 0)
+            busy_time_samples[ni] = self.busy_time_samples.get(ni) or deque(maxlen=buffer_size)
+            busy_time_samples[ni].append(busy_time - self.last_busy_times.get(ni, 0))
+            self.last_busy_times[ni] = busy_time
+
+            for o in ni.outputs:
+                count = HeatOverlay.signal_counts.get(o, 0)
+                signal_samples[o] = self.signal_samples.get(o) or deque(maxlen=buffer_size)
+                signal_samples[o].append(count - self.last_signal_counts.get(o, 0))
+                self.last_signal_counts[o] = count
+
+        # removed NIs and ports just drop out
+        self.busy_time_samples = busy_time_samples
+        self.signal_samples = signal_samples
+        self.samples_taken += 1
+        self.flow.viewport().update()
+
+    def draw(self, painter):
+        if self.samples_taken == 0:
+            return
+        window = min(self.samples_taken, HeatOverlay.sample_rate * HeatOverlay.window_seconds) / \
+            HeatOverlay.sample_rate
+
+        busy_times = {ni: sum(samples) for ni, samples in self.busy_time_samples.items()}
+        total_busy_time = sum(busy_times.values())
+
+        painter.setFont(QFont('Source Code Pro', 10, QFont.Bold))
+
+        # NIs
+        for ni, busy_time in busy_times.items():
+            if busy_time <= 0:
+                continue
+            share = busy_time / total_busy_time
+            rect = QRectF(ni.pos().x() - ni.width / 2, ni.pos().y() - ni.height / 2, ni.width, ni.height)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(255, 60, 0, 40 + int(160 * share)))
+            painter.drawRoundedRect(rect, 10, 10)
+            painter.setPen(QPen(QColor('#ffffff')))
+            painter.drawText(rect.adjusted(0, 0, 0, -4), Qt.AlignHCenter | Qt.AlignBottom,
+                             '%d%%  %.1f ms/s' % (share * 100, busy_time / window * 1000))
+
+        # connections
+        painter.setPen(QPen(QColor('#ffb030')))
+        for o, samples in self.signal_samples.items():
+            signals = sum(samples)
+            if signals == 0:
+                continue
+            ni = o.parent_node_instance
+            for cpi in o.connected_port_instances:
+                path = self.flow.connection_path(ni.pos() + o.gate.pos(),
+                                                 cpi.parent_node_instance.pos() + cpi.gate.pos())
+                painter.drawText(path.pointAtPercent(0.5), '%.1f/s' % (signals / window))
+
+
+def measure_update(run_update_event):
+    def measured(self, *args, **kwargs):
+        thread_info = HeatOverlay.thread_info
+        if not hasattr(thread_info, 'nested_times'):
+            thread_info.nested_times = []
+        nested_times = thread_info.nested_times
+        nested_times.append(0)
+        start = time.perf_counter()
+        try:
+            return run_update_event(self, *args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            own_time = duration - nested_times.pop()
+            if len(nested_times) > 0:
+                nested_times[-1] += duration
+            with HeatOverlay.lock:
+                HeatOverlay.busy_times[self] = HeatOverlay.busy_times.get(self, 0) + own_time
+    return measured
+
+
+def count_signals(method):
+    def counted(self, *args, **kwargs):
+        with HeatOverlay.lock:
+            HeatOverlay.signal_counts[self] = HeatOverlay.signal_counts.get(self, 0) + 1
+        return method(self, *args, **kwargs)
+    return counted
@@ -0,0 +1,73 @@
+import ast
+import copy
+
+from custom_src.Execution import ExecutionSettings
+
+
+class InputValue:
+    """The value model of a text input widget (see StdLineEdit_PortInstanceWidget and HeadlessPortInstanceWidget).
+    The widget's text gets parsed into a Python value once and the value is cached until the text changes - so a
+    node reading an unconnected input thousands of times per pulse (like in a For n Dim loop) doesn't parse it each
+    time. It also doesn't touch Qt, so reading it doesn't have to go through GUIThread.
+
+    Texts are parsed as Python literals (numbers, strings, lists, dicts, ...). Anything else is the text itself (like
+    a variable name), unless ExecutionSettings.eval_input_expressions is enabled, then it gets evaluated as Python
+    expression (like 2*3 or list(range(10))).
+
+    Only immutable values (numbers, strings, tuples of them, ...) get returned as they are. Nodes may change mutable
+    ones in place (like Arr Append), so every get_val() returns a new copy of those - the next read would see the
+    changed value otherwise."""
+
+    __slots__ = ('text', 'val', 'immutable', 'parsed_generation')
+
+    generation = 0  # incremented when the way of parsing changes, which invalidates all parsed values
+
+    def __init__(self, text=''):
+        self.text = text
+        self.val = None
+        self.immutable = True
+        self.parsed_generation = -1
+
+    def set_text(self, text):
+        if text != self.text:
+            self.text = text
+            self.parsed_generation = -1
+
+    def get_val(self):
+        if self.parsed_generation != InputValue.generation:
+            self.val = parse_value(self.text)
+            self.immutable = is_immutable(self.val)
+            self.parsed_generation = InputValue.generation
+        if self.immutable:
+            return self.val
+        try:
+            return copy.deepcopy(self.val)
+        except Exception:  # objects from evaluated expressions might not support that
+            return parse_value(self.text)
+
+    def parsing_changed():
+        InputValue.generation += 1
+
+
+def parse_value(text):
+    try:
+        return ast.literal_eval(text)
+    except Exception:
+        pass
+    if ExecutionSettings.eval_input_expressions:
+        try:
+            return eval(text, {})
+        except Exception:
+            pass
+    return text
+
+
+immutable_types = (type(None), bool, int, float, complex, str, bytes, range, type(Ellipsis))
+
+
+def is_immutable(val):
+    if type(val) in immutable_types:
+        return True
+    if type(val) in (tuple, frozenset):
+        return all(is_immutable(v) for v in val)
+    return False
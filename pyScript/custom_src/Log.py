@@ -1,6 +1,7 @@
 from PySide2.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QPlainTextEdit, QLabel, QLayout
 from PySide2.QtGui import QFont
 
+from custom_src.global_tools.GUIThread import GUIThread
 from custom_src.global_tools.strings import shorten
 
 
@@ -30,6 +31,10 @@ class Logger(QWidget):
 
 
     def log_message(self, sender, message: str, target=''):
+        if not GUIThread.is_current():
+            GUIThread.call(self.log_message, sender, message, target, wait=False)
+            return
+
         if target == 'global_tools':
             self.global_log.log(message)
         elif target == 'error':
@@ -40,6 +45,9 @@ class Logger(QWidget):
         #     self.custom_log_holders[sender].log(message)
 
     def new_log(self, new_sender, title):
+        if not GUIThread.is_current():
+            return GUIThread.call(self.new_log, new_sender, title)
+
         new_log = Log(new_sender, title)
         self.custom_log_holders[new_sender] = new_log
         self.layout().addWidget(new_log)
@@ -102,10 +110,10 @@ class Log(QWidget):
         s = ''
         for arg in args:
             s += ' '+str(arg)
-        self.log_view.appendPlainText('>  '+s)
+        GUIThread.call(self.log_view.appendPlainText, '>  '+s, wait=False)
 
     def clear(self):
-        self.log_view.clear()
+        GUIThread.call(self.log_view.clear, wait=False)
 
     def removing(self):  # old method, delete later
         self.disable()
@@ -1,21 +1,29 @@
 import os,  sys
 
-from PySide2.QtGui import QColor, QFontDatabase, QIcon, QKeySequence
-from PySide2.QtWidgets import QMainWindow, QFileDialog, QShortcut
+from PySide2.QtGui import QFontDatabase, QIcon, QKeySequence
+from PySide2.QtWidgets import QMainWindow, QFileDialog, QShortcut, QAction, QActionGroup
 
 # parent UI
 from ui.ui_main_window import Ui_MainWindow
 
-from custom_src.Node import Node, NodePort, SetVariable_Node, GetVariable_Node
+from custom_src.Node import SetVariable_Node, GetVariable_Node
+from custom_src.NodePackagesImporter import NodePackagesImporter
 from custom_src.Script import Script
 from custom_src.custom_list_widgets.ScriptsListWidget import ScriptsListWidget
 from custom_src.custom_nodes.GetVar_NodeInstance import GetVar_NodeInstance
 from custom_src.custom_nodes.SetVar_NodeInstance import SetVar_NodeInstance
 from custom_src.global_tools.Debugger import Debugger
 from custom_src.Designs import Design
+from custom_src.Execution import ExecutionSettings
+from custom_src.ExecutionTrace import ExecutionTrace
+from custom_src.FlowCompiler import CompileError
+from custom_src.HeatOverlay import HeatOverlay
+from custom_src.InputValue import InputValue
+from custom_src.ProjectFile import write_project_file, JSON_SUFFIX, BINARY_SUFFIX, JOURNAL_SUFFIX
+from custom_src.ProjectJournal import ProjectJournal
 
 
-class MainWindow(QMainWindow):
+class MainWindow(QMainWindow, NodePackagesImporter):
     """MainWindow still lacks cleanup and documentation, sorry."""
 
     def __init__(self, config):
@@ -31,6 +39,7 @@ class MainWindow(QMainWindow):
         self.setWindowIcon(QIcon('stuff/pics/program_icon.png'))
         self.load_stylesheet('dark')
         self.ui.scripts_tab_widget.removeTab(0)
+        self.ui.scripts_tab_widget.currentChanged.connect(self.on_current_script_changed)
         self.ui.actionImport_Nodes.triggered.connect(self.on_import_nodes_triggered)
         self.ui.actionSave_Project.triggered.connect(self.on_save_project_triggered)
         self.ui.actionDesignDark_Std.triggered.connect(self.on_dark_std_design_triggered)
@@ -39,6 +48,8 @@ class MainWindow(QMainWindow):
         self.ui.actionDisableDebugging.triggered.connect(self.on_disable_debugging_triggered)
         self.ui.actionSave_Pic_Viewport.triggered.connect(self.on_save_scene_pic_viewport_triggered)
         self.ui.actionSave_Pic_Whole_Scene_scaled.triggered.connect(self.on_save_scene_pic_whole_triggered)
+        self.setup_execution_menu()
+        self.setup_journal_mode_action()
 
         # Shortcuts
         save_shortcut = QShortcut(QKeySequence.Save, self)
@@ -57,6 +68,9 @@ class MainWindow(QMainWindow):
         # {node : {str: PortInstanceWidget-subclass}} (used in PortInstance)
         self.custom_node_input_widget_classes = {}
 
+        self.sub_flows = []  # SubFlowDefinitions of the project
+        self.headless_node_instance_classes = {}  # for the inner NIs of sub flows, see SubFlowPlan
+
         # clear temp folder
         for f in os.listdir('temp'):
             os.remove('temp/'+f)
@@ -68,6 +82,9 @@ class MainWindow(QMainWindow):
         self.ui.new_script_name_lineEdit.returnPressed.connect(self.create_new_script_le_return_pressed)
 
         self.design_style = 'dark std'
+        self.project_file_path = config.get('file path')  # where the project got opened from or saved to last
+        self.project_journal = None  # in journal mode, see ProjectJournal
+        self.project_journal_seq = 0  # the last journal record in the project file
 
 
         if config['config'] == 'create plain new project':
@@ -76,10 +93,134 @@ class MainWindow(QMainWindow):
             self.import_required_packages(config['required packages'])
             self.parse_project(config['content'])
 
+        if self.project_file_path is not None and os.path.exists(self.project_file_path+JOURNAL_SUFFIX):
+            # the project has been edited in journal mode, the journal got applied when it was read
+            self.ui.actionJournalMode.setChecked(True)
+
         self.resize(1500, 800)
 
 
 
+    def setup_execution_menu(self):
+        """The Execution menu isn't part of the ui file, so it gets created here."""
+        self.ui.menuExecution = self.ui.menuBar.addMenu('Execution')
+
+        self.ui.actionMemoizedPull = QAction('Memoized Pull Evaluation', self)
+        self.ui.actionMemoizedPull.setToolTip('Nodes generating data on request get computed at most once per '
+                                              'exec pulse.')
+        self.ui.actionMemoizedPull.setCheckable(True)
+        self.ui.actionMemoizedPull.setChecked(ExecutionSettings.memoized_pull)
+        self.ui.actionMemoizedPull.toggled.connect(self.on_memoized_pull_toggled)
+        self.ui.menuExecution.addAction(self.ui.actionMemoizedPull)
+
+        self.ui.actionGlitchFreePush = QAction('Glitch-Free Push Propagation', self)
+        self.ui.actionGlitchFreePush.setToolTip('Data changes update every connected node once, in topological '
+                                                'order, instead of depth first.')
+        self.ui.actionGlitchFreePush.setCheckable(True)
+        self.ui.actionGlitchFreePush.setChecked(ExecutionSettings.glitch_free_push)
+        self.ui.actionGlitchFreePush.toggled.connect(self.on_glitch_free_push_toggled)
+        self.ui.menuExecution.addAction(self.ui.actionGlitchFreePush)
+
+        self.ui.actionTrampolinedExec = QAction('Trampolined Exec Scheduling', self)
+        self.ui.actionTrampolinedExec.setToolTip('Exec signals get processed by a work stack loop instead of '
+                                                 'recursive calls, so long exec chains don\'t hit the recursion '
+                                                 'limit.')
+        self.ui.actionTrampolinedExec.setCheckable(True)
+        self.ui.actionTrampolinedExec.setChecked(ExecutionSettings.trampolined_exec)
+        self.ui.actionTrampolinedExec.toggled.connect(self.on_trampolined_exec_toggled)
+        self.ui.menuExecution.addAction(self.ui.actionTrampolinedExec)
+
+        self.ui.actionPureMemo = QAction('Pure Node Memoization', self)
+        self.ui.actionPureMemo.setToolTip('Nodes declared pure don\'t compute again (and don\'t push anything) if '
+                                          'their inputs didn\'t change.')
+        self.ui.actionPureMemo.setCheckable(True)
+        self.ui.actionPureMemo.setChecked(ExecutionSettings.pure_memo)
+        self.ui.actionPureMemo.toggled.connect(self.on_pure_memo_toggled)
+        self.ui.menuExecution.addAction(self.ui.actionPureMemo)
+
+        self.ui.actionEvalInputExpressions = QAction('Evaluate Input Expressions', self)
+        self.ui.actionEvalInputExpressions.setToolTip('Texts of input fields that aren\'t Python literals get '
+                                                      'evaluated as Python expressions (like 2*3).')
+        self.ui.actionEvalInputExpressions.setCheckable(True)
+        self.ui.actionEvalInputExpressions.setChecked(ExecutionSettings.eval_input_expressions)
+        self.ui.actionEvalInputExpressions.toggled.connect(self.on_eval_input_expressions_toggled)
+        self.ui.menuExecution.addAction(self.ui.actionEvalInputExpressions)
+
+        self.ui.actionCompiledExec = QAction('Compiled Exec Chains', self)
+        self.ui.actionCompiledExec.setToolTip('Exec chains get compiled into Python functions the first time they '
+                                              'run. Data outputs get set when the chain is done.')
+        self.ui.actionCompiledExec.setCheckable(True)
+        self.ui.actionCompiledExec.setChecked(ExecutionSettings.compiled_exec)
+        self.ui.actionCompiledExec.toggled.connect(self.on_compiled_exec_toggled)
+        self.ui.menuExecution.addAction(self.ui.actionCompiledExec)
+
+        self.ui.actionBackgroundExecution = QAction('Background Execution', self)
+        self.ui.actionBackgroundExecution.setToolTip('Exec pulses run in a worker thread per script, so the editor '
+                                                     'doesn\'t freeze while a flow is computing.')
+        self.ui.actionBackgroundExecution.setCheckable(True)
+        self.ui.actionBackgroundExecution.setChecked(ExecutionSettings.background_execution)
+        self.ui.actionBackgroundExecution.toggled.connect(self.on_background_execution_toggled)
+        self.ui.menuExecution.addAction(self.ui.actionBackgroundExecution)
+
+        self.ui.actionParallelFanOut = QAction('Parallel Fan-Out', self)
+        self.ui.actionParallelFanOut.setToolTip('Independent branches of an exec output connected to several exec '
+                                                'inputs run concurrently on a thread pool.')
+        self.ui.actionParallelFanOut.setCheckable(True)
+        self.ui.actionParallelFanOut.setChecked(ExecutionSettings.parallel_fan_out)
+        self.ui.actionParallelFanOut.toggled.connect(self.on_parallel_fan_out_toggled)
+        self.ui.menuExecution.addAction(self.ui.actionParallelFanOut)
+
+        self.ui.actionStreamingPipelines = QAction('Streaming Pipelines', self)
+        self.ui.actionStreamingPipelines.setToolTip('Values of stream sources (like video frames) get processed by a '
+                                                    'pipeline with one thread per node.')
+        self.ui.actionStreamingPipelines.setCheckable(True)
+        self.ui.actionStreamingPipelines.setChecked(ExecutionSettings.streaming_pipelines)
+        self.ui.actionStreamingPipelines.toggled.connect(self.on_streaming_pipelines_toggled)
+        self.ui.menuExecution.addAction(self.ui.actionStreamingPipelines)
+
+        self.ui.menuStreamBackpressure = self.ui.menuExecution.addMenu('Stream Backpressure')
+        backpressure_group = QActionGroup(self)
+        for policy in ['drop oldest', 'drop newest', 'block']:
+            action = QAction(policy.capitalize(), self)
+            action.setCheckable(True)
+            action.setChecked(ExecutionSettings.stream_backpressure == policy)
+            action.triggered.connect(lambda checked, p=policy: self.on_stream_backpressure_triggered(p))
+            backpressure_group.addAction(action)
+            self.ui.menuStreamBackpressure.addAction(action)
+
+        self.ui.menuExecution.addSeparator()
+        self.ui.actionExportCompiledScript = QAction('Export Compiled Script...', self)
+        self.ui.actionExportCompiledScript.setToolTip('Saves the exec chains of the current script\'s buttons as a '
+                                                      'Python module which runs without pyScript.')
+        self.ui.actionExportCompiledScript.triggered.connect(self.on_export_compiled_script_triggered)
+        self.ui.menuExecution.addAction(self.ui.actionExportCompiledScript)
+
+        self.ui.actionLogExecutionStats = QAction('Log Execution Stats', self)
+        self.ui.actionLogExecutionStats.triggered.connect(self.on_log_execution_stats_triggered)
+        self.ui.menuExecution.addAction(self.ui.actionLogExecutionStats)
+
+        self.ui.actionRecordExecutionTrace = QAction('Record Execution Trace', self)
+        self.ui.actionRecordExecutionTrace.setToolTip('Records updates, exec signals and value accesses. When '
+                                                      'stopped, the trace can be saved and opened in Perfetto.')
+        self.ui.actionRecordExecutionTrace.setCheckable(True)
+        self.ui.actionRecordExecutionTrace.toggled.connect(self.on_record_execution_trace_toggled)
+        self.ui.menuExecution.addAction(self.ui.actionRecordExecutionTrace)
+
+        self.ui.actionShowHeatOverlay = QAction('Show Heat Overlay', self)
+        self.ui.actionShowHeatOverlay.setToolTip('Tints nodes by their share of the execution time of the last '
+                                                 'seconds and labels connections with signals per second.')
+        self.ui.actionShowHeatOverlay.setCheckable(True)
+        self.ui.actionShowHeatOverlay.toggled.connect(self.on_show_heat_overlay_toggled)
+        self.ui.menuExecution.addAction(self.ui.actionShowHeatOverlay)
+
+    def setup_journal_mode_action(self):
+        self.ui.actionJournalMode = QAction('Journal Mode', self)
+        self.ui.actionJournalMode.setToolTip('Every change gets appended to a journal next to the project file right '
+                                             'away, the project file gets written in the background.')
+        self.ui.actionJournalMode.setCheckable(True)
+        self.ui.actionJournalMode.toggled.connect(self.on_journal_mode_toggled)
+        self.ui.menuFile.addAction(self.ui.actionJournalMode)
+
     def load_stylesheet(self, ss):
         ss_content = ''
         try:
@@ -98,8 +239,8 @@ class MainWindow(QMainWindow):
     def set_design(self, new_design):
         Design.flow_style = new_design
         self.design_style = new_design
-        for script in self.scripts:
-            script.flow.design_style_changed()
+        for flow in self.get_built_flows():
+            flow.design_style_changed()
 
     def on_enable_debugging_triggered(self):
         Debugger.enable()
@@ -107,6 +248,104 @@ class MainWindow(QMainWindow):
     def on_disable_debugging_triggered(self):
         Debugger.disable()
 
+    def on_journal_mode_toggled(self, checked):
+        if checked:
+            if self.project_file_path is not None:  # otherwise it starts when the project gets saved
+                self.start_project_journal(reset=False)
+        elif self.project_journal is not None:
+            self.project_journal.close()
+            self.project_journal_seq = self.project_journal.seq  # the seq of the project file now
+            self.project_journal = None
+
+    def start_project_journal(self, reset):
+        """reset: the project has just been written completely, an existing journal doesn't belong to it."""
+        if self.project_journal is not None:
+            self.project_journal.close()
+        self.project_journal = ProjectJournal(self, self.project_file_path, 0 if reset else self.project_journal_seq,
+                                              reset)
+
+    def on_memoized_pull_toggled(self, checked):
+        ExecutionSettings.memoized_pull = checked
+
+    def on_glitch_free_push_toggled(self, checked):
+        ExecutionSettings.glitch_free_push = checked
+
+    def on_trampolined_exec_toggled(self, checked):
+        ExecutionSettings.trampolined_exec = checked
+
+    def on_pure_memo_toggled(self, checked):
+        ExecutionSettings.pure_memo = checked
+        if not checked:
+            for flow in self.get_built_flows():
+                flow.pure_memo.clear()
+
+    def on_eval_input_expressions_toggled(self, checked):
+        ExecutionSettings.eval_input_expressions = checked
+        InputValue.parsing_changed()
+
+    def on_compiled_exec_toggled(self, checked):
+        ExecutionSettings.compiled_exec = checked
+
+    def on_background_execution_toggled(self, checked):
+        ExecutionSettings.background_execution = checked
+
+    def on_parallel_fan_out_toggled(self, checked):
+        ExecutionSettings.parallel_fan_out = checked
+
+    def on_streaming_pipelines_toggled(self, checked):
+        ExecutionSettings.streaming_pipelines = checked
+        if not checked:
+            for flow in self.get_built_flows():
+                flow.streaming_pipeline.stop()
+
+    def on_stream_backpressure_triggered(self, policy):
+        ExecutionSettings.stream_backpressure = policy
+
+    def on_record_execution_trace_toggled(self, checked):
+        if checked:
+            ExecutionTrace.start()
+            return
+
+        ExecutionTrace.stop()
+        file_path = QFileDialog.getSaveFileName(self, 'save execution trace', '', 'Chrome Trace(*.json)')[0]
+        if file_path != '':
+            ExecutionTrace.save(file_path)
+
+    def on_show_heat_overlay_toggled(self, checked):
+        if checked:
+            HeatOverlay.enable()
+        else:
+            HeatOverlay.disable()
+        for flow in self.get_built_flows():
+            if checked:
+                flow.heat_overlay.start()
+            else:
+                flow.heat_overlay.stop()
+
+    def on_log_execution_stats_triggered(self):
+        for script in self.scripts:
+            if script.flow is None:
+                continue
+            script.logger.log_message(self, script.flow.propagation_engine.get_stats_str(), 'global_tools')
+            script.logger.log_message(self, script.flow.exec_scheduler.get_stats_str(), 'global_tools')
+            script.logger.log_message(self, script.flow.branch_fan_out.get_stats_str(), 'global_tools')
+            script.logger.log_message(self, script.flow.streaming_pipeline.get_stats_str(), 'global_tools')
+            script.logger.log_message(self, script.flow.pure_memo.get_stats_str(), 'global_tools')
+            script.logger.log_message(self, script.flow.flow_compiler.get_stats_str(), 'global_tools')
+
+    def on_export_compiled_script_triggered(self):
+        if len(self.scripts) == 0:
+            return
+
+        script = self.scripts[self.ui.scripts_tab_widget.currentIndex()]
+        file_path = QFileDialog.getSaveFileName(self, 'export compiled script', '', 'Python(*.py)')[0]
+        if file_path == '':
+            return
+        try:
+            script.flow.flow_compiler.export(file_path)
+        except CompileError as e:
+            script.logger.log_message(self, 'couldn\'t export the script: '+str(e), 'error')
+
 
     def on_save_scene_pic_viewport_triggered(self):
         if len(self.scripts) == 0:
@@ -132,7 +371,7 @@ class MainWindow(QMainWindow):
         self.try_to_create_new_script(name=self.ui.new_script_name_lineEdit.text())
 
 
-    def try_to_create_new_script(self, name='fancy script', config=None):
+    def try_to_create_new_script(self, name='fancy script', config=None, update_list=True):
         if len(name) == 0:
             return
         for s in self.scripts:
@@ -140,20 +379,39 @@ class MainWindow(QMainWindow):
                 return
 
 
-        new_script = Script(self, name, config)
+        # scripts from a project get their flow built when their tab gets activated, see on_current_script_changed()
+        new_script = Script(self, name, config, build_flow=config is None)
         new_script.name_changed.connect(self.rename_script)
-        self.ui.scripts_tab_widget.addTab(new_script.widget, new_script.name)
         self.scripts.append(new_script)
-        self.scripts_list_widget.recreate_ui()
+        self.ui.scripts_tab_widget.addTab(new_script.widget, new_script.name)
+        if update_list:
+            self.scripts_list_widget.recreate_ui()
+            if self.project_journal is not None:  # the journal only records changes of flows
+                self.project_journal.compact()
+
+    def on_current_script_changed(self, index):
+        if 0 <= index < len(self.scripts):
+            self.scripts[index].build_flow()
+
+    def get_built_flows(self):
+        """The flows of all scripts which got built already, see Script."""
+        return [script.flow for script in self.scripts if script.flow is not None]
 
     def rename_script(self, script, new_name):
         self.ui.scripts_tab_widget.setTabText(self.scripts.index(script), new_name)
         script.name = new_name
+        if self.project_journal is not None:
+            self.project_journal.compact()
 
     def delete_script(self, script):
         index = self.scripts.index(script)
+        script.executor.stop()
+        if script.flow is not None:
+            script.flow.streaming_pipeline.stop()
         self.ui.scripts_tab_widget.removeTab(index)
         del self.scripts[index]
+        if self.project_journal is not None:
+            self.project_journal.compact()
 
 
     def on_import_nodes_triggered(self):
@@ -161,216 +419,75 @@ class MainWindow(QMainWindow):
         if file_path != '':
             self.import_nodes_package_from_file(file_path)
 
+    def add_sub_flow(self, definition):
+        NodePackagesImporter.add_sub_flow(self, definition)
+        for flow in self.get_built_flows():
+            flow.node_choice_widget.update_all_nodes(self.all_nodes)
+        if self.project_journal is not None:  # the NIs of the sub flow need its definition in the project file
+            self.project_journal.compact()
+
     def import_required_packages(self, packages_list):
         for p in packages_list:
             self.import_nodes_package_from_file(p)
 
-    def import_nodes_package_from_file(self, file_path):
-        j_str = ''
-        try:
-            f = open(file_path)
-            j_str = f.read()
-            f.close()
-        except FileExistsError or FileNotFoundError:
-            Debugger.debug('couldn\'t open file')
-            return
-
-
-        # Important: translate the package first (metacore files -> src code files)
-        PackageTranslator = self.get_class_from_file(file_path='../pyScript_PackageTranslator',
-                                                     file_name='pyScript_PackageTranslator',
-                                                     class_name='PackageTranslator')
-        package_translator = PackageTranslator(os.path.dirname(os.path.abspath(file_path)))
-
-
-        self.parse_nodes(j_str, os.path.dirname(file_path), os.path.splitext(os.path.basename(file_path))[0])
-
-
-    def parse_nodes(self, j_str, package_path, package_name):
-        import json
-
-        # strict=False is necessary to allow 'control characters' like '\n' for newline when loading the json
-        j_obj = json.loads(j_str, strict=False)
-
-        Debugger.debug(j_obj['type'])
-        if j_obj['type'] != 'vyScriptFP nodes package':
-            return
-
-        # package_title = j_obj['title']
-        # package_description = j_obj['description']
-        j_nodes_list = j_obj['nodes']
-
-        num_nodes = len(j_nodes_list)
-        for ni in range(num_nodes):  # new node
-            j_node = j_nodes_list[ni]
-
-            new_node = Node()
-
-
-            node_title = j_node['title']
-            node_class_name = j_node['class name']
-            node_description = j_node['description']
-            node_type = j_node['type']
-            node_has_main_widget = j_node['has main widget']
-            node_main_widget_pos = j_node['widget position'] if node_has_main_widget else None
-            node_design_style = j_node['design style']
-            node_color = j_node['color']
-
-            # every node has a custom module name which differs from it's name to prevent import issues when using
-            # multiple (different) Nodes with same titles
-            # FOR FURTHER EXPLANATION: see node manager
-            node_module_name = j_node['module name']
-            module_name_separator = '___'
-
-
-
-            #   CUSTOM CLASS IMPORTS ----------------------------------------------------------------------------
-            # creating all the necessary path variables here for all potentially imported classes
-
-
-            #       IMPORT NODE INSTANCE SUBCLASS
-            node_instance_class_file_path = package_path+'/nodes/'+node_module_name+'/'
-            node_instance_widgets_file_path = node_instance_class_file_path+'/widgets'
-            node_instance_filename = node_module_name  # the NI file's name is just the 'module name'
-            new_node_instance_class = self.get_class_from_file(file_path=node_instance_class_file_path,
-                                                               file_name=node_instance_filename,
-                                                               class_name=node_class_name+'_NodeInstance')
-            self.all_node_instance_classes[new_node] = new_node_instance_class
-
-            #       IMPORT MAIN WIDGET
-            if node_has_main_widget:
-                main_widget_filename = node_module_name+module_name_separator+'main_widget'
-                new_node.main_widget_class = self.get_class_from_file(file_path=node_instance_widgets_file_path,
-                                                                      file_name=main_widget_filename,
-                                                                      class_name=node_class_name+'_NodeInstance_MainWidget')
-
-            #       I need to create the dict for the node's potential custom input widgets already here
-            self.custom_node_input_widget_classes[new_node] = {}
-            for w_name in j_node['custom input widgets']:
-                input_widget_filename = node_module_name+module_name_separator+w_name
-                custom_widget_class = self.get_class_from_file(file_path=node_instance_widgets_file_path,
-                                                               file_name=input_widget_filename,
-                                                               class_name=w_name+'_PortInstanceWidget')
-                self.custom_node_input_widget_classes[new_node][w_name] = custom_widget_class
-
-
-            #   note: the input widget classes get imported below in the loop
-            # ---------------------------------------------------------------------------------------------------
-
-
-            j_n_inputs = j_node['inputs']
-            inputs = []
-            num_inputs = len(j_n_inputs)
-            for ii in range(num_inputs):
-                j_input = j_n_inputs[ii]
-                i_type = j_input['type']
-                i_label = j_input['label']
-                i_has_widget = None
-                i_widget_type = ''
-                i_widget_name = ''
-                i_widget_pos = None
-                if i_type == 'data':
-                    i_has_widget = j_input['has widget']
-                    if i_has_widget:
-                        i_widget_type = j_input['widget type']
-                        i_widget_pos = j_input['widget position']
-                        if i_widget_type == 'custom widget':
-                            i_widget_name = j_input['widget name']
-                new_input = NodePort()
-                new_input.type_ = i_type
-                new_input.label = i_label
-                if i_has_widget:
-                    new_input.widget_type = i_widget_type
-                    new_input.widget_name = i_widget_name
-                    if i_widget_pos:
-                        new_input.widget_pos = i_widget_pos
-                else:
-                    new_input.widget_type = 'None'
-                inputs.append(new_input)
-
-            j_n_outputs = j_node['outputs']
-            outputs = []
-            num_outputs = len(j_n_outputs)
-            for oi in range(num_outputs):
-                j_output = j_n_outputs[oi]
-                o_type = j_output['type']
-                o_label = j_output['label']
-                new_output = NodePort()
-                new_output.type_ = o_type
-                new_output.label = o_label
-                outputs.append(new_output)
-
-            new_node.title = node_title
-            new_node.description = node_description
-            new_node.type_ = node_type
-            new_node.package = package_name
-            new_node.has_main_widget = node_has_main_widget
-            if node_has_main_widget:
-                new_node.main_widget_pos = node_main_widget_pos
-            new_node.design_style = node_design_style
-            new_node.color = QColor(node_color)
-            new_node.inputs = inputs
-            new_node.outputs = outputs
-
-            
-            self.custom_nodes.append(new_node)
-            self.all_nodes.append(new_node)
-
-
-        Debugger.debug(len(self.custom_nodes), 'nodes imported')
-
-
-    def get_class_from_file(self, file_path, file_name, class_name):
-        Debugger.debug(file_path)
-        Debugger.debug(file_name)
-        Debugger.debug(class_name)
-        sys.path.append(file_path)
-        new_module = __import__(file_name, fromlist=[class_name])
-        new_class = getattr(new_module, class_name)
-        return new_class
-
-
-
     def parse_project(self, j_obj):
 
         if j_obj['general info']['type'] != 'pyScriptFP project file':
             return
 
+        self.project_journal_seq = j_obj['general info'].get('journal seq', 0)
+        self.import_sub_flows(j_obj.get('sub flows', []))
+
         for s in j_obj['scripts']:  # fill flows
-            self.try_to_create_new_script(config=s)
+            self.try_to_create_new_script(config=s, update_list=False)
+        self.scripts_list_widget.recreate_ui()
 
 
     def on_save_project_triggered(self):
-        file_name = ''
-        file_name = QFileDialog.getSaveFileName(self, 'select location and give file name',
-                                                '../saves', 'PyScript Project(*.pypro)')[0]
+        if self.project_journal is not None:  # every change is in the journal already
+            self.save_project(self.project_file_path)
+            return
+        binary_filter = 'PyScript Project(*'+BINARY_SUFFIX+')'
+        json_filter = 'PyScript Project as JSON(*'+JSON_SUFFIX+')'
+        file_name, selected_filter = QFileDialog.getSaveFileName(self, 'select location and give file name',
+                                                                 '../saves', binary_filter+';;'+json_filter)
         if file_name != '':
+            if not file_name.endswith((BINARY_SUFFIX, JSON_SUFFIX)):
+                file_name += JSON_SUFFIX if selected_filter == json_filter else BINARY_SUFFIX
             self.save_project(file_name)
 
 
-    def save_project(self, file_name):
-        import json
-
-        file = None
-        try:
-            file = open(file_name, 'w')
-        except FileNotFoundError:
-            Debugger.debug('couldn\'t open file')
-            return
-
-
+    def get_project_json_data(self):
         general_project_info_dict = {'type': 'pyScriptFP project file'}
 
         scripts_data = []
         for script in self.scripts:
             scripts_data.append(script.get_json_data())
 
-        whole_project_dict = {'general info': general_project_info_dict,
-                              'scripts': scripts_data}
+        return {'general info': general_project_info_dict,
+                'sub flows': [d.get_json_data() for d in self.sub_flows],
+                'scripts': scripts_data}
 
-        json_str = json.dumps(whole_project_dict)
-        Debugger.debug(json_str)
+    def save_project(self, file_name):
+        """Saves the project as JSON if file_name ends with .pypro, otherwise in the binary format, see ProjectFile.
+        In journal mode, saving to the project's file only compacts the journal (in the background)."""
 
+        if self.project_journal is not None and file_name == self.project_file_path:
+            self.project_journal.compact()
+            return
 
-        file.write(json_str)
-        file.close()
\ No newline at end of file
+        try:
+            write_project_file(file_name, self.get_project_json_data())
+        except OSError as e:
+            Debugger.debug('couldn\'t save project:', e)
+            return
+        Debugger.debug('saved project', file_name)
+
+        if self.project_journal is not None:  # it belongs to the previous file
+            self.project_journal.close()
+            self.project_journal = None
+        self.project_file_path = file_name
+        if self.ui.actionJournalMode.isChecked():
+            self.start_project_journal(reset=True)
+        elif os.path.exists(file_name+JOURNAL_SUFFIX):  # left over, it would get applied when the file gets read
+            os.remove(file_name+JOURNAL_SUFFIX)
\ No newline at end of file
@@ -14,6 +14,9 @@ class Node:
         self.main_widget_pos = ''
         self.design_style = 'extended'  # default value just for testing
         self.color = QColor(198, 154, 21)  # default value just for testing
+        self.run_in_process_pool = False  # see ProcessPool
+        self.pure = False  # outputs only depend on the inputs, see PureMemo
+        self.vectorizable = False  # also works element-wise on whole numpy arrays, see ForEach's map mode
 
         #   dynamic: (get copied and can be individually edited in NIs)
         self.inputs = []
@@ -75,6 +78,30 @@ class GetVariable_Node(Node):
         self.outputs.append(data_output_port)
 
 
+class SubFlow_Node(Node):
+    """The node of a sub flow, see SubFlowDefinition. Its ports are the ones of the definition."""
+
+    def __init__(self, definition):
+        super(SubFlow_Node, self).__init__()
+
+        self.title = definition.name
+        self.type_ = 'sub flow node'
+        self.package = 'sub flows'
+        self.description = definition.config.get('description', 'sub flow')
+        self.definition = definition
+
+        for input_config in definition.config['inputs']:
+            input_port = NodePort()
+            input_port.type_ = input_config['type']
+            input_port.label = input_config['label']
+            input_port.widget_pos = 'besides'
+            self.inputs.append(input_port)
+
+        for output_config in definition.config['outputs']:
+            output_port = NodePort()
+            output_port.type_ = output_config['type']
+            output_port.label = output_config['label']
+            self.outputs.append(output_port)
 
 
 class NodePort:
@@ -1,20 +1,30 @@
+import inspect
+import itertools
+
 from PySide2.QtWidgets import QGraphicsItem, QMenu, QAction, QStyle
 from PySide2.QtCore import Qt, QRectF, QPointF, Signal
 from PySide2.QtGui import QColor, QBrush, QPen, QPainterPath, QFont, QFontMetricsF, QLinearGradient, QRadialGradient, \
     QPainter
 
 from custom_src.global_tools.Debugger import Debugger
+from custom_src.global_tools.GUIThread import GUIThread, GUIThreadProxy
 from custom_src.global_tools.math import pythagoras
 from custom_src.global_tools.MovementEnum import MovementEnum
 from custom_src.global_tools.strings import get_longest_line
 from custom_src.Designs import Design
+from custom_src.Execution import ExecutionSettings
 
+from custom_src.AsyncLoop import AsyncLoop
 from custom_src.Node import Node
+from custom_src.ProcessPool import ProcessPool
 from custom_src.PortInstance import PortInstance
 from custom_src.FlowProxyWidget import FlowProxyWidget
 
 
 class NodeInstance(QGraphicsItem):
+
+    ids = itertools.count()  # NIs and their ports have ids, unique in the session, see ConnectionTable
+
     def __init__(self, parent_node: Node, flow, config=None):
         super(NodeInstance, self).__init__()
 
@@ -23,18 +33,23 @@ class NodeInstance(QGraphicsItem):
         self.setAcceptHoverEvents(True)
 
         # GENERAL ATTRIBUTES
+        self.id = next(NodeInstance.ids)
         self.parent_node = parent_node
         self.flow = flow
         self.movement_state = None
         self.movement_pos_from = None
         self.inputs = []
         self.outputs = []
-        self.main_widget = None
+        self.active = False  # has exec ports, see ports_changed()
+        self._main_widget = None
         self.main_widget_proxy: FlowProxyWidget = None
         self.default_actions = {'remove': {'method': self.action_remove,
                                            'data': 123},
                                 'compute shape': {'method': self.compute_content_positions}}  # for context menus
         self.gen_data_on_request = False
+        self.computed_in_pulse = -1  # id of the exec pulse this NI was last updated in, see ExecPulse
+        self.stream_stage = None  # the NI's Stage if it's part of a StreamingPipeline
+        self.stream_input_vals = None  # input values of the stream item the Stage is processing
         self.personal_logs = []
         self.special_actions = {}  # only gets written in custom NodeInstance-subclasses - dynamic
         self.width = -1
@@ -83,32 +98,72 @@ class NodeInstance(QGraphicsItem):
     #                         /____/
 
     def update(self, input_called=-1, output_called=-1):
-        Debugger.debug('update in', self.parent_node.title, 'on input', input_called)
+        if Debugger.enabled:
+            Debugger.debug('update in', self.parent_node.title, 'on input', input_called)
+        if self.dispatch_update(input_called):
+            return
+        if ExecutionSettings.trampolined_exec:
+            self.flow.exec_scheduler.execute(self, input_called)
+        else:
+            self.run_update_event(input_called)
+
+    def dispatch_update(self, input_called):
+        """Hands the update over to the NI's stream stage, the ScriptExecutor or the ProcessPool if it has to run
+        there and returns True then. Also used by the ExecScheduler for the NIs it reaches."""
+        if self.stream_stage is not None:
+            self.stream_stage.submit_update(input_called)
+        elif ExecutionSettings.background_execution and GUIThread.is_current():
+            self.flow.parent_script.executor.submit(self, input_called)
+        elif self.parent_node.run_in_process_pool:
+            ProcessPool.submit(self, input_called)
+        else:
+            return False
+        return True
+
+    def run_update_event(self, input_called=-1):
+        exec_pulse = self.flow.exec_pulse
+        exec_pulse.begin()
+        self.computed_in_pulse = exec_pulse.id
         try:
-            self.update_event(input_called)
+            if self.parent_node.pure and ExecutionSettings.pure_memo and self.flow.pure_memo is not None:
+                result = self.flow.pure_memo.run(self, input_called)
+            else:
+                result = self.update_event(input_called)
+            if inspect.iscoroutine(result):  # async def update_event()
+                AsyncLoop.run(result, self)
         except Exception as e:
             Debugger.debug('EXCEPTION IN', self.parent_node.title, 'NI:', e)
+        finally:
+            exec_pulse.end()
 
     def update_event(self, input_called=-1):     # API  (gets overwritten)
-        """Gets called when an input received a signal. This is where the magic begins in subclasses."""
+        """Gets called when an input received a signal. This is where the magic begins in subclasses.
+        It can also be defined as 'async def', see AsyncLoop."""
 
         pass
 
     def data_outputs_updated(self):
         """Sends update signals to all data outputs causing connected NIs to update."""
 
-        Debugger.debug('updating data outputs in', self.parent_node.title)
+        if Debugger.enabled:
+            Debugger.debug('updating data outputs in', self.parent_node.title)
+        if ExecutionSettings.trampolined_exec:
+            self.flow.exec_scheduler.flush(self)
         for o in self.outputs:
             if o.type_ == 'data':
                 o.updated_val()
-        Debugger.debug('data outputs in', self.parent_node.title, 'updated')
 
     def input(self, index):     # API
         """Returns the value of a data input.
         If the input is connected, the value of the connected output is used:
         If not, the value of the widget is used."""
 
-        Debugger.debug('input called in', self.parent_node.title, 'NI:', index)
+        if Debugger.enabled:
+            Debugger.debug('input called in', self.parent_node.title, 'NI:', index)
+        if self.stream_input_vals is not None and index in self.stream_input_vals:
+            return self.stream_input_vals[index]
+        if ExecutionSettings.trampolined_exec:
+            self.flow.exec_scheduler.flush(self)
         return self.inputs[index].get_val()
 
     def set_output_val(self, index, val):       # API
@@ -117,6 +172,16 @@ class NodeInstance(QGraphicsItem):
 
         self.outputs[index].set_val(val)
 
+    def stream_output_val(self, index, val):       # API
+        """For sources producing a stream of values (like the frames of a video feed). In streaming pipeline mode
+        (see StreamingPipeline), the value gets passed on to the connected NIs' stages which process it in their own
+        threads, otherwise it's the same as set_output_val()."""
+
+        if ExecutionSettings.streaming_pipelines:
+            self.flow.streaming_pipeline.stream(self.outputs[index], val)
+        else:
+            self.set_output_val(index, val)
+
     def exec_output(self, index):       # API
         """Executes an execution output, sending a signal to all connected execution inputs causing the connected
         NIs to update."""
@@ -185,6 +250,7 @@ class NodeInstance(QGraphicsItem):
                 self.inputs.insert(0, pi)
             else:
                 self.inputs.insert(pos, pi)
+        self.ports_changed()
         if self.scene():
             self.add_input_to_scene(pi)
 
@@ -192,7 +258,7 @@ class NodeInstance(QGraphicsItem):
             self.update_shape()
 
     def create_new_input_from_config(self, input_config):
-        """Called only at NI creation."""
+        """Called only at NI creation, setup_ports() calls ports_changed() afterwards."""
         pi = PortInstance(self, 'input', configuration=input_config)
         self.inputs.append(pi)
 
@@ -201,7 +267,7 @@ class NodeInstance(QGraphicsItem):
         if type(i) == int:
             self.del_and_remove_input_from_scene(i)
         elif type(i) == PortInstance:
-            self.del_and_remove_input_from_scene(self.inputs.index(i))
+            self.del_and_remove_input_from_scene(i.index)
 
         if not self.initializing:
             self.update_shape()
@@ -217,6 +283,7 @@ class NodeInstance(QGraphicsItem):
                 self.outputs.insert(0, pi)
             else:
                 self.outputs.insert(pos, pi)
+        self.ports_changed()
         if self.scene():
             self.add_output_to_scene(pi)
 
@@ -224,7 +291,7 @@ class NodeInstance(QGraphicsItem):
             self.update_shape()
 
     def create_new_output_from_config(self, output_config=None):
-        """Called only at NI creation."""
+        """Called only at NI creation, setup_ports() calls ports_changed() afterwards."""
         pi = PortInstance(self, 'output', configuration=output_config)
         self.outputs.append(pi)
 
@@ -233,7 +300,7 @@ class NodeInstance(QGraphicsItem):
         if type(o) == int:
             self.del_and_remove_output_from_scene(o)
         else:
-            self.del_and_remove_output_from_scene(self.outputs.index(o))
+            self.del_and_remove_output_from_scene(o.index)
 
         if not self.initializing:
             self.update_shape()
@@ -588,6 +655,7 @@ class NodeInstance(QGraphicsItem):
 
             for o in range(len(outputs_config)):
                 self.create_new_output_from_config(output_config=outputs_config[o])
+            self.ports_changed()
 
     def get_input_widget_class(self, widget_name):
         """Returns a reference to the widget class of a given name for instantiation."""
@@ -603,7 +671,7 @@ class NodeInstance(QGraphicsItem):
 
     def del_and_remove_input_from_scene(self, i_index):
         i = self.inputs[i_index]
-        for p in self.inputs[i_index].connected_port_instances:
+        for p in i.connected_port_instances.copy():
             self.flow.connect_gates(i.gate, p.gate)
 
         self.flow.scene().removeItem(i.gate)
@@ -612,6 +680,7 @@ class NodeInstance(QGraphicsItem):
             self.flow.scene().removeItem(i.proxy)
             i.widget.removing()
         self.inputs.remove(i)
+        self.ports_changed()
 
 
     def add_output_to_scene(self, o):
@@ -620,12 +689,13 @@ class NodeInstance(QGraphicsItem):
 
     def del_and_remove_output_from_scene(self, o_index):
         o = self.outputs[o_index]
-        for p in self.outputs[o_index].connected_port_instances:
+        for p in o.connected_port_instances.copy():
             self.flow.connect_gates(o.gate, p.gate)
 
         self.flow.scene().removeItem(o.gate)
         self.flow.scene().removeItem(o.label)
         self.outputs.remove(o)
+        self.ports_changed()
 
     # # SHAPE
     def del_and_remove_content_from_scene(self):  # everything get's reset here
@@ -788,6 +858,18 @@ class NodeInstance(QGraphicsItem):
                 self.main_widget_proxy.setPos(body_left + left_largest_width + space_between_io/2, body_top+body_incl_widget_height/2 -self.main_widget.height()/2)
 
     # GENERAL
+    @property
+    def main_widget(self):
+        """Outside the GUI thread (see ScriptExecutor), the main widget is accessed through a proxy running all
+        method calls in the GUI thread."""
+        if self._main_widget is not None and not GUIThread.is_current():
+            return GUIThreadProxy(self._main_widget)
+        return self._main_widget
+
+    @main_widget.setter
+    def main_widget(self, main_widget):
+        self._main_widget = main_widget
+
     def initialized(self):
         """Gets called at the very end of all initialization processes/at the very end of the constructor."""
         if self.temp_state_data is not None:
@@ -795,13 +877,21 @@ class NodeInstance(QGraphicsItem):
         self.update()
 
     def is_active(self):
-        for i in self.inputs:
-            if i.type_ == 'exec':
-                return True
-        for o in self.outputs:
-            if o.type_ == 'exec':
-                return True
-        return False
+        return self.active
+
+    def ports_changed(self):
+        """Updates the ports' cached indices and the active flag. Called whenever inputs or outputs got added or
+        removed."""
+        self.active = False
+        for index in range(len(self.inputs)):
+            self.inputs[index].index = index
+            if self.inputs[index].type_ == 'exec':
+                self.active = True
+        for index in range(len(self.outputs)):
+            self.outputs[index].index = index
+            if self.outputs[index].type_ == 'exec':
+                self.active = True
+        self.flow.flow_compiler.flow_changed()
 
     def has_main_widget(self):
         """Might be used later in CodePreview_Widget to enable not only showing the NI's class but also it's
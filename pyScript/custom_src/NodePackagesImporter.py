@@ -0,0 +1,203 @@
+import os, sys
+
+from PySide2.QtGui import QColor
+
+from custom_src.Node import Node, NodePort
+from custom_src.SubFlows import SubFlowDefinition
+from custom_src.custom_nodes.SubFlow_NodeInstance import SubFlow_NodeInstance
+from custom_src.global_tools.Debugger import Debugger
+
+
+class NodePackagesImporter:
+    """Imports nodes packages (*.pypac). Used by the MainWindow as well as by the headless runner, so it must not
+    depend on any GUI. Subclasses need to provide the attributes custom_nodes, all_nodes, all_node_instance_classes
+    and custom_node_input_widget_classes, and for sub flows (which are nodes defined in the project, see
+    SubFlowDefinition) sub_flows and headless_node_instance_classes."""
+
+    def import_nodes_package_from_file(self, file_path):
+        j_str = ''
+        try:
+            f = open(file_path)
+            j_str = f.read()
+            f.close()
+        except FileExistsError or FileNotFoundError:
+            Debugger.debug('couldn\'t open file')
+            return
+
+
+        # Important: translate the package first (metacore files -> src code files)
+        PackageTranslator = self.get_class_from_file(file_path='../pyScript_PackageTranslator',
+                                                     file_name='pyScript_PackageTranslator',
+                                                     class_name='PackageTranslator')
+        package_translator = PackageTranslator(os.path.dirname(os.path.abspath(file_path)))
+
+
+        self.parse_nodes(j_str, os.path.dirname(file_path), os.path.splitext(os.path.basename(file_path))[0])
+
+
+    def parse_nodes(self, j_str, package_path, package_name):
+        import json
+
+        # strict=False is necessary to allow 'control characters' like '\n' for newline when loading the json
+        j_obj = json.loads(j_str, strict=False)
+
+        Debugger.debug(j_obj['type'])
+        if j_obj['type'] != 'vyScriptFP nodes package':
+            return
+
+        # package_title = j_obj['title']
+        # package_description = j_obj['description']
+        j_nodes_list = j_obj['nodes']
+
+        num_nodes = len(j_nodes_list)
+        for ni in range(num_nodes):  # new node
+            j_node = j_nodes_list[ni]
+
+            new_node = Node()
+
+
+            node_title = j_node['title']
+            node_class_name = j_node['class name']
+            node_description = j_node['description']
+            node_type = j_node['type']
+            node_has_main_widget = j_node['has main widget']
+            node_main_widget_pos = j_node['widget position'] if node_has_main_widget else None
+            node_design_style = j_node['design style']
+            node_color = j_node['color']
+            node_run_in_process_pool = j_node.get('process pool', False)  # optional
+            node_pure = j_node.get('pure', False)  # optional
+            node_vectorizable = j_node.get('vectorizable', False)  # optional
+
+            # every node has a custom module name which differs from it's name to prevent import issues when using
+            # multiple (different) Nodes with same titles
+            # FOR FURTHER EXPLANATION: see node manager
+            node_module_name = j_node['module name']
+            module_name_separator = '___'
+
+
+
+            #   CUSTOM CLASS IMPORTS ----------------------------------------------------------------------------
+            # creating all the necessary path variables here for all potentially imported classes
+
+
+            #       IMPORT NODE INSTANCE SUBCLASS
+            node_instance_class_file_path = package_path+'/nodes/'+node_module_name+'/'
+            node_instance_widgets_file_path = node_instance_class_file_path+'/widgets'
+            node_instance_filename = node_module_name  # the NI file's name is just the 'module name'
+            new_node_instance_class = self.get_class_from_file(file_path=node_instance_class_file_path,
+                                                               file_name=node_instance_filename,
+                                                               class_name=node_class_name+'_NodeInstance')
+            self.all_node_instance_classes[new_node] = new_node_instance_class
+
+            #       IMPORT MAIN WIDGET
+            if node_has_main_widget:
+                main_widget_filename = node_module_name+module_name_separator+'main_widget'
+                new_node.main_widget_class = self.get_class_from_file(file_path=node_instance_widgets_file_path,
+                                                                      file_name=main_widget_filename,
+                                                                      class_name=node_class_name+'_NodeInstance_MainWidget')
+
+            #       I need to create the dict for the node's potential custom input widgets already here
+            self.custom_node_input_widget_classes[new_node] = {}
+            for w_name in j_node['custom input widgets']:
+                input_widget_filename = node_module_name+module_name_separator+w_name
+                custom_widget_class = self.get_class_from_file(file_path=node_instance_widgets_file_path,
+                                                               file_name=input_widget_filename,
+                                                               class_name=w_name+'_PortInstanceWidget')
+                self.custom_node_input_widget_classes[new_node][w_name] = custom_widget_class
+
+
+            #   note: the input widget classes get imported below in the loop
+            # ---------------------------------------------------------------------------------------------------
+
+
+            j_n_inputs = j_node['inputs']
+            inputs = []
+            num_inputs = len(j_n_inputs)
+            for ii in range(num_inputs):
+                j_input = j_n_inputs[ii]
+                i_type = j_input['type']
+                i_label = j_input['label']
+                i_has_widget = None
+                i_widget_type = ''
+                i_widget_name = ''
+                i_widget_pos = None
+                if i_type == 'data':
+                    i_has_widget = j_input['has widget']
+                    if i_has_widget:
+                        i_widget_type = j_input['widget type']
+                        i_widget_pos = j_input['widget position']
+                        if i_widget_type == 'custom widget':
+                            i_widget_name = j_input['widget name']
+                new_input = NodePort()
+                new_input.type_ = i_type
+                new_input.label = i_label
+                if i_has_widget:
+                    new_input.widget_type = i_widget_type
+                    new_input.widget_name = i_widget_name
+                    if i_widget_pos:
+                        new_input.widget_pos = i_widget_pos
+                else:
+                    new_input.widget_type = 'None'
+                inputs.append(new_input)
+
+            j_n_outputs = j_node['outputs']
+            outputs = []
+            num_outputs = len(j_n_outputs)
+            for oi in range(num_outputs):
+                j_output = j_n_outputs[oi]
+                o_type = j_output['type']
+                o_label = j_output['label']
+                new_output = NodePort()
+                new_output.type_ = o_type
+                new_output.label = o_label
+                outputs.append(new_output)
+
+            new_node.title = node_title
+            new_node.description = node_description
+            new_node.type_ = node_type
+            new_node.package = package_name
+            new_node.has_main_widget = node_has_main_widget
+            if node_has_main_widget:
+                new_node.main_widget_pos = node_main_widget_pos
+            new_node.design_style = node_design_style
+            new_node.color = QColor(node_color)
+            new_node.run_in_process_pool = node_run_in_process_pool
+            new_node.pure = node_pure
+            new_node.vectorizable = node_vectorizable
+            new_node.inputs = inputs
+            new_node.outputs = outputs
+
+            
+            self.custom_nodes.append(new_node)
+            self.all_nodes.append(new_node)
+
+
+        Debugger.debug(len(self.custom_nodes), 'nodes imported')
+
+
+    def import_sub_flows(self, sub_flows_config):
+        for config in sub_flows_config:
+            if self.get_sub_flow(config['name']) is None:
+                self.add_sub_flow(SubFlowDefinition(self, config))
+
+    def add_sub_flow(self, definition):
+        self.sub_flows.append(definition)
+        self.all_nodes.append(definition.node)
+        self.all_node_instance_classes[definition.node] = SubFlow_NodeInstance
+        self.custom_node_input_widget_classes[definition.node] = {}
+
+    def get_sub_flow(self, name):
+        for definition in self.sub_flows:
+            if definition.name == name:
+                return definition
+        return None
+
+
+    def get_class_from_file(self, file_path, file_name, class_name):
+        Debugger.debug(file_path)
+        Debugger.debug(file_name)
+        Debugger.debug(class_name)
+        sys.path.append(file_path)
+        new_module = __import__(file_name, fromlist=[class_name])
+        new_class = getattr(new_module, class_name)
+        return new_class
@@ -1,28 +1,43 @@
+import itertools
+
 from PySide2.QtWidgets import QGraphicsItem, QLineEdit, QSpinBox, QStyle
 from PySide2.QtCore import Qt, QRectF, QPointF
 from PySide2.QtGui import QColor, QBrush, QPen, QFontMetricsF, QFont
 
 from custom_src.global_tools.Debugger import Debugger
+from custom_src.global_tools.GUIThread import GUIThread
 from custom_src.Designs import Design
+from custom_src.Execution import ExecutionSettings
 from custom_src.global_tools.strings import get_longest_line
 
 from custom_src.FlowProxyWidget import FlowProxyWidget
+from custom_src.InputValue import InputValue
 
 
 class PortInstance:
     """The PortInstance class represents input-as well as output-instances of a NI. It wasn't really necessary yet, but
     I will probably subclass it later into InputPortInstance and OutputPortInstance - so far both are just
-    PortInstances."""
+    PortInstances.
+    There can be a lot of them, so they have __slots__ and cache their index in the NI's inputs/outputs (see
+    NodeInstance.ports_changed())."""
+
+    __slots__ = ('id', 'index', 'val', 'parent_node_instance', 'direction', 'type_', 'label_str',
+                 'connected_port_instances', 'width', 'height', 'widget', 'proxy', 'widget_type', 'widget_name',
+                 'widget_pos', 'gate', 'label')
+
+    ids = itertools.count()
 
     def __init__(self, parent_node_instance, direction, type_='', label_str='',
                  configuration=None, widget_type='', widget_name=None, widget_pos=''):
         # GENERAL ATTRIBUTES
+        self.id = next(PortInstance.ids)
+        self.index = -1  # set by the NI
         self.val = None
         self.parent_node_instance = parent_node_instance
         self.direction = direction
         self.type_ = type_
         self.label_str = label_str
-        self.connected_port_instances = []  # connections stored here
+        self.connected_port_instances = PortConnections()  # connections stored here
 
         # geometry
         self.width = -1
@@ -60,57 +75,102 @@ class PortInstance:
 
     def exec(self):
         """applies on OUTPUT; called NI internally (from parentNI)"""
+        if ExecutionSettings.glitch_free_push:
+            self.parent_node_instance.flow.propagation_engine.exec_signal()
+        if ExecutionSettings.compiled_exec and self.parent_node_instance.flow.flow_compiler.exec(self):
+            return
+        if ExecutionSettings.trampolined_exec:
+            self.parent_node_instance.flow.exec_scheduler.exec_output(self)
+            return
+        if ExecutionSettings.parallel_fan_out and len(self.connected_port_instances) > 1 and \
+                not ExecutionSettings.glitch_free_push and \
+                self.parent_node_instance.flow.branch_fan_out.exec(self):
+            return
+
         for cpi in self.connected_port_instances:
             cpi.update()
 
     def update(self):
         """applies on INPUT; called NI externally (from another NI)"""
-        if (self.parent_node_instance.is_active() and self.type_ == 'exec') or \
-           not self.parent_node_instance.is_active():
-            self.parent_node_instance.update(self.parent_node_instance.inputs.index(self))
+        if ExecutionSettings.parallel_fan_out:
+            branch_fan_out = self.parent_node_instance.flow.branch_fan_out
+            if branch_fan_out.join_node_instances and branch_fan_out.defer(self):
+                return
+        if self.type_ == 'exec' or not self.parent_node_instance.active:
+            self.parent_node_instance.update(self.index)
 
 
     def set_val(self, val):
         """applies on INPUT; called NI internally"""
-        Debugger.debug('setting value of', self.direction, 'port of', self.parent_node_instance.parent_node.title,
-                            'NodeInstance to', val)
+        if Debugger.enabled:
+            Debugger.debug('setting value of', self.direction, 'port of', self.parent_node_instance.parent_node.title,
+                           'NodeInstance to', val)
 
         if self.val is val:  # no update if value didn't change
             return
 
+        if ExecutionSettings.trampolined_exec:
+            self.parent_node_instance.flow.exec_scheduler.flush(self.parent_node_instance)
+
         self.val = val
-        self.gate.setToolTip(str(val))
-        self.gate.update()
+        if self.gate is not None:  # headless ports don't have a gate
+            GUIThread.call(self.gate.show_val, str(val), wait=False)
+        if ExecutionSettings.memoized_pull and self.direction == 'output':
+            self.invalidate_requested_data()
         self.updated_val()
 
     def get_val(self):
         """applies on DATA; called NI internally AND externally"""
-        Debugger.debug('get value in', self.direction, 'port instance',
-                       self.parent_node_instance.inputs.index(
-                                self) if self.direction == 'input' else self.parent_node_instance.outputs.index(self),
-                            'of', self.parent_node_instance.parent_node.title)
-        Debugger.debug('my value is', self.val)
+        if Debugger.enabled:
+            Debugger.debug('get value in', self.direction, 'port instance', self.index,
+                           'of', self.parent_node_instance.parent_node.title)
+            Debugger.debug('my value is', self.val)
 
         if self.direction == 'input':
             if len(self.connected_port_instances) == 0:
                 if self.widget:
-                    return self.widget.get_val()
+                    if self.widget_type == 'std line edit':
+                        return self.widget.value.get_val()  # doesn't need the GUI thread, see InputValue
+                    return GUIThread.call(self.widget.get_val)
                 else:
                     return None
             else:
-                Debugger.debug('calling connected port for val')
                 return self.connected_port_instances[0].get_val()
         elif self.direction == 'output':
-            Debugger.debug('returning val directly')
-            if self.parent_node_instance.gen_data_on_request:
-                self.parent_node_instance.update()
+            ni = self.parent_node_instance
+            if ni.gen_data_on_request:
+                if ExecutionSettings.memoized_pull and ni.flow.exec_pulse.running(ni.computed_in_pulse):
+                    if Debugger.enabled:
+                        Debugger.debug('already computed in this pulse')
+                else:
+                    ni.update()
             return self.val
 
     def updated_val(self):
         """applies on DATA OUTPUT; called NI internally"""
+        stream_stage = self.parent_node_instance.stream_stage
+        if stream_stage is not None:
+            stream_stage.output_updated(self)
+            return
+        if ExecutionSettings.glitch_free_push:
+            self.parent_node_instance.flow.propagation_engine.push(self)
+            return
+
         for cpi in self.connected_port_instances:
             cpi.update()
 
+    def invalidate_requested_data(self):
+        """applies on DATA OUTPUT; called NI internally
+        The value changed, so connected NIs that generate their data on request have to compute it again, even if
+        they already did in the current exec pulse (like inside a ForEach loop)."""
+        for cpi in self.connected_port_instances:
+            ni = cpi.parent_node_instance
+            if ni.gen_data_on_request and ni.computed_in_pulse != -1:
+                ni.computed_in_pulse = -1
+                for o in ni.outputs:
+                    if o.type_ == 'data':
+                        o.invalidate_requested_data()
+
     def create_widget(self, configuration=None):
         if self.direction == 'input' and (
                 self.type_ and self.type_ == 'data' or configuration and configuration['type'] == 'data'):
@@ -187,6 +247,11 @@ class PortInstance:
 
     def connected(self):
         """Disables the widget and causes update"""
+        if self.direction == 'input' and self.type_ == 'data':
+            self.parent_node_instance.flow.propagation_engine.input_connected(self)
+        self.parent_node_instance.flow.branch_fan_out.connections_changed()
+        self.parent_node_instance.flow.streaming_pipeline.connections_changed()
+        self.parent_node_instance.flow.flow_compiler.flow_changed()
         if self.widget:
             self.widget.setEnabled(False)
         if self.direction == 'input' and self.type_ == 'data':
@@ -194,6 +259,9 @@ class PortInstance:
 
     def disconnected(self):
         """Enables the widget again"""
+        self.parent_node_instance.flow.branch_fan_out.connections_changed()
+        self.parent_node_instance.flow.streaming_pipeline.connections_changed()
+        self.parent_node_instance.flow.flow_compiler.flow_changed()
         if self.widget:
             self.widget.setEnabled(True)
 
@@ -213,6 +281,48 @@ class PortInstance:
         return data_dict
 
 
+class PortConnections:
+    """The ports a PortInstance is connected to, in the order they were connected, stored by their ids - so
+    connecting, disconnecting and checking whether two ports are connected don't have to search a list. Supports the
+    list operations used on connected_port_instances (iterating, len(), indexing, append(), remove(), copy())."""
+
+    __slots__ = ('ports', 'ports_list')
+
+    def __init__(self):
+        self.ports = {}  # {port id: PortInstance}
+        self.ports_list = None  # the ports for indexing, created when needed
+
+    def __iter__(self):
+        return iter(self.ports.values())
+
+    def __len__(self):
+        return len(self.ports)
+
+    def __contains__(self, port):
+        return port.id in self.ports
+
+    def __getitem__(self, index):
+        if index == 0:
+            for p in self.ports.values():
+                return p
+        if self.ports_list is None:
+            self.ports_list = list(self.ports.values())
+        return self.ports_list[index]
+
+    def append(self, port):
+        self.ports[port.id] = port
+        self.ports_list = None
+
+    def remove(self, port):
+        if port.id not in self.ports:
+            raise ValueError('port is not connected')
+        del self.ports[port.id]
+        self.ports_list = None
+
+    def copy(self):
+        return list(self.ports.values())
+
+
 # CONTENTS -------------------------------------------------------------------------------------------------------------
 
 class PortInstanceGate(QGraphicsItem):
@@ -229,6 +339,10 @@ class PortInstanceGate(QGraphicsItem):
         self.height = 15
         self.port_local_pos = None
 
+    def show_val(self, val_str):
+        self.setToolTip(val_str)
+        self.update()
+
     def boundingRect(self):
         return QRectF(-self.width / 2, -self.height / 2, self.width, self.height)
 
@@ -327,22 +441,22 @@ class StdLineEdit_PortInstanceWidget(QLineEdit):
         f = self.font()
         f.setPointSize(10)
         self.setFont(f)
+        self.value = InputValue()
+        self.textChanged.connect(self.text_changed)
         self.editingFinished.connect(self.editing_finished)
 
+    def text_changed(self, text):
+        self.value.set_text(text)
+
     def editing_finished(self):
-        self.parent_node_instance.update(self.parent_node_instance.inputs.index(self.parent_port_instance))
+        self.value.get_val()  # parsing now, not when the NI reads it
+        self.parent_node_instance.update(self.parent_port_instance.index)
 
     def removing(self):
         pass
 
     def get_val(self):
-        val = None
-        try:
-            val = eval(self.text())
-        except Exception as e:
-            # type(eval(json.dumps(self.text()))) could be 'dict' <- need that for typing in dicts later if I want to
-            val = self.text()
-        return val
+        return self.value.get_val()
 
     def get_data(self):
         return self.text()
@@ -374,7 +488,7 @@ class StdSpinBox_PortInstanceWidget(QSpinBox):
         self.editingFinished.connect(self.editing_finished)
 
     def editing_finished(self):
-        self.parent_node_instance.update(self.parent_node_instance.inputs.index(self.parent_port_instance))
+        self.parent_node_instance.update(self.parent_port_instance.index)
 
     def removing(self):
         pass
@@ -0,0 +1,367 @@
+import asyncio
+import inspect
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+try:
+    import numpy
+except ImportError:  # arrays just can't be shared then, everything gets pickled
+    numpy = None
+
+from custom_src.FlowCompiler import FlowCompiler
+from custom_src.global_tools.Debugger import Debugger
+from custom_src.global_tools.GUIThread import GUIThread
+from custom_src.headless.HeadlessPortInstance import HeadlessPortInstance
+
+
+class ProcessPool:
+    """Runs the update_event() of nodes flagged with "process pool": true in their package (see Node) in worker
+    processes, so CPU heavy nodes don't block each other under the GIL and several branches can use several cores.
+
+    The workers don't know anything about the flow. When such a NI gets updated, its current input values and its
+    state (get_data()) get sent to a worker which runs the node's code on a headless copy of the NI (see
+    headless_node_instance_class()). Everything the NI does there - setting output values, executing exec outputs,
+    calling methods of its main widget, logging - gets recorded and is replayed on the real NI when the result
+    arrives, asynchronously, in the GUI thread (or in ProcessPool.wait() when running headless).
+    NumPy arrays are transferred through shared memory instead of being pickled.
+
+    While a NI's job is running, further updates of that NI don't queue up; only the latest one gets run afterwards.
+    submit() gets called in the thread of the update (like the ScriptExecutor's), the results get applied in the GUI
+    thread, so running and waiting are only accessed holding the lock.
+    """
+
+    executor = None
+    max_workers = None  # default: number of CPUs
+    results = queue.Queue()
+    lock = threading.Lock()
+    running = {}  # {NI: (job, shared memory blocks of the inputs)}, None while the job gets created
+    waiting = {}  # {NI: input_called}, the latest update requested while a job of the NI was running
+    jobs_done = 0
+
+    def submit(node_instance, input_called):
+        """Called from NodeInstance.update()."""
+        with ProcessPool.lock:
+            if node_instance in ProcessPool.running:
+                ProcessPool.waiting[node_instance] = input_called
+                return
+            ProcessPool.running[node_instance] = None
+
+            if ProcessPool.executor is None:
+                ProcessPool.executor = ProcessPoolExecutor(max_workers=ProcessPool.max_workers,
+                                                           mp_context=multiprocessing.get_context('spawn'),
+                                                           initializer=init_worker,
+                                                           initargs=(os.path.abspath(os.getcwd()),))
+            executor = ProcessPool.executor
+
+        shms = []
+        try:
+            job = create_job(node_instance, input_called, shms)  # reads the inputs, so not holding the lock
+            with ProcessPool.lock:
+                ProcessPool.running[node_instance] = (job, shms)
+            future = executor.submit(run_job, job)
+        except BaseException:
+            release_shared_memory(shms)
+            with ProcessPool.lock:
+                del ProcessPool.running[node_instance]
+                ProcessPool.waiting.pop(node_instance, None)
+            raise
+        future.add_done_callback(lambda f, ni=node_instance: ProcessPool.job_finished(ni, f))
+
+    def job_finished(node_instance, future):
+        """Called in a thread of the executor."""
+        try:
+            result = future.result()
+        except Exception as e:  # the worker process died
+            result = {'events': [], 'error': str(e)}
+        ProcessPool.results.put((node_instance, result))
+        if GUIThread.invoker is not None:
+            GUIThread.call(ProcessPool.apply_results, wait=False)
+
+    def apply_results(block=False):
+        """Replays the results of all finished jobs on their NIs. Returns the number of applied results."""
+        applied = 0
+        while True:
+            try:
+                node_instance, result = ProcessPool.results.get(block=block and applied == 0)
+            except queue.Empty:
+                return applied
+
+            with ProcessPool.lock:
+                job, shms = ProcessPool.running.pop(node_instance)
+                ProcessPool.jobs_done += 1
+            release_shared_memory(shms)
+            applied += 1
+
+            apply_result(node_instance, result)
+
+            with ProcessPool.lock:
+                input_called = ProcessPool.waiting.pop(node_instance, None)
+            if input_called is not None:
+                ProcessPool.submit(node_instance, input_called)
+
+    def wait():
+        """Blocks until all jobs (including the ones following from their results) are done. Used by the headless
+        runner, which doesn't have an event loop doing this."""
+        while True:
+            with ProcessPool.lock:
+                if len(ProcessPool.running) == 0:
+                    return
+            ProcessPool.apply_results(block=True)
+
+    def shutdown():
+        if ProcessPool.executor is not None:
+            ProcessPool.executor.shutdown(wait=False)
+            ProcessPool.executor = None
+
+
+#   PARENT PROCESS
+
+def create_job(node_instance, input_called, shms):
+    ni_class = type(node_instance)
+    return {
+        'module path': os.path.dirname(os.path.abspath(sys.modules[ni_class.__module__].__file__)),
+        'module name': ni_class.__module__,
+        'class name': ni_class.__name__,
+        'title': node_instance.parent_node.title,
+        'has main widget': node_instance.parent_node.has_main_widget,
+        'inputs': [{'type': i.type_, 'label': i.label_str} for i in node_instance.inputs],
+        'outputs': [{'type': o.type_, 'label': o.label_str} for o in node_instance.outputs],
+        'input values': [pack(i.get_val(), shms) if i.type_ == 'data' else None for i in node_instance.inputs],
+        'state data': node_instance.get_data(),
+        'input called': input_called
+    }
+
+
+def apply_result(node_instance, result):
+    for event in result['events']:
+        kind = event[0]
+        if kind == 'set val':
+            node_instance.outputs[event[1]].set_val(unpack(event[2]))
+        elif kind == 'exec':
+            node_instance.exec_output(event[1])
+        elif kind == 'data outputs updated':
+            node_instance.data_outputs_updated()
+        elif kind == 'main widget':
+            args = [unpack(a) for a in event[2]]
+            if node_instance.main_widget:
+                getattr(node_instance.main_widget, event[1])(*args)
+        elif kind == 'log':
+            node_instance.log_message(event[1], event[2])
+
+    if result['error'] is not None:
+        Debugger.debug('EXCEPTION IN', node_instance.parent_node.title, 'NI (process pool):', result['error'])
+
+
+#   SHARED MEMORY
+
+def pack(val, shms):
+    """NumPy arrays get copied into a new shared memory block, everything else gets pickled as usual."""
+    if numpy is None or type(val) != numpy.ndarray or val.dtype == object or val.nbytes == 0:
+        return val
+    shm = shared_memory.SharedMemory(create=True, size=val.nbytes, **shared_memory_options)
+    numpy.ndarray(val.shape, dtype=val.dtype, buffer=shm.buf)[...] = val
+    shms.append(shm)
+    return SharedArray(shm.name, val.shape, val.dtype.str)
+
+
+def unpack(val):
+    """Copies a shared array out of its shared memory block and frees the block (which was created by the worker).
+    """
+    if type(val) != SharedArray:
+        return val
+    shm = shared_memory.SharedMemory(name=val.shm_name)
+    try:
+        return numpy.ndarray(val.shape, dtype=val.dtype, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def release_shared_memory(shms):
+    for shm in shms:
+        shm.close()
+        shm.unlink()
+    shms.clear()
+
+
+class SharedArray:
+    """What gets pickled instead of an array."""
+    def __init__(self, shm_name, shape, dtype):
+        self.shm_name = shm_name
+        self.shape = shape
+        self.dtype = dtype
+
+
+#   WORKER PROCESS
+
+worker_classes = {}  # {(module name, class name): worker NI class}
+
+# The parent process unlinks all shared memory blocks. The workers use its resource tracker, which keeps one entry per
+# block no matter how often it got registered, so a worker must never unregister one (that would drop the parent's
+# entry). Where Python allows it, the workers don't register the blocks they create or attach to in the first place.
+shared_memory_options = {}
+
+
+def init_worker(pyscript_dir):
+    if sys.version_info >= (3, 13):
+        shared_memory_options['track'] = False
+    os.chdir(pyscript_dir)
+    sys.path.insert(0, pyscript_dir)
+
+
+def get_worker_class(job):
+    key = (job['module name'], job['class name'])
+    if key not in worker_classes:
+        from custom_src.headless.HeadlessNodeInstance import headless_node_instance_class
+
+        sys.path.append(job['module path'])
+        module = __import__(job['module name'], fromlist=[job['class name']])
+        headless_class = headless_node_instance_class(getattr(module, job['class name']))
+        # the NI gets set up completely by the job, initialized() would already run update_event()
+        worker_classes[key] = type(job['class name'], (headless_class,), {'initialized': lambda self: None})
+    return worker_classes[key]
+
+
+def run_job(job):
+    from custom_src.Node import Node
+
+    events = []
+    shms = []
+    inputs_shms = []
+    error = None
+
+    try:
+        node = Node()
+        node.title = job['title']
+        node.package = ''
+        node.has_main_widget = job['has main widget']
+
+        flow = WorkerFlow(events, shms)
+        ni = get_worker_class(job)(node, flow, {
+            'inputs': [{'type': i['type'], 'label': i['label'], 'has widget': False} for i in job['inputs']],
+            'outputs': job['outputs'],
+            'special actions': {},
+            'state data': None
+        })
+        if job['has main widget']:
+            ni.main_widget = RecordingMainWidget(events, shms)
+        ni.set_data(job['state data'])
+
+        for i in range(len(ni.inputs)):
+            val = job['input values'][i]
+            if type(val) == SharedArray:
+                shm = shared_memory.SharedMemory(name=val.shm_name, **shared_memory_options)
+                inputs_shms.append(shm)
+                val = numpy.ndarray(val.shape, dtype=val.dtype, buffer=shm.buf)
+            ni.inputs[i].__class__ = WorkerInputPort
+            ni.inputs[i].val = val
+        for o in ni.outputs:
+            o.__class__ = WorkerOutputPort
+        ni.data_outputs_updated = lambda: events.append(('data outputs updated',))
+
+        result = ni.update_event(job['input called'])
+        if inspect.iscoroutine(result):
+            asyncio.run(result)
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        for shm in inputs_shms:
+            shm.close()
+        for shm in shms:  # the parent unlinks them after copying
+            shm.close()
+
+    return {'events': events, 'error': error}
+
+
+class WorkerFlow:
+    def __init__(self, events, shms):
+        self.events = events
+        self.shms = shms
+        self.parent_script = WorkerScript(events)
+        self.exec_pulse = None
+        self.propagation_engine = None
+        self.exec_scheduler = None
+        self.branch_fan_out = None
+        self.streaming_pipeline = None
+        self.pure_memo = None
+        self.flow_compiler = FlowCompiler(self)  # the worker's ports don't execute anything, see WorkerOutputPort
+
+    def connect_ports(self, parent_port_instance, child_port_instance):
+        pass
+
+
+class WorkerInputPort(HeadlessPortInstance):
+    """Returns the input value that was sent with the job."""
+
+    __slots__ = ()
+
+    def get_val(self):
+        return self.val
+
+
+class WorkerOutputPort(HeadlessPortInstance):
+    """Records everything the NI does with its outputs."""
+
+    __slots__ = ()
+
+    def set_val(self, val):
+        flow = self.parent_node_instance.flow
+        flow.events.append(('set val', self.index, pack(val, flow.shms)))
+
+    def exec(self):
+        self.parent_node_instance.flow.events.append(('exec', self.index))
+
+
+class WorkerScript:
+    def __init__(self, events):
+        self.name = 'process pool worker'
+        self.logger = WorkerLogger(events)
+
+
+class WorkerLogger:
+    def __init__(self, events):
+        self.events = events
+
+    def log_message(self, sender, message: str, target=''):
+        self.events.append(('log', message, target))
+
+    def new_log(self, new_sender, title):
+        return WorkerLog(self.events, title)
+
+
+class WorkerLog:
+    def __init__(self, events, title):
+        self.events = events
+        self.title = title
+
+    def log(self, *args):
+        s = ''
+        for arg in args:
+            s += ' '+str(arg)
+        self.events.append(('log', self.title+':'+s, 'global_tools'))
+
+    def clear(self):
+        pass
+
+    def disable(self):
+        pass
+
+    def enable(self):
+        pass
+
+
+class RecordingMainWidget:
+    """Records all method calls, which get replayed on the NI's real main widget in the parent process."""
+
+    def __init__(self, events, shms):
+        self.events = events
+        self.shms = shms
+
+    def __getattr__(self, name):
+        return lambda *args: self.events.append(('main widget', name, [pack(a, self.shms) for a in args]))
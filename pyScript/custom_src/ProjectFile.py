@@ -0,0 +1,634 @@
+"""Reading and writing project files. There are two formats:
+
+    *.pypro  JSON, the whole project dict (general info, sub flows, scripts) in one document
+    *.pypb   binary, the same dict split into chunks:
+
+        header      MAGIC, format version, offset and length of the table of contents
+        chunks      one per script and one for the sub flows
+        TOC         JSON: {'general info': {...}, 'sub flows': [offset, length],
+                           'scripts': [{'name': ..., 'chunk': [offset, length]}, ...]}
+
+    A chunk is a zlib compressed JSON document followed by binary data. Bulky values don't go into the JSON but into
+    the binary data, referenced by {PACKED_KEY: [...]} (see pack_value(), the JSON also lists where those are):
+        - the points of drawings, as float32 columns
+        - long lists of numbers and long lists of dicts with the same keys and numbers as values (like [{'x': 1,
+          'y': 2}, ...]) in variables and node states, as typed columns (int or double, lossless)
+    So a script can be read without parsing the others (see read_project_file()), and most of the numbers don't get
+    converted to and from text. All values get read back as the same Python values that JSON would give, so
+    everything else works on the project dict like before - except for the drawing points, which are float32 and come
+    back as columns (see pack_drawing()).
+
+The JSON format stays available as export, the format is chosen by the file's suffix (see write_project_file()).
+
+In journal mode (see ProjectJournal), the changes made since the project file got written are in a journal next to it
+(JOURNAL_SUFFIX), which gets applied when the project is read (see apply_journal()).
+
+In both formats, numpy arrays and large values of variables and node states are stored in a directory next to the
+project file (BLOBS_SUFFIX) and only referenced in the project, see BlobStore."""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+try:
+    import numpy
+except ImportError:  # there can't be numpy arrays to save then
+    numpy = None
+
+
+JSON_SUFFIX = '.pypro'
+BINARY_SUFFIX = '.pypb'
+JOURNAL_SUFFIX = '.journal'
+BLOBS_SUFFIX = '.blobs'
+
+MAGIC = b'pyScriptPB'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<10sHQQ')  # MAGIC, format version, TOC offset, TOC length
+CHUNK_HEADER = struct.Struct('<I')  # length of the compressed JSON
+
+PACKED_KEY = '<packed>'
+BLOB_KEY = '<blob>'
+ESCAPED_KEY = '<escaped>'  # wraps dicts of the project that would look like references, see escape_dict()
+MIN_PACKED_LENGTH = 64  # shorter lists stay in the JSON
+INT_TYPECODES = ('b', 'h', 'i', 'q')  # the smallest one the ints fit in gets used
+
+
+def read_project_file(file_path, script_names=None):
+    """Returns the project dict of a *.pypro or *.pypb file, including the changes in its journal. Of binary files,
+    only the scripts in script_names get read (all if it's None). Raises a ValueError if the file isn't a pyScript
+    project."""
+    project = read_project_snapshot(file_path, script_names)
+    apply_journal(project, file_path+JOURNAL_SUFFIX)
+    load_project_blobs(project, BlobStore(file_path+BLOBS_SUFFIX))
+    return project
+
+
+def read_project_snapshot(file_path, script_names):
+    f = open(file_path, 'rb')
+    try:
+        if f.read(len(MAGIC)) != MAGIC:
+            f.seek(0)
+            # strict=False has to be to allow 'control characters' like '\n' for newline when loading the json
+            project = json.loads(f.read().decode('utf-8'), strict=False)
+            if not isinstance(project, dict) or \
+                    project.get('general info', {}).get('type') != 'pyScriptFP project file':
+                raise ValueError(file_path+' is not a pyScript project file')
+            return project
+
+        f.seek(0)
+        magic, version, toc_offset, toc_length = HEADER.unpack(f.read(HEADER.size))
+        if version > FORMAT_VERSION:
+            raise ValueError(file_path+' was saved by a newer version of pyScript (format '+str(version)+')')
+        f.seek(toc_offset)
+        toc = json.loads(f.read(toc_length).decode('utf-8'))
+
+        scripts = []
+        for entry in toc['scripts']:
+            if script_names is None or entry['name'] in script_names:
+                scripts.append(read_chunk(f, entry['chunk']))
+        return {'general info': toc['general info'],
+                'sub flows': read_chunk(f, toc['sub flows']),
+                'scripts': scripts}
+    except (struct.error, zlib.error, UnicodeDecodeError, json.JSONDecodeError, KeyError) as e:
+        raise ValueError(file_path+' is not a valid pyScript project file ('+type(e).__name__+')')
+    finally:
+        f.close()
+
+
+def write_project_file(file_path, project):
+    """Saves the project dict as JSON if the file name ends with JSON_SUFFIX, otherwise in the binary format. The
+    file gets written next to the old one first and then replaces it, so a failed save doesn't destroy the old one.
+    Blobs no longer used by the project get removed, unless there's a journal whose records might still use them."""
+    blob_store = BlobStore(file_path+BLOBS_SUFFIX)
+    project = store_project_blobs(project, blob_store)
+
+    temp_file_path = file_path+'.saving'
+    f = open(temp_file_path, 'wb')
+    try:
+        if file_path.endswith(JSON_SUFFIX):
+            f.write(json.dumps(project).encode('utf-8'))
+        else:
+            write_binary_project(f, project)
+    except BaseException:
+        f.close()
+        os.remove(temp_file_path)
+        raise
+    f.close()
+    os.replace(temp_file_path, file_path)
+
+    if not os.path.exists(file_path+JOURNAL_SUFFIX):
+        blob_store.remove_unused()
+
+
+def write_binary_project(f, project):
+    f.write(bytes(HEADER.size))  # gets written when the TOC's position is known
+
+    scripts = []
+    for script_config in project['scripts']:
+        scripts.append({'name': script_config['name'],
+                        'chunk': write_chunk(f, *pack_script(script_config))})
+    toc = {'general info': project['general info'],
+           'sub flows': write_chunk(f, *pack_sub_flows(project.get('sub flows', []))),
+           'scripts': scripts}
+
+    toc_offset = f.tell()
+    toc_bytes = json.dumps(toc).encode('utf-8')
+    f.write(toc_bytes)
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, FORMAT_VERSION, toc_offset, len(toc_bytes)))
+
+
+def write_chunk(f, obj, packer):
+    """Writes the JSON object together with the packed values' paths and the binary blocks of the packer. Returns the
+    chunk's [offset, length]."""
+    offset = f.tell()
+    json_bytes = zlib.compress(json.dumps([obj, packer.packed_paths]).encode('utf-8'), 1)
+    f.write(CHUNK_HEADER.pack(len(json_bytes)))
+    f.write(json_bytes)
+    for block in packer.blocks:
+        f.write(block)
+    return [offset, f.tell()-offset]
+
+
+def read_chunk(f, chunk):
+    offset, length = chunk
+    f.seek(offset)
+    data = f.read(length)
+    json_length, = CHUNK_HEADER.unpack_from(data)
+    obj, packed_paths = json.loads(zlib.decompress(data[CHUNK_HEADER.size:CHUNK_HEADER.size+json_length])
+                                   .decode('utf-8'), strict=False)
+    data = memoryview(data)[CHUNK_HEADER.size+json_length:]
+
+    # only the values containing packed ones need to be looked at
+    for path in packed_paths:
+        container = obj
+        for key in path[:-1]:
+            container = container[key]
+        container[path[-1]] = unpack_value(container[path[-1]], data)
+    return obj
+
+
+#   PACKING
+
+class Packer:
+    """Collects the binary blocks of a chunk and the paths (in the chunk's JSON object) of the values containing
+    packed ones."""
+
+    def __init__(self):
+        self.blocks = []
+        self.length = 0
+        self.packed_paths = []
+
+    def pack(self, val, path):
+        """Returns the JSON object of the value, see pack_value(), or the value itself if nothing got packed."""
+        num_blocks = len(self.blocks)
+        obj = pack_value(val, self)
+        if len(self.blocks) == num_blocks:
+            return val
+        self.packed_paths.append(path)
+        return obj
+
+    def add_array(self, arr):
+        """Adds the array's data (little endian) and returns its reference: [typecode, offset, length]."""
+        if sys.byteorder == 'big':
+            arr = array(arr.typecode, arr)
+            arr.byteswap()
+        block = arr.tobytes()
+        ref = [arr.typecode, self.length, len(block)]
+        self.blocks.append(block)
+        self.length += len(block)
+        return ref
+
+
+def pack_script(script_config):
+    packer = Packer()
+    flow_config = script_config['flow']
+    flow = dict(flow_config)
+    flow['nodes'] = pack_node_instances(flow_config['nodes'], packer, ['flow', 'nodes'])
+    if 'drawings' in flow_config:
+        flow['drawings'] = [pack_drawing(flow_config['drawings'][i], packer, ['flow', 'drawings', i])
+                            for i in range(len(flow_config['drawings']))]
+    script = {'name': script_config['name'],
+              'variables': packer.pack(script_config['variables'], ['variables']),
+              'flow': flow}
+    return script, packer
+
+
+def pack_sub_flows(sub_flow_configs):
+    """The definitions of the sub flows (see SubFlowDefinition), their inner NIs are packed like a flow's."""
+    packer = Packer()
+    sub_flows = []
+    for i in range(len(sub_flow_configs)):
+        config = dict(sub_flow_configs[i])
+        config['nodes'] = pack_node_instances(config['nodes'], packer, [i, 'nodes'])
+        sub_flows.append(config)
+    return sub_flows, packer
+
+
+def pack_node_instances(node_configs, packer, path):
+    nodes = []
+    for i in range(len(node_configs)):
+        node = node_configs[i]
+        for key in ('main widget data', 'state data'):
+            if key in node:
+                obj = packer.pack(node[key], path+[i, key])
+                if obj is not node[key]:
+                    node = dict(node)
+                    node[key] = obj
+        nodes.append(node)
+    return nodes
+
+
+def pack_drawing(drawing_config, packer, path):
+    """The points of a drawing, [{'x': ..., 'y': ..., 'w': ...}, ...], get stored as float32 columns. They get read
+    back as 'packed points': {'x': [...], 'y': [...], 'w': [...]}, which DrawingObject takes as well, so no dict has
+    to be created per point."""
+    drawing = dict(drawing_config)
+    if 'points' in drawing_config:
+        points = drawing.pop('points')
+        columns = {key: [p[key] for p in points] for key in ('x', 'y', 'w')}
+    elif 'packed points' in drawing_config:  # from a binary file, not built yet
+        columns = drawing_config['packed points']
+    else:
+        return drawing
+    drawing['packed points'] = {PACKED_KEY: ['columns', [[key, packer.add_array(array('f', columns[key]))]
+                                                         for key in ('x', 'y', 'w')]]}
+    packer.packed_paths.append(path+['packed points'])
+    return drawing
+
+
+def pack_value(val, packer):
+    """Returns a JSON object for the value in which long lists of numbers and of dicts with numeric values have been
+    replaced by references to binary blocks added to the packer:
+        {PACKED_KEY: ['array', ref]}                          - list of numbers
+        {PACKED_KEY: ['table', [[key, ref], ...]]}             - list of dicts, one column per key
+    (and {PACKED_KEY: ['columns', [[key, ref], ...]]} for the drawing points, see pack_drawing())
+    where ref is the reference returned by Packer.add_array(). Dicts of the value itself that look like these get
+    escaped."""
+    if isinstance(val, list):
+        if len(val) >= MIN_PACKED_LENGTH:
+            typecode = get_numbers_typecode(val)
+            if typecode is not None:
+                return {PACKED_KEY: ['array', packer.add_array(array(typecode, val))]}
+            columns = get_table_columns(val)
+            if columns is not None:
+                return {PACKED_KEY: ['table', [[key, packer.add_array(column)] for key, column in columns]]}
+        return [pack_value(v, packer) for v in val]
+    if isinstance(val, dict):
+        return escape_dict({key: pack_value(v, packer) for key, v in val.items()}, (PACKED_KEY, ESCAPED_KEY))
+    return val
+
+
+def escape_dict(obj, reserved_keys):
+    """A dict whose only key is one of reserved_keys would be taken for a reference when the project is read, so it
+    gets wrapped: {ESCAPED_KEY: obj}. Reading unwraps it without looking at the dict itself (see unpack_value())."""
+    if len(obj) == 1 and next(iter(obj)) in reserved_keys:
+        return {ESCAPED_KEY: obj}
+    return obj
+
+
+def escape_references(val, reserved_keys):
+    """Returns the value with all its dicts escaped, see escape_dict()."""
+    if isinstance(val, list):
+        return [escape_references(v, reserved_keys) for v in val]
+    if isinstance(val, dict):
+        return escape_dict({key: escape_references(v, reserved_keys) for key, v in val.items()}, reserved_keys)
+    return val
+
+
+def get_numbers_typecode(vals):
+    """The typecode of an array holding exactly the values, or None if they aren't all ints or all floats (JSON
+    distinguishes 1 from 1.0)."""
+    val_type = type(vals[0])
+    if val_type is float:
+        for v in vals:
+            if type(v) is not float:
+                return None
+        return 'd'
+    if val_type is int:
+        for v in vals:
+            if type(v) is not int:
+                return None
+        low = min(vals)
+        high = max(vals)
+        for typecode in INT_TYPECODES:
+            limit = 1 << (array(typecode).itemsize*8-1)
+            if -limit <= low and high < limit:
+                return typecode
+    return None
+
+
+def get_table_columns(vals):
+    """[(key, array), ...] if the values are dicts with the same keys and numbers as values, otherwise None."""
+    first = vals[0]
+    if type(first) is not dict or len(first) == 0:
+        return None
+    keys = list(first.keys())
+    for v in vals:
+        if type(v) is not dict or len(v) != len(keys):
+            return None
+    columns = []
+    for key in keys:
+        try:
+            column = [v[key] for v in vals]
+        except KeyError:
+            return None
+        typecode = get_numbers_typecode(column)
+        if typecode is None:
+            return None
+        columns.append((key, array(typecode, column)))
+    return columns
+
+
+#   UNPACKING
+
+def unpack_value(obj, data):
+    if isinstance(obj, dict):
+        if len(obj) == 1:
+            packed = obj.get(PACKED_KEY)
+            if packed is not None:
+                if packed[0] == 'array':
+                    return read_array(packed[1], data).tolist()
+                if packed[0] == 'columns':
+                    return {key: read_array(ref, data).tolist() for key, ref in packed[1]}
+                keys = [key for key, ref in packed[1]]
+                columns = [read_array(ref, data).tolist() for key, ref in packed[1]]
+                return [dict(zip(keys, row)) for row in zip(*columns)]
+            escaped = obj.get(ESCAPED_KEY)
+            if escaped is not None:
+                obj = escaped
+        return {key: unpack_value(v, data) for key, v in obj.items()}
+    if isinstance(obj, list):
+        return [unpack_value(v, data) for v in obj]
+    return obj
+
+
+def read_array(ref, data):
+    typecode, offset, length = ref
+    arr = array(typecode)
+    arr.frombytes(data[offset:offset+length])
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr
+
+
+#   BLOBS
+
+class BlobStore:
+    """The directory next to a project file (BLOBS_SUFFIX) holding the large values of its variables and node states.
+    Each is stored in a file named by the SHA-256 hash of its content, so identical values get stored once and values
+    that didn't change don't get written again. In the project, they're replaced by {BLOB_KEY: [kind, file name]}:
+        'npy'    numpy arrays (of any size, JSON can't hold them), as .npy files which get memory-mapped (copy-on-write,
+                 so changing the array doesn't change the file) when the project is read
+        'chunk'  other values (including strings) whose JSON is at least min_size bytes, as a chunk of their own
+                 (see write_chunk())
+        'bytes'  bytes values of at least min_size bytes, as they are
+    Dicts of the values that look like references get escaped, see escape_dict()."""
+
+    min_size = 64*1024
+    reserved_keys = (BLOB_KEY, ESCAPED_KEY)
+
+    def __init__(self, dir_path):
+        self.dir_path = dir_path
+        self.used = set()  # the names of the files of the values stored
+
+    def store(self, val):
+        """Returns the value with the large values in it replaced by references, or the value itself."""
+        if numpy is not None and isinstance(val, numpy.ndarray) and val.dtype != object:
+            return self.store_array(val)
+        if isinstance(val, (list, dict)):
+            try:
+                json_bytes = json.dumps(val).encode('utf-8')
+            except TypeError:  # contains numpy arrays
+                if isinstance(val, list):
+                    return [self.store(v) for v in val]
+                return escape_dict({key: self.store(v) for key, v in val.items()}, BlobStore.reserved_keys)
+            if len(json_bytes) >= self.min_size:
+                return self.store_chunk(val, json_bytes)
+            if any(b'"'+key.encode('utf-8')+b'"' in json_bytes for key in BlobStore.reserved_keys):
+                return escape_references(val, BlobStore.reserved_keys)
+            return val
+        if isinstance(val, str) and len(val) >= self.min_size:
+            return self.store_chunk(val, json.dumps(val).encode('utf-8'))
+        if isinstance(val, bytes) and len(val) >= self.min_size:
+            return self.store_bytes(val)
+        return val
+
+    def store_array(self, arr):
+        arr = numpy.ascontiguousarray(arr)
+        content_hash = hashlib.sha256(str((arr.dtype.str, arr.shape)).encode('utf-8'))
+        content_hash.update(arr.reshape(-1).view(numpy.uint8))
+        name = content_hash.hexdigest()+'.npy'
+        self.write_file(name, lambda f: numpy.save(f, arr, allow_pickle=False))
+        return {BLOB_KEY: ['npy', name]}
+
+    def store_chunk(self, val, json_bytes):
+        name = hashlib.sha256(json_bytes).hexdigest()+'.chunk'
+
+        def write(f):
+            packer = Packer()
+            write_chunk(f, [packer.pack(val, [0])], packer)
+
+        self.write_file(name, write)
+        return {BLOB_KEY: ['chunk', name]}
+
+    def store_bytes(self, val):
+        name = hashlib.sha256(val).hexdigest()+'.bytes'
+        self.write_file(name, lambda f: f.write(val))
+        return {BLOB_KEY: ['bytes', name]}
+
+    def write_file(self, name, write):
+        self.used.add(name)
+        file_path = os.path.join(self.dir_path, name)
+        if os.path.exists(file_path):  # same content
+            return
+        os.makedirs(self.dir_path, exist_ok=True)
+        f = open(file_path+'.saving', 'wb')
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            os.remove(file_path+'.saving')
+            raise
+        f.close()
+        os.replace(file_path+'.saving', file_path)
+
+    def load(self, obj):
+        """Returns the value with the references replaced by the stored values."""
+        if isinstance(obj, dict):
+            if len(obj) == 1:
+                ref = obj.get(BLOB_KEY)
+                if ref is not None:
+                    return self.load_file(*ref)
+                escaped = obj.get(ESCAPED_KEY)
+                if escaped is not None:
+                    obj = escaped
+            return {key: self.load(v) for key, v in obj.items()}
+        if isinstance(obj, list):
+            return [self.load(v) for v in obj]
+        return obj
+
+    def load_file(self, kind, name):
+        file_path = os.path.join(self.dir_path, name)
+        if kind == 'npy':
+            if numpy is None:
+                raise ValueError('numpy is needed to read '+file_path)
+            try:
+                return numpy.load(file_path, mmap_mode='c', allow_pickle=False)
+            except ValueError:  # empty arrays can't be memory-mapped
+                return numpy.load(file_path, allow_pickle=False)
+
+        f = open(file_path, 'rb')
+        if kind == 'bytes':
+            try:
+                return f.read()
+            finally:
+                f.close()
+        try:
+            return read_chunk(f, [0, os.path.getsize(file_path)])[0]
+        except (struct.error, zlib.error, UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(file_path+' is not a valid blob ('+type(e).__name__+')')
+        finally:
+            f.close()
+
+    def remove_unused(self):
+        """Removes the files of the values which haven't been stored by this BlobStore."""
+        if not os.path.isdir(self.dir_path):
+            return
+        for name in os.listdir(self.dir_path):
+            if name not in self.used:
+                try:
+                    os.remove(os.path.join(self.dir_path, name))
+                except OSError:  # like a file still memory-mapped on Windows, it gets removed next time
+                    pass
+        if len(self.used) == 0:
+            try:
+                os.rmdir(self.dir_path)
+            except OSError:
+                pass
+
+
+def store_project_blobs(project, blob_store):
+    """Returns a copy of the project dict in which the large values of variables and node states are references to
+    the blob store, see BlobStore."""
+    scripts = []
+    for script_config in project['scripts']:
+        script = dict(script_config)
+        script['variables'] = {name: blob_store.store(val) for name, val in script_config['variables'].items()}
+        script['flow'] = dict(script_config['flow'])
+        script['flow']['nodes'] = [store_node_blobs(node, blob_store) for node in script_config['flow']['nodes']]
+        scripts.append(script)
+
+    sub_flows = []
+    for sub_flow_config in project.get('sub flows', []):
+        sub_flow = dict(sub_flow_config)
+        sub_flow['nodes'] = [store_node_blobs(node, blob_store) for node in sub_flow_config['nodes']]
+        sub_flows.append(sub_flow)
+
+    project = dict(project)
+    project['scripts'] = scripts
+    project['sub flows'] = sub_flows
+    return project
+
+
+def store_node_blobs(node_config, blob_store):
+    for key in ('main widget data', 'state data'):
+        if key in node_config:
+            val = blob_store.store(node_config[key])
+            if val is not node_config[key]:
+                node_config = dict(node_config)
+                node_config[key] = val
+    return node_config
+
+
+def load_project_blobs(project, blob_store):
+    """The counterpart of store_project_blobs(), replaces the references in the project dict."""
+    node_configs = []
+    for script in project['scripts']:
+        script['variables'] = {name: blob_store.load(val) for name, val in script['variables'].items()}
+        node_configs += script['flow']['nodes']
+    for sub_flow in project.get('sub flows', []):
+        node_configs += sub_flow['nodes']
+
+    for node in node_configs:
+        for key in ('main widget data', 'state data'):
+            if key in node:
+                node[key] = blob_store.load(node[key])
+
+
+#   JOURNAL
+#   one JSON object per line: {'seq': ..., 'script': script name, 'ops': [...]}, see ProjectJournal and FlowJournal
+
+def apply_journal(project, journal_file_path):
+    """Applies the records of the journal that aren't in the project yet ('journal seq' in the general info is the
+    last one that is) to the project's scripts. A broken last record (from a crash while writing it) gets ignored."""
+    if not os.path.exists(journal_file_path):
+        return
+    general_info = project['general info']
+    scripts = {s['name']: s for s in project['scripts']}
+
+    f = open(journal_file_path)
+    for line in f:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            break
+        if record['seq'] <= general_info.get('journal seq', 0):
+            continue
+        script = scripts.get(record['script'])
+        if script is not None:  # otherwise it didn't get read, see read_project_file()
+            apply_journal_ops(script['flow'], record['ops'])
+        general_info['journal seq'] = record['seq']
+    f.close()
+
+
+def apply_journal_ops(flow, ops):
+    """The ops refer to NIs and drawings by their index, like the flow's connections do:
+        ['add node', config, connections]  - appended, with its connections to NIs in the flow
+        ['remove node', index]             - together with its connections
+        ['connect', connection], ['disconnect', connection]
+        ['move node', index, x, y]
+        ['add drawing', config], ['update drawing', index, config], ['remove drawing', index]
+        ['move drawing', index, x, y]"""
+    nodes = flow['nodes']
+    connections = flow['connections']
+    drawings = flow.setdefault('drawings', [])
+    for op in ops:
+        kind = op[0]
+        if kind == 'add node':
+            nodes.append(op[1])
+            connections.extend(op[2])
+        elif kind == 'remove node':
+            index = op[1]
+            del nodes[index]
+            remaining_connections = []
+            for c in connections:
+                if c['parent node instance index'] == index or c['connected node instance'] == index:
+                    continue
+                if c['parent node instance index'] > index:
+                    c['parent node instance index'] -= 1
+                if c['connected node instance'] is not None and c['connected node instance'] > index:
+                    c['connected node instance'] -= 1
+                remaining_connections.append(c)
+            connections[:] = remaining_connections
+        elif kind == 'connect':
+            connections.append(op[1])
+        elif kind == 'disconnect':
+            if op[1] in connections:
+                connections.remove(op[1])
+        elif kind == 'move node':
+            nodes[op[1]]['position x'] = op[2]
+            nodes[op[1]]['position y'] = op[3]
+        elif kind == 'add drawing':
+            drawings.append(op[1])
+        elif kind == 'update drawing':
+            drawings[op[1]] = op[2]
+        elif kind == 'remove drawing':
+            del drawings[op[1]]
+        elif kind == 'move drawing':
+            drawings[op[1]]['pos x'] = op[2]
+            drawings[op[1]]['pos y'] = op[3]
@@ -0,0 +1,212 @@
+import bisect
+import copy
+import json
+import os
+import threading
+
+from custom_src.DrawingObject import DrawingObject
+from custom_src.NodeInstance import NodeInstance
+from custom_src.ProjectFile import write_project_file, store_node_blobs, BlobStore, JOURNAL_SUFFIX, BLOBS_SUFFIX
+from custom_src.global_tools.Debugger import Debugger
+from custom_src.global_tools.class_inspection import find_type_in_object
+
+
+class ProjectJournal:
+    """Journal mode of saving (File > Journal Mode). Instead of serializing the whole project on every save, every
+    command on a flow's undo stack (placing, moving, removing, connecting, pasting, ...) appends a small record to
+    the journal next to the project file right when it's done (see FlowJournal). So a crash loses at most the
+    command being done, and the journal gets applied when the project is read (see ProjectFile.apply_journal()).
+
+    The journal gets compacted into the project file - in a background thread, only collecting the project's data (and
+    copying it, so the thread doesn't see it change) happens in the GUI thread - when it has max_records records, when
+    the project gets saved and when scripts get added, removed or renamed. Changes that aren't commands (like values
+    typed into input fields, variables and node states) are only in the project file, so they get saved with the next
+    compaction."""
+
+    max_records = 500
+
+    def __init__(self, main_window, file_path, seq=0, reset=True):
+        """seq is the last record in the project file, reset discards an existing journal (not belonging to it)."""
+        self.main_window = main_window
+        self.file_path = file_path
+        self.journal_file_path = file_path+JOURNAL_SUFFIX
+        self.seq = seq
+        self.records = []  # [(seq, line)] of the records that aren't in the project file yet
+        self.lock = threading.Lock()  # for the journal file, which gets rewritten by the compaction thread
+        self.journal_file = open(self.journal_file_path, 'w' if reset else 'a')
+        self.compaction_thread = None
+        self.blob_store = BlobStore(file_path+BLOBS_SUFFIX)  # for the states of added NIs
+
+    def append(self, script_name, ops):
+        ops = [[op[0], store_node_blobs(op[1], self.blob_store)]+op[2:] if op[0] == 'add node' else op for op in ops]
+        self.seq += 1
+        line = json.dumps({'seq': self.seq, 'script': script_name, 'ops': ops})+'\n'
+        with self.lock:
+            self.journal_file.write(line)
+            self.journal_file.flush()
+            self.records.append((self.seq, line))
+        if len(self.records) >= ProjectJournal.max_records:
+            self.compact()
+
+    def flush(self):
+        """Appends the changes the flows haven't passed yet (like those not made by commands)."""
+        for flow in self.main_window.get_built_flows():
+            flow.journal.flush()
+
+    def compact(self):
+        """Writes the whole project into the project file in a background thread. Afterwards, the journal only keeps
+        the records appended in the meantime."""
+        self.flush()
+        self.wait()
+        project = self.main_window.get_project_json_data()
+        project['general info']['journal seq'] = self.seq
+        try:
+            # the data contains the values of variables and node states themselves, which might change meanwhile
+            project = copy.deepcopy(project)
+        except Exception as e:  # values that can't be copied, so it has to be written right now
+            Debugger.debug('couldn\'t copy the project data, compacting in the GUI thread:', e)
+            self.write_project(project, self.seq)
+            return
+        self.compaction_thread = threading.Thread(target=self.write_project, args=(project, self.seq),
+                                                  name='project journal compaction')
+        self.compaction_thread.start()
+
+    def write_project(self, project, seq):
+        try:
+            write_project_file(self.file_path, project)
+        except Exception as e:  # the journal keeps everything then
+            Debugger.debug('couldn\'t compact the project journal:', e)
+            return
+
+        with self.lock:
+            self.records = [(s, line) for s, line in self.records if s > seq]
+            self.journal_file.close()
+            f = open(self.journal_file_path+'.saving', 'w')
+            f.writelines(line for s, line in self.records)
+            f.close()
+            os.replace(self.journal_file_path+'.saving', self.journal_file_path)
+            self.journal_file = open(self.journal_file_path, 'a')
+        Debugger.debug('compacted project journal up to', seq)
+
+    def wait(self):
+        if self.compaction_thread is not None:
+            self.compaction_thread.join()
+
+    def close(self):
+        """Leaves journal mode: the project gets written and the journal removed."""
+        self.compact()
+        self.wait()
+        with self.lock:
+            self.journal_file.close()
+            if len(self.records) == 0:
+                os.remove(self.journal_file_path)
+
+
+class FlowJournal:
+    """Records the changes of a flow's NIs, connections and drawings as ops (see ProjectFile.apply_journal_ops())
+    and passes them to the project's journal when the command making them is done - when the index of the flow's
+    undo stack changes (also through undo and redo). Each Flow has one; it's only recording while the project is in
+    journal mode and when the flow has been built."""
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.recording = False  # set by the Flow once it's built
+        self.ops = []
+        flow.undo_stack.indexChanged.connect(self.command_done)
+
+        # the ops refer to NIs by their indices in flow.all_node_instances, see get_index()
+        self.positions = None  # {NI id: position}, created when needed
+        self.removed_positions = []  # sorted positions of the NIs removed since then
+        self.next_position = 0
+
+    def is_active(self):
+        return self.recording and self.flow.parent_script.main_window.project_journal is not None
+
+    def command_done(self, index):
+        self.flush()
+
+    def flush(self):
+        if len(self.ops) == 0:
+            return
+        ops = self.ops
+        self.ops = []
+        journal = self.flow.parent_script.main_window.project_journal
+        if journal is not None:
+            journal.append(self.flow.parent_script.name, ops)
+
+    def get_index(self, ni):
+        """Returns the index of the NI in flow.all_node_instances without searching the list. NIs get appended to
+        the list and removed from it (see Flow), so every NI gets a position that never changes, and its index is the
+        position minus the number of NIs with smaller positions removed since."""
+        if self.positions is None or len(self.removed_positions) > len(self.positions):
+            self.positions = {node_instance.id: index
+                              for index, node_instance in enumerate(self.flow.all_node_instances)}
+            self.removed_positions = []
+            self.next_position = len(self.positions)
+        position = self.positions[ni.id]
+        return position - bisect.bisect_left(self.removed_positions, position)
+
+    def get_connection(self, output_port, input_port):
+        return {'parent node instance index': self.get_index(output_port.parent_node_instance),
+                'output port index': output_port.index,
+                'connected node instance': self.get_index(input_port.parent_node_instance),
+                'connected input port index': input_port.index}
+
+    def node_instance_added(self, ni):
+        """Called after the NI got appended to the flow's NIs."""
+        if self.positions is not None:
+            self.positions[ni.id] = self.next_position
+            self.next_position += 1
+        if not self.is_active():
+            return
+        # the connections to NIs in the flow, like when it gets added back by undo
+        connections = [self.get_connection(output_port, input_port)
+                       for output_port, input_port in self.flow.connection_table.get_connections([ni])]
+        self.ops.append(['add node', ni.get_json_data(), connections])
+
+    def node_instance_removed(self, ni):
+        """Called before the NI gets removed."""
+        if self.is_active():
+            self.ops.append(['remove node', self.get_index(ni)])
+        if self.positions is not None:
+            bisect.insort(self.removed_positions, self.positions.pop(ni.id))
+
+    def gates_connected(self, parent_port, child_port, connected):
+        if not self.is_active():
+            return
+        output_port, input_port = (parent_port, child_port) if parent_port.direction == 'output' else \
+            (child_port, parent_port)
+        connection_table = self.flow.connection_table
+        if connection_table.has_node_instance(output_port.parent_node_instance) and \
+                connection_table.has_node_instance(input_port.parent_node_instance):
+            self.ops.append(['connect' if connected else 'disconnect', self.get_connection(output_port, input_port)])
+
+    def components_moved(self, items):
+        if not self.is_active():
+            return
+        drawing_indices = None
+        connection_table = self.flow.connection_table
+        for item in items:
+            if find_type_in_object(item, NodeInstance) and connection_table.has_node_instance(item):
+                self.ops.append(['move node', self.get_index(item), item.pos().x(), item.pos().y()])
+            elif find_type_in_object(item, DrawingObject):
+                if drawing_indices is None:
+                    drawing_indices = {drawing: index for index, drawing in enumerate(self.flow.drawings)}
+                if item in drawing_indices:
+                    self.ops.append(['move drawing', drawing_indices[item], item.pos().x(), item.pos().y()])
+
+    def drawing_added(self, drawing):
+        if self.is_active():
+            self.ops.append(['add drawing', drawing.get_json_data()])
+
+    def drawing_finished(self, drawing):
+        """The points of a drawing get added after it has been placed, see Flow.tabletEvent()."""
+        if self.is_active() and drawing in self.flow.drawings:
+            self.ops.append(['update drawing', self.flow.drawings.index(drawing), drawing.get_json_data()])
+            self.flush()
+
+    def drawing_removed(self, drawing):
+        """Called before the drawing gets removed."""
+        if self.is_active():
+            self.ops.append(['remove drawing', self.flow.drawings.index(drawing)])
+
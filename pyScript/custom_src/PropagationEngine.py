@@ -0,0 +1,172 @@
+import heapq
+
+from custom_src.global_tools.Debugger import Debugger
+
+
+class PropagationEngine:
+    """Glitch-free push propagation of data changes (used when ExecutionSettings.glitch_free_push is enabled).
+    Instead of updating connected NIs right away (depth first) when an output's value changes, the NIs get marked
+    dirty and are updated afterwards, once each, in topological order. So when one output feeds two paths which join
+    again, the joining NI only updates once, after both paths have been updated - it never sees half updated inputs.
+
+    A change batch starts with the first change coming from outside (like an exec NI setting an output value) and
+    ends when there are no dirty NIs left, before set_val() returns - just like it was with depth first pushing.
+    An NI gets updated with the index of its dirty input, or -1 if several of its inputs got dirty. It only gets
+    updated once per batch and exec signal (see exec_signal()), so cycles don't update NIs again and again."""
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.ranks = None  # {NI: topological rank}, computed lazily and kept valid when connections change
+        self.dirty = []  # heap of (rank, counter, NI)
+        self.dirty_inputs = {}  # {dirty NI: index of its dirty input or -1 if there are several}
+        self.updated_node_instances = set()  # NIs that already got updated in the current batch since the last exec
+        self.counter = 0
+        self.propagating = False
+
+        # STATS
+        self.batches = 0
+        self.requested_updates = 0  # number of updates depth first pushing would have called directly
+        self.performed_updates = 0
+
+    def input_connected(self, input_port):
+        """Called when a data input got connected. The ranks only need to be a topological order, which a new
+        connection only breaks if it leads to an NI whose rank isn't higher than the one of the NI it comes from. Then
+        the ranks get raised along the data connections downstream, instead of computing all of them again (which
+        made building a flow quadratic). Removed connections never break the order."""
+        if self.ranks is None:
+            return
+        ranks = self.ranks
+        max_raises = 2*len(ranks) + 10  # more means a cycle, which compute_ranks() takes care of
+        stack = [(cpi.parent_node_instance, input_port.parent_node_instance)
+                 for cpi in input_port.connected_port_instances]
+        while len(stack) > 0:
+            parent_ni, ni = stack.pop()
+            rank = ranks.get(parent_ni, 0) + 1
+            if ranks.get(ni, 0) >= rank:
+                continue
+            max_raises -= 1
+            if max_raises < 0:
+                self.ranks = None
+                return
+            ranks[ni] = rank
+            for o in ni.outputs:
+                if o.type_ == 'data':
+                    for cpi in o.connected_port_instances:
+                        stack.append((ni, cpi.parent_node_instance))
+
+    def node_instance_added(self, ni):
+        """Called after the NI got added to the flow. An NI added back by undo still has its connections, so it gets
+        ranked like they just got connected."""
+        if self.ranks is None:
+            return
+        for i in ni.inputs:
+            if i.type_ == 'data' and len(i.connected_port_instances) > 0:
+                self.input_connected(i)
+        for o in ni.outputs:
+            if o.type_ == 'data':
+                for cpi in o.connected_port_instances:
+                    self.input_connected(cpi)
+
+    def node_instance_removed(self, ni):
+        if self.ranks is not None:
+            self.ranks.pop(ni, None)
+
+    def compute_ranks(self):
+        """Longest path ranks over the data connections (Kahn's algorithm). NIs in cycles get ranks behind
+        everything else."""
+        successors = {}
+        in_degree = {}
+        for ni in self.flow.all_node_instances:
+            in_degree.setdefault(ni, 0)
+            successors[ni] = []
+            for o in ni.outputs:
+                if o.type_ != 'data':
+                    continue
+                for cpi in o.connected_port_instances:
+                    successors[ni].append(cpi.parent_node_instance)
+                    in_degree[cpi.parent_node_instance] = in_degree.get(cpi.parent_node_instance, 0) + 1
+
+        ranks = {ni: 0 for ni in in_degree}
+        queue = [ni for ni in in_degree if in_degree[ni] == 0]
+        sorted_count = 0
+        while len(queue) > 0:
+            ni = queue.pop()
+            sorted_count += 1
+            for s in successors.get(ni, []):
+                ranks[s] = max(ranks[s], ranks[ni] + 1)
+                in_degree[s] -= 1
+                if in_degree[s] == 0:
+                    queue.append(s)
+
+        if sorted_count < len(ranks):
+            Debugger.debug('data connections contain cycles')
+            max_rank = max(ranks.values()) + 1
+            for ni in ranks:
+                if in_degree[ni] > 0:
+                    ranks[ni] = max_rank
+
+        self.ranks = ranks
+
+    def push(self, output_port):
+        """Marks all NIs connected to a data output dirty and updates them (if no batch is running yet)."""
+        if self.ranks is None:
+            self.compute_ranks()
+
+        for cpi in output_port.connected_port_instances:
+            ni = cpi.parent_node_instance
+            if ni.is_active():  # see PortInstance.update(): active NIs only react on exec signals
+                continue
+            self.requested_updates += 1
+            dirty_input = self.dirty_inputs.get(ni)
+            if dirty_input is not None:
+                if dirty_input != cpi.index:
+                    self.dirty_inputs[ni] = -1
+                continue
+            if ni in self.updated_node_instances:
+                Debugger.debug(ni.parent_node.title, 'already got updated in this batch (cycle)')
+                continue
+            if ni not in self.ranks:  # new NI without data connections before
+                self.ranks[ni] = 0
+            self.dirty_inputs[ni] = cpi.index
+            self.counter += 1
+            heapq.heappush(self.dirty, (self.ranks[ni], self.counter, ni))
+
+        if not self.propagating:
+            self.propagate()
+
+    def propagate(self):
+        self.propagating = True
+        self.batches += 1
+        try:
+            while len(self.dirty) > 0:
+                rank, counter, ni = heapq.heappop(self.dirty)
+                input_index = self.dirty_inputs.pop(ni)
+                self.updated_node_instances.add(ni)
+                self.performed_updates += 1
+                ni.update(input_index)
+        finally:
+            self.dirty.clear()
+            self.dirty_inputs.clear()
+            self.updated_node_instances.clear()
+            self.propagating = False
+
+    def exec_signal(self):
+        """Called when an exec output gets executed. What happens then (like the next iteration of a loop started by
+        an NI of the batch) may change values the batch's NIs already got updated with, so they can update again."""
+        self.updated_node_instances.clear()
+
+    def saved_updates(self):
+        """Number of update calls that didn't happen compared to pushing depth first. It's a lower bound, because
+        with depth first pushing every redundant update pushes its changes further down again."""
+        return self.requested_updates - self.performed_updates
+
+    def reset_stats(self):
+        self.batches = 0
+        self.requested_updates = 0
+        self.performed_updates = 0
+
+    def get_stats_str(self):
+        return 'propagation batches: '+str(self.batches) + \
+               ', requested updates: '+str(self.requested_updates) + \
+               ', performed updates: '+str(self.performed_updates) + \
+               ', saved updates: '+str(self.saved_updates())
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+
+
+class PureMemo:
+    """Memoizes the outputs of pure NIs (used when ExecutionSettings.pure_memo is enabled). Each flow has one.
+
+    A node declared with "pure": true in its package (see Node) promises that its data outputs only depend on the
+    values of its data inputs - no state, no side effects, no exec ports (like sin or +). Before such a NI's
+    update_event() runs, the values of its inputs are looked up in the NI's memo, which holds the outputs for the last
+    max_entries different inputs:
+        - same inputs as last time: nothing changed, so update_event() doesn't run and nothing gets pushed downstream
+        - inputs seen before: the memoized outputs get set (and pushed) without running update_event()
+        - new inputs: update_event() runs and its outputs get memoized
+    The inputs are compared by value and type (1 and 1.0 are different inputs). Unhashable values (lists, dicts,
+    numpy arrays, ...) can be changed in place without the NI noticing, like by Arr Append, so NIs getting those
+    always run. The input values get read only once: update_event() gets the very same values through
+    NodeInstance.input() (via stream_input_vals, like in a StreamingPipeline stage), so NIs providing data on
+    request upstream don't get computed twice."""
+
+    max_entries = 8  # per NI
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.memos = {}  # {NI: NodeMemo}
+
+        # STATS
+        self.hits = 0  # including the unchanged ones
+        self.unchanged = 0  # hits with the same inputs as last time, which didn't push anything
+        self.misses = 0
+        self.unhashable = 0
+
+    def run(self, node_instance, input_called):
+        """Called from NodeInstance.run_update_event() instead of update_event() for pure NIs."""
+        input_vals = {i.index: node_instance.input(i.index) for i in node_instance.inputs if i.type_ == 'data'}
+        key = tuple((type(val), val) for val in input_vals.values())
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+
+        if key is not None:
+            memo = self.memos.get(node_instance)
+            if memo is None:
+                memo = NodeMemo()
+                self.memos[node_instance] = memo
+
+            outputs = memo.entries.get(key)
+            if outputs is not None:
+                memo.entries.move_to_end(key)
+                memo.hits += 1
+                self.hits += 1
+                if key == memo.last_key:
+                    self.unchanged += 1
+                    return
+                memo.last_key = key
+                for o, val in outputs:
+                    o.set_val(val)
+                return
+
+            memo.misses += 1
+            self.misses += 1
+            memo.last_key = None  # in case update_event() fails after setting some outputs
+        else:
+            self.unhashable += 1
+
+        # inlined, this is on the recursion path of data pushes
+        stream_input_vals = node_instance.stream_input_vals
+        node_instance.stream_input_vals = input_vals
+        try:
+            result = node_instance.update_event(input_called)
+        finally:
+            node_instance.stream_input_vals = stream_input_vals
+
+        if key is None:
+            return result
+        if result is not None:  # async update_event(), the outputs aren't set yet
+            memo.last_key = None
+            return result
+
+        memo.entries[key] = tuple((o, o.val) for o in node_instance.outputs if o.type_ == 'data')
+        memo.last_key = key
+        if len(memo.entries) > PureMemo.max_entries:
+            memo.entries.popitem(last=False)
+
+    def node_instance_removed(self, node_instance):
+        self.memos.pop(node_instance, None)
+
+    def clear(self):
+        self.memos = {}
+
+    def reset_stats(self):
+        self.hits = 0
+        self.unchanged = 0
+        self.misses = 0
+        self.unhashable = 0
+        for memo in self.memos.values():
+            memo.hits = 0
+            memo.misses = 0
+
+    def get_stats_str(self):
+        lookups = self.hits+self.misses
+        s = 'pure memo hits: '+str(self.hits)+' ('+str(self.unchanged)+' unchanged)' + \
+            ', misses: '+str(self.misses) + \
+            ', unhashable inputs: '+str(self.unhashable)
+        if lookups > 0:
+            s += ', hit rate: %d%%' % (self.hits/lookups*100)
+        return s
+
+
+class NodeMemo:
+    __slots__ = ('entries', 'last_key', 'hits', 'misses')
+
+    def __init__(self):
+        self.entries = OrderedDict()  # {inputs key: ((output port, value), ...)}, least recently used first
+        self.last_key = None
+        self.hits = 0
+        self.misses = 0
+
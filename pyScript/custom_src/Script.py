@@ -4,16 +4,21 @@ from PySide2.QtCore import QObject, Signal
 from ui.w_ui_script import WUIScript
 
 from custom_src.Flow import Flow
+from custom_src.HeatOverlay import HeatOverlay
 from custom_src.Log import Logger
+from custom_src.ScriptExecutor import ScriptExecutor
 from custom_src.script_variables.VariablesHandler import VariablesHandler
 from custom_src.CodePreview_Widget import CodePreview_Widget
 
 
 class Script(QObject):
+    """A script loaded from a project can be created without its flow (build_flow=False), it keeps the flow's config
+    then and builds the Flow with all its NIs when build_flow() gets called - when its tab gets activated for the first
+    time, see MainWindow. Until then, self.flow is None."""
 
     name_changed = Signal(str)
 
-    def __init__(self, main_window, name, config=None):
+    def __init__(self, main_window, name, config=None, build_flow=True):
         super(Script, self).__init__()
 
         self.main_window = main_window
@@ -25,32 +30,43 @@ class Script(QObject):
         self.variables_handler = None
         self.name = name
         self.flow = None
+        self.flow_config = None  # the config of the flow if it didn't get built yet
         self.thumbnail_source = ''  # URL to the Script's thumbnail picture
         self.code_preview_txt_edit = CodePreview_Widget()
+        self.executor = ScriptExecutor(self)
 
         if config:
             self.name = config['name']
             self.variables_handler = VariablesHandler(self, config['variables'])
-            self.flow = Flow(main_window, self, config['flow'])
-            self.variables_handler.flow = self.flow
+            self.flow_config = config['flow']
         else:
-            self.flow = Flow(main_window, self)
             self.variables_handler = VariablesHandler(self)
-            self.variables_handler.flow = self.flow
 
         # variables list widget
         self.widget.ui.variables_scrollArea.setWidget(self.variables_handler.list_widget)
         self.widget.ui.add_variable_push_button.clicked.connect(self.add_var_clicked)
         self.widget.ui.new_var_name_lineEdit.returnPressed.connect(self.new_var_line_edit_return_pressed)
 
-        # flow
-        self.widget.ui.splitter.insertWidget(0, self.flow)
-
         # code preview
         self.widget.ui.source_code_groupBox.layout().addWidget(self.code_preview_txt_edit)
 
         # logs
         self.widget.ui.logs_scrollArea.setWidget(self.logger)
+
+        if build_flow:
+            self.build_flow()
+
+    def build_flow(self):
+        if self.flow is not None:
+            return
+
+        self.flow = Flow(self.main_window, self, self.flow_config)
+        self.flow_config = None
+        self.variables_handler.flow = self.flow
+        if HeatOverlay.enabled:
+            self.flow.heat_overlay.start()
+
+        self.widget.ui.splitter.insertWidget(0, self.flow)
         self.widget.ui.splitter.setSizes([700, 0])
 
 
@@ -68,6 +84,6 @@ class Script(QObject):
     def get_json_data(self):
         script_dict = {'name': self.name,
                        'variables': self.variables_handler.get_json_data(),
-                       'flow': self.flow.get_json_data()}
+                       'flow': self.flow.get_json_data() if self.flow is not None else self.flow_config}
 
         return script_dict
\ No newline at end of file
@@ -0,0 +1,54 @@
+import queue
+import threading
+
+from custom_src.global_tools.Debugger import Debugger
+from custom_src.global_tools.GUIThread import GUIThread
+
+
+class ScriptExecutor:
+    """Runs the exec pulses of a Script in a worker thread (used when ExecutionSettings.background_execution is
+    enabled), so long running update_event()s don't freeze the editor. Updates requested from the GUI thread (button
+    clicks, widget changes, timers, ...) get queued and processed one after another by the worker. Everything that
+    touches widgets from there (main widgets, logs, the gates' tool tips) gets run in the GUI thread, see GUIThread.
+    The worker thread gets started with the first pulse."""
+
+    def __init__(self, script):
+        GUIThread.init()
+
+        self.script = script
+        self.queue = queue.Queue()
+        self.thread = None
+        self.pulses = 0
+
+    def in_worker_thread(self):
+        return threading.current_thread() is self.thread
+
+    def submit(self, node_instance, input_called):
+        """Called from NodeInstance.update() in the GUI thread."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='executor of '+self.script.name, daemon=True)
+            self.thread.start()
+        self.queue.put((node_instance, input_called))
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            node_instance, input_called = item
+            Debugger.debug('executor of', self.script.name, 'running pulse from', node_instance.parent_node.title)
+            node_instance.update(input_called)
+            self.pulses += 1
+
+    def stop(self):
+        """Stops the worker thread after the pending pulses and waits for it, so it doesn't run NIs of a flow
+        that's being removed anymore."""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        if not self.in_worker_thread():
+            while self.thread.is_alive():
+                if GUIThread.invoker is not None and GUIThread.is_current():
+                    GUIThread.process_pending_calls()  # the worker might be waiting for the GUI thread
+                self.thread.join(0.005)
+        self.thread = None
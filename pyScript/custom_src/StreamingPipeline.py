@@ -0,0 +1,329 @@
+import threading
+import time
+from collections import deque
+
+from custom_src.Execution import ExecutionSettings
+from custom_src.global_tools.Debugger import Debugger
+from custom_src.global_tools.GUIThread import GUIThread
+
+
+class StreamingPipeline:
+    """Pipelined execution of value streams (used when ExecutionSettings.streaming_pipelines is enabled), like the
+    frames of a video feed going through some image processing NIs. Each flow has one.
+
+    Normally a source setting a new value pushes it synchronously through all the NIs downstream, so the source can
+    only produce the next value once the slowest path is done with the current one. In a pipeline every passive NI
+    downstream of a stream source (see NodeInstance.stream_output_val()) is a stage with its own thread and a bounded
+    queue. A stage takes the next item from its queue, runs the NI's update_event() with the item's value as input
+    and passes the values it sets on its outputs on to the queues of the next stages. So all stages work at the same
+    time on different values, and the throughput is limited by the slowest stage instead of the sum of all of them.
+
+    When a queue is full, ExecutionSettings.stream_backpressure decides what happens:
+        'drop oldest' - the oldest waiting item gets dropped (the stages always work on the newest values)
+        'drop newest' - the new item gets dropped
+        'block'       - the producer waits until there is space again (nothing gets lost, the source slows down)
+
+    Every value a source streams is a frame, numbered per source output. The values a stage sets while processing a
+    frame belong to that frame too. A NI with several inputs fed by the same source (like a join after two branches)
+    only gets updated once the values of one frame arrived on all of them, so it never combines values of different
+    frames. Frames older than a complete one get dropped, some stage on the way didn't pass them on.
+
+    Stages get created when the first value reaches them and stopped whenever connections change. Updates of a stage
+    NI from somewhere else (like a changed input widget) get queued in the stage too, so a NI never runs in two threads
+    at once. Everything the NIs do with widgets goes through GUIThread, like with ScriptExecutor."""
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.stages = {}  # {NI: Stage}
+        self.stopped_stages = {}  # {NI: Stage} whose threads might still be finishing their current item
+        self.lock = threading.Lock()
+        self.frame_numbers = {}  # {source output port: number of the last frame}
+        self.sources = {}  # {output port: set of the source output ports streaming to it}, see get_sources()
+
+        # STATS
+        self.streamed_vals = 0
+        self.start_time = None
+
+    def connections_changed(self):
+        self.stop()
+
+    def stream(self, output_port, val):
+        """Called from NodeInstance.stream_output_val(). Sets the output's value and passes it on to the stages
+        connected to the output."""
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+        self.streamed_vals += 1
+        with self.lock:
+            if output_port not in self.frame_numbers:  # a new source
+                self.frame_numbers[output_port] = 0
+                self.sources.clear()
+            self.frame_numbers[output_port] += 1
+            frame = (output_port, self.frame_numbers[output_port])
+        output_port.val = val
+        if output_port.gate is not None:  # headless ports don't have a gate
+            GUIThread.call(output_port.gate.show_val, str(val), wait=False)
+        self.pass_on(output_port, val, frame)
+
+    def pass_on(self, output_port, val, frame):
+        """frame is (source output port, frame number), or None for values set in updates not coming from a
+        stream."""
+        for cpi in output_port.connected_port_instances:
+            ni = cpi.parent_node_instance
+            if ni.is_active():  # see PortInstance.update(): active NIs only react on exec signals
+                continue
+            self.get_stage(ni).put_val(cpi.index, val, frame)
+
+    def get_stage(self, node_instance):
+        with self.lock:
+            stage = self.stages.get(node_instance)
+            if stage is not None:
+                return stage
+            old_stage = self.stopped_stages.pop(node_instance, None)
+        if old_stage is not None:
+            old_stage.join()  # so the NI doesn't run in two threads
+
+        with self.lock:
+            stage = self.stages.get(node_instance)
+            if stage is None:
+                stage = Stage(self, node_instance)
+                self.stages[node_instance] = stage
+                node_instance.stream_stage = stage
+                stage.start()
+            return stage
+
+    def get_sources(self, output_port):
+        """Returns the source output ports streaming to the output, through passive NIs. Has to be called with the
+        lock held."""
+        sources = self.sources.get(output_port)
+        if sources is not None:
+            return sources
+
+        self.sources[output_port] = set()  # against cycles
+        sources = set()
+        if output_port in self.frame_numbers:
+            sources.add(output_port)
+        ni = output_port.parent_node_instance
+        if not ni.is_active():
+            for i in ni.inputs:
+                if i.type_ == 'data':
+                    for cpi in i.connected_port_instances:
+                        sources.update(self.get_sources(cpi))
+        self.sources[output_port] = sources
+        return sources
+
+    def get_frame_inputs(self, node_instance, source):
+        """The indices of the NI's inputs the source streams to."""
+        with self.lock:
+            return [i.index for i in node_instance.inputs if i.type_ == 'data' and
+                    any(source in self.get_sources(cpi) for cpi in i.connected_port_instances)]
+
+    def wait(self):
+        """Blocks until all stages are idle. Used by the headless runner."""
+        while any(stage.busy() for stage in list(self.stages.values())):
+            time.sleep(0.001)
+
+    def stop(self):
+        with self.lock:
+            stages = list(self.stages.values())
+            self.stages = {}
+            self.sources.clear()
+            self.stopped_stages = {ni: stage for ni, stage in self.stopped_stages.items() if stage.thread.is_alive()}
+            for stage in stages:
+                self.stopped_stages[stage.node_instance] = stage
+        for stage in stages:
+            stage.node_instance.stream_stage = None
+            stage.stop()
+
+    def reset_stats(self):
+        self.streamed_vals = 0
+        self.start_time = None
+        for stage in list(self.stages.values()):
+            stage.reset_stats()
+
+    def get_stats_str(self):
+        duration = time.perf_counter() - self.start_time if self.start_time is not None else 0
+        s = 'streamed values: '+str(self.streamed_vals)
+        if duration > 0:
+            s += ' (%.1f/s)' % (self.streamed_vals/duration)
+        for stage in list(self.stages.values()):
+            s += '\n    '+stage.get_stats_str(duration)
+        return s
+
+
+class Stage:
+    def __init__(self, pipeline, node_instance):
+        self.pipeline = pipeline
+        self.node_instance = node_instance
+        self.queue = StageQueue()
+        self.thread = None
+        self.frame = None  # of the item being processed
+        self.frame_inputs = {}  # {source output port: indices of the inputs it streams to}
+        self.pending_frames = {}  # {frame: {input index: value}} waiting for the values of the other inputs
+        self.lock = threading.Lock()
+
+        # STATS
+        self.processed = 0
+        self.busy_time = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='stage '+self.node_instance.parent_node.title,
+                                       daemon=True)
+        self.thread.start()
+
+    def put(self, item):
+        self.queue.put(item)
+
+    def put_val(self, input_index, val, frame):
+        """Called from StreamingPipeline.pass_on(). Queues an item once the frame's values of all inputs the frame's
+        source streams to arrived."""
+        if frame is None:
+            self.put(StageItem({input_index: val}, input_index, None))
+            return
+
+        source, number = frame
+        frame_inputs = self.frame_inputs.get(source)
+        if frame_inputs is None:
+            frame_inputs = self.pipeline.get_frame_inputs(self.node_instance, source)
+            self.frame_inputs[source] = frame_inputs
+        if len(frame_inputs) <= 1:
+            self.put(StageItem({input_index: val}, input_index, frame))
+            return
+
+        with self.lock:
+            vals = self.pending_frames.setdefault(frame, {})
+            vals[input_index] = val
+            if len(vals) < len(frame_inputs):
+                return
+            for f in [f for f in self.pending_frames if f[0] is source and f[1] <= number]:
+                del self.pending_frames[f]
+        self.put(StageItem(vals, input_index, frame))
+
+    def submit_update(self, input_called):
+        """Called from NodeInstance.update() for updates that don't come from the stream."""
+        self.put(StageItem({}, input_called, None))
+
+    def run(self):
+        ni = self.node_instance
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            t = time.perf_counter()
+            ni.stream_input_vals = item.input_vals
+            self.frame = item.frame
+            try:
+                ni.run_update_event(item.input_called)
+            finally:
+                ni.stream_input_vals = None
+                self.frame = None
+                self.queue.task_done()
+            self.busy_time += time.perf_counter() - t
+            self.processed += 1
+
+    def output_updated(self, output_port):
+        """Called from PortInstance.updated_val() when the NI set an output value."""
+        self.pipeline.pass_on(output_port, output_port.val, self.frame)
+
+    def busy(self):
+        return self.queue.unfinished > 0
+
+    def stop(self):
+        self.queue.close()
+        Debugger.debug('stopped stage', self.node_instance.parent_node.title)
+
+    def join(self):
+        """Waits until the thread finished the item it was processing when the stage got stopped."""
+        if self.thread is threading.current_thread():
+            return
+        while self.thread.is_alive():
+            if GUIThread.invoker is not None and GUIThread.is_current():
+                GUIThread.process_pending_calls()  # the thread might be waiting for the GUI thread
+            self.thread.join(0.005)
+
+    def reset_stats(self):
+        self.processed = 0
+        self.busy_time = 0
+        self.queue.dropped = 0
+
+    def get_stats_str(self, duration):
+        s = self.node_instance.parent_node.title+': processed '+str(self.processed) + \
+            ', dropped '+str(self.queue.dropped)
+        if self.processed > 0:
+            s += ', %.1f ms per item' % (self.busy_time/self.processed*1000)
+        if duration > 0:
+            s += ', busy %d%%' % (self.busy_time/duration*100)
+        return s
+
+
+class StageItem:
+    __slots__ = ('input_vals', 'input_called', 'frame')
+
+    def __init__(self, input_vals, input_called, frame):
+        self.input_vals = input_vals  # {input index: value}, see NodeInstance.input()
+        self.input_called = input_called
+        self.frame = frame  # see StreamingPipeline.pass_on()
+
+
+class StageQueue:
+    """Bounded queue applying ExecutionSettings.stream_backpressure when it's full."""
+
+    def __init__(self):
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.unfinished = 0  # items put but not processed completely yet
+        self.dropped = 0
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) >= ExecutionSettings.stream_queue_size:
+                policy = ExecutionSettings.stream_backpressure
+                if policy == 'drop newest':
+                    self.dropped += 1
+                    return
+                elif policy == 'drop oldest':
+                    self.items.popleft()
+                    self.unfinished -= 1
+                    self.dropped += 1
+                else:  # block
+                    self.wait_for_space()
+                    if self.closed:
+                        return
+            self.items.append(item)
+            self.unfinished += 1
+            self.condition.notify_all()
+
+    def wait_for_space(self):
+        while len(self.items) >= ExecutionSettings.stream_queue_size and not self.closed:
+            if GUIThread.invoker is not None and GUIThread.is_current():
+                # the stages might need the GUI thread (for widgets) while it's blocked here
+                self.condition.wait(0.005)
+                self.condition.release()
+                try:
+                    GUIThread.process_pending_calls()
+                finally:
+                    self.condition.acquire()
+            else:
+                self.condition.wait()
+
+    def get(self):
+        """Returns the next item or None when the queue got closed."""
+        with self.condition:
+            while len(self.items) == 0 and not self.closed:
+                self.condition.wait()
+            if self.closed:
+                return None
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def task_done(self):
+        with self.condition:
+            self.unfinished -= 1
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.unfinished -= len(self.items)
+            self.items.clear()
+            self.condition.notify_all()
@@ -0,0 +1,271 @@
+from custom_src.FlowCompiler import FlowCodeGenerator, VariablesAccess, CompileError, FLUSH, RELOAD
+from custom_src.Node import SubFlow_Node
+from custom_src.global_tools.Debugger import Debugger
+from custom_src.headless.HeadlessFlow import HeadlessFlow
+
+
+class SubFlowDefinition:
+    """A reusable cluster of nodes, placed as one node of the package 'sub flows' (see SubFlow_Node and
+    SubFlow_NodeInstance). A selection of NIs gets collapsed into a sub flow with Flow.collapse_node_instances__cmd().
+
+    The definition is stored once in the project under 'sub flows':
+        {'name': ..., 'description': ...,
+         'nodes': [...], 'connections': [...],  - the inner NIs, same format as a flow's
+         'inputs': [{'type': ..., 'label': ..., 'targets': [[inner NI index, input index], ...]}, ...],
+         'outputs': [{'type': ..., 'label': ..., 'source': [inner NI index, output index]}, ...]}
+    The sub flow NIs only store the values of their own ports. All of them get executed by the same SubFlowPlan,
+    which gets built when the first one runs.
+    A sub flow NI reads its data inputs once when it gets updated and sets its data outputs when it's done (or before
+    it executes an exec output), so values going out of it and back in within one execution don't get updated."""
+
+    def __init__(self, owner, config):
+        self.owner = owner  # the MainWindow or HeadlessRunner, provides the nodes for the inner NIs
+        self.config = config
+        self.name = config['name']
+        self.node = SubFlow_Node(self)
+        self.plan = None
+        self.plan_error = None  # message if the plan can't be built
+
+    def get_plan(self, script):
+        """Builds the plan the first time it's needed. Raises a CompileError if that isn't possible."""
+        if self.plan is None:
+            if self.plan_error is not None:
+                raise CompileError(self.plan_error)
+            try:
+                self.plan = SubFlowPlan(self, script)
+            except (CompileError, LookupError, SyntaxError, RecursionError, MemoryError) as e:
+                self.plan_error = str(e)
+                raise CompileError(self.plan_error)
+        return self.plan
+
+    def run(self, node_instance, input_called):
+        """Called from SubFlow_NodeInstance.update_event()."""
+        if self.plan_error is not None:
+            return
+        try:
+            plan = self.get_plan(node_instance.flow.parent_script)
+        except CompileError as e:
+            node_instance.log_message('sub flow \''+self.name+'\' can\'t be executed: '+str(e), 'error')
+            return
+        plan.run(node_instance, input_called)
+
+    def get_json_data(self):
+        return self.config
+
+
+class SubFlowPlan:
+    """The precompiled evaluation plan of a sub flow, shared by all its NIs. The inner NIs get created once, in a
+    HeadlessFlow, and the FlowCodeGenerator turns them into functions (see SubFlowCodeGenerator):
+        evaluate(node_instance, <data inputs>)  - returns the values of the data outputs
+        exec_<index>(node_instance, <data inputs>)  - does what happens when the exec input gets triggered
+    So, like with compiled exec chains, the logic of the std, math and variable nodes is inlined, all other inner NIs
+    get called. Their state (and the values of their ports) is shared by all sub flow NIs. The variables are the ones
+    of the sub flow NI's script."""
+
+    def __init__(self, definition, script):
+        self.definition = definition
+        config = definition.config
+        self.inner_flow = HeadlessFlow(definition.owner, script, {'nodes': config['nodes'],
+                                                                  'connections': config['connections']})
+        self.variables_access = VariablesAccess(self.inner_flow)
+        node_instances = self.inner_flow.all_node_instances
+
+        self.data_inputs = [i for i in range(len(config['inputs'])) if config['inputs'][i]['type'] == 'data']
+        self.data_outputs = [i for i in range(len(config['outputs'])) if config['outputs'][i]['type'] == 'data']
+        self.arguments = {}  # {inner NI: {input index: index of the sub flow NI's input}}
+        for index in self.data_inputs:
+            for ni_index, input_index in config['inputs'][index]['targets']:
+                self.arguments.setdefault(node_instances[ni_index], {})[input_index] = index
+
+        generator = SubFlowCodeGenerator(self.inner_flow, config)
+        arguments = ['node_instance']+['i'+str(i) for i in self.data_inputs]
+        source = generator.generate_evaluate_function('evaluate', arguments)
+        for index in range(len(config['inputs'])):
+            if config['inputs'][index]['type'] == 'exec':
+                targets = [node_instances[ni_index].inputs[input_index]
+                           for ni_index, input_index in config['inputs'][index]['targets']]
+                source += generator.generate_exec_function('exec_'+str(index), arguments, targets)
+        generator.check_exits()
+
+        namespace = generator.get_namespace(self.variables_access)
+        namespace['set_outputs'] = self.set_outputs
+        namespace['update_node_instance'] = update_node_instance
+        exec(compile(generator.get_helpers_source()+source, '<sub flow '+definition.name+'>', 'exec'), namespace)
+        self.source = source
+        self.evaluate = namespace['evaluate']
+        self.exec_functions = {index: namespace['exec_'+str(index)] for index in range(len(config['inputs']))
+                               if config['inputs'][index]['type'] == 'exec'}
+        Debugger.debug('built plan of sub flow', definition.name)
+
+    def run(self, node_instance, input_called):
+        self.inner_flow.parent_script = node_instance.flow.parent_script
+        vals = [node_instance.input(i) for i in self.data_inputs]
+
+        # inner NIs which get called (and what they trigger) read the values of the sub flow NI's inputs
+        vals_dict = dict(zip(self.data_inputs, vals))
+        stream_input_vals = []
+        for ni, indices in self.arguments.items():
+            stream_input_vals.append((ni, ni.stream_input_vals))
+            ni.stream_input_vals = {input_index: vals_dict[index] for input_index, index in indices.items()}
+        try:
+            function = self.exec_functions.get(input_called)
+            if function is not None:
+                function(node_instance, *vals)
+            else:
+                self.set_outputs(node_instance, self.evaluate(node_instance, *vals))
+        finally:
+            for ni, input_vals in stream_input_vals:
+                ni.stream_input_vals = input_vals
+
+    def set_outputs(self, node_instance, vals):
+        for index, val in zip(self.data_outputs, vals):
+            node_instance.set_output_val(index, val)
+
+
+class SubFlowCodeGenerator(FlowCodeGenerator):
+    """Generates the functions of a SubFlowPlan. The inner inputs fed from outside are arguments, the inner exec
+    outputs leading outside execute the sub flow NI's exec outputs. Those have to be reached by inlined NIs, exec
+    signals sent by called NIs stay inside the sub flow."""
+
+    def __init__(self, flow, config):
+        super(SubFlowCodeGenerator, self).__init__(flow)
+        node_instances = flow.all_node_instances
+        self.arguments = {}  # {(inner NI, input index): argument name}
+        self.exits = {}  # {inner exec output: index of the sub flow NI's exec output}
+        self.reached_exits = set()
+        self.data_output_sources = []  # the inner outputs of the sub flow NI's data outputs
+
+        for index in range(len(config['inputs'])):
+            if config['inputs'][index]['type'] == 'data':
+                for ni_index, input_index in config['inputs'][index]['targets']:
+                    self.arguments[(node_instances[ni_index], input_index)] = 'i'+str(index)
+        for index in range(len(config['outputs'])):
+            ni_index, output_index = config['outputs'][index]['source']
+            port = node_instances[ni_index].outputs[output_index]
+            if config['outputs'][index]['type'] == 'exec':
+                self.exits[port] = index
+            else:
+                self.data_output_sources.append(port)
+
+    def generate_evaluate_function(self, function_name, arguments):
+        self.begin_function()
+        self.line('return '+self.data_outputs())
+        return self.end_function(function_name, arguments)
+
+    def generate_exec_function(self, function_name, arguments, inputs):
+        self.begin_function()
+        self.inline_exec_inputs(inputs)
+        self.statement('set_outputs(node_instance, '+self.data_outputs()+')')
+        return self.end_function(function_name, arguments)
+
+    def check_exits(self):
+        for port, index in self.exits.items():
+            if port not in self.reached_exits:
+                raise CompileError('the exec output '+str(index)+' is only reached through nodes which can\'t be '
+                                   'inlined, like \''+port.parent_node_instance.parent_node.title+'\'')
+
+    def data_outputs(self):
+        """Returns an expression of the tuple of the sub flow NI's data output values."""
+        vals = []
+        for port in self.data_output_sources:
+            ni = port.parent_node_instance
+            vals.append(self.output_local(port) if ni.is_active() else self.data_value(ni)[port.index])
+        return '('+''.join(val+', ' for val in vals)+')'
+
+    def input(self, ni, index):
+        argument = self.arguments.get((ni, index))
+        if argument is not None:
+            return argument
+        return super(SubFlowCodeGenerator, self).input(ni, index)
+
+    def exec_output_targets(self, output_port):
+        index = self.exits.get(output_port)
+        if index is None:
+            return output_port.connected_port_instances
+        self.reached_exits.add(output_port)
+        return list(output_port.connected_port_instances)+[SubFlowExit(index)]
+
+    def inline_node_instance(self, ni, input_index):
+        if ni is not None:
+            return super(SubFlowCodeGenerator, self).inline_node_instance(ni, input_index)
+
+        # a SubFlowExit: set the data outputs and execute the sub flow NI's exec output
+        self.line(FLUSH)
+        self.statement('set_outputs(node_instance, '+self.data_outputs()+')')
+        self.statement('node_instance.exec_output('+str(input_index)+')')
+        self.line(RELOAD)
+        return []
+
+    def update_node_instance(self, ni, input_index):
+        """The inner data NIs don't get updated when the arguments change, so a called NI gets the values of all its
+        data inputs."""
+        input_vals = ', '.join(str(i)+': '+self.input(ni, i) for i in range(len(ni.inputs))
+                               if ni.inputs[i].type_ == 'data')
+        return 'update_node_instance('+self.node_instance_name(ni)+', '+str(input_index)+', {'+input_vals+'})'
+
+
+class SubFlowExit:
+    """Stands in for an exec input connected to an inner exec output leading outside the sub flow."""
+
+    def __init__(self, index):
+        self.parent_node_instance = None
+        self.index = index
+
+
+def update_node_instance(ni, input_index, input_vals):
+    """Runs an active inner NI which can't be inlined with the given input values."""
+    stream_input_vals = ni.stream_input_vals
+    ni.stream_input_vals = input_vals
+    try:
+        ni.run_update_event(input_index)
+    finally:
+        ni.stream_input_vals = stream_input_vals
+
+
+def get_sub_flow_config(flow, name, node_instances):
+    """Creates the definition config of a sub flow made of the given NIs (see SubFlowDefinition). Returns it together
+    with the connections the sub flow NI replacing the NIs needs: [(outer output, input index), ...] and
+    [(output index, outer input), ...]."""
+    indices = {ni: i for i, ni in enumerate(node_instances)}
+    inputs = []
+    outputs = []
+    input_connections = []
+    output_connections = []
+    data_inputs = {}  # {outer output: index of the sub flow input}, an output feeding multiple inner NIs is one input
+
+    for ni in node_instances:
+        for inp in ni.inputs:
+            outer_ports = [cpi for cpi in inp.connected_port_instances if cpi.parent_node_instance not in indices]
+            if len(outer_ports) == 0:
+                continue
+            target = [indices[ni], inp.index]
+            if inp.type_ == 'data':
+                index = data_inputs.get(outer_ports[0])
+                if index is not None:
+                    inputs[index]['targets'].append(target)
+                    continue
+                data_inputs[outer_ports[0]] = len(inputs)
+            input_connections += [(cpi, len(inputs)) for cpi in outer_ports]
+            inputs.append({'type': inp.type_,
+                           'label': inp.label_str if inp.label_str != '' or inp.type_ == 'exec' else
+                                    ni.parent_node.title,
+                           'targets': [target]})
+
+        for out in ni.outputs:
+            outer_ports = [cpi for cpi in out.connected_port_instances if cpi.parent_node_instance not in indices]
+            if len(outer_ports) == 0:
+                continue
+            output_connections += [(len(outputs), cpi) for cpi in outer_ports]
+            outputs.append({'type': out.type_,
+                            'label': out.label_str if out.label_str != '' or out.type_ == 'exec' else
+                                     ni.parent_node.title,
+                            'source': [indices[ni], out.index]})
+
+    config = {'name': name,
+              'description': 'sub flow of '+str(len(node_instances))+' nodes',
+              'nodes': flow.get_node_instances_json_data(node_instances),
+              'connections': [c for c in flow.get_connections_json_data(node_instances)
+                              if c['connected node instance'] is not None],
+              'inputs': inputs,
+              'outputs': outputs}
+    return config, input_connections, output_connections
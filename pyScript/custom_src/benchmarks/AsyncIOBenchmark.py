@@ -0,0 +1,121 @@
+import asyncio
+import socketserver
+import threading
+import time
+
+from custom_src.AsyncLoop import AsyncLoop
+from custom_src.Node import Node, NodePort
+from custom_src.NodeInstance import NodeInstance
+from custom_src.headless.HeadlessRunner import HeadlessRunner
+from custom_src.headless.HeadlessScript import HeadlessScript
+
+
+class AsyncIOBenchmark:
+    """Measures how long count async NIs (see AsyncLoop) take when they all wait for a slow server at the same time,
+    like the Gmail nodes waiting for the IMAP server. A local StandInServer takes the place of the real one, it
+    answers every request after delay seconds. If the NIs wait concurrently, all of them are done after about one
+    delay instead of count delays. Usage:
+    python pyScript.py benchmark --async-io 20"""
+
+    def __init__(self, count, delay=0.3):
+        self.count = count
+        self.delay = delay
+
+    def run(self):
+        server = StandInServer(self.delay)
+        try:
+            runner = HeadlessRunner()
+            node = create_request_node()
+            runner.all_nodes.append(node)
+            runner.all_node_instance_classes[node] = Request_NodeInstance
+            script = HeadlessScript(runner, {'name': 'async io', 'variables': {},
+                                             'flow': {'nodes': [], 'connections': []}})
+            node_instances = []
+            for i in range(self.count):
+                ni = script.flow.create_node_instance(node, None)
+                ni.port = server.port
+                node_instances.append(ni)
+
+            t = time.perf_counter()
+            for ni in node_instances:
+                ni.update(0)
+            AsyncLoop.wait()
+            duration = time.perf_counter()-t
+        finally:
+            server.stop()
+
+        answered = len([ni for ni in node_instances if ni.outputs[1].val == StandInServer.answer])
+        result = {'shape': 'async-io',
+                  'size': self.count,
+                  'requests': self.count,
+                  'answered requests': answered,
+                  'ms': duration*1000,
+                  'sequential ms': self.count*self.delay*1000}
+        if answered != self.count:
+            result['error'] = str(self.count-answered)+' requests didn\'t get answered'
+        return result
+
+
+class StandInServer:
+    """A local TCP server answering every line it receives with StandInServer.answer after delay seconds. It serves
+    every connection in its own thread, so it can answer many requests at the same time."""
+
+    answer = 'ok'
+
+    def __init__(self, delay):
+        delay_ = delay
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.rfile.readline()
+                time.sleep(delay_)
+                self.wfile.write((StandInServer.answer+'\n').encode())
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    request_queue_size = 128  # all NIs connect at once, the default backlog of 5 would make most of them retry
+
+
+def create_request_node():
+    node = Node()
+    node.title = 'request'
+    node.package = 'benchmarks'
+    exec_input = NodePort()
+    exec_input.type_ = 'exec'
+    exec_input.widget_type = 'None'
+    node.inputs.append(exec_input)
+    for type_ in ('exec', 'data'):
+        output = NodePort()
+        output.type_ = type_
+        node.outputs.append(output)
+    return node
+
+
+class Request_NodeInstance(NodeInstance):
+    """Sends a line to the stand-in server and sets the answer as its data output, awaiting the connection, like
+    the Gmail nodes do with the IMAP server."""
+
+    def __init__(self, parent_node, flow, configuration=None):
+        super(Request_NodeInstance, self).__init__(parent_node, flow, configuration)
+        self.port = None
+        self.initialized()
+
+    async def update_event(self, input_called=-1):
+        if input_called == 0:
+            reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+            writer.write(b'request\n')
+            await writer.drain()
+            answer = await reader.readline()
+            writer.close()
+            self.set_output_val(1, answer.decode().strip())
+            self.exec_output(0)
@@ -0,0 +1,325 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from custom_src.Execution import ExecutionSettings
+from custom_src.ProcessPool import ProcessPool
+from custom_src.benchmarks.AsyncIOBenchmark import AsyncIOBenchmark
+from custom_src.benchmarks.FlowGenerators import FlowGenerator, SHAPES
+from custom_src.headless.HeadlessRunner import HeadlessRunner, get_peak_memory_kb, \
+    add_execution_settings_arguments, apply_execution_settings
+
+
+class BenchmarkRunner:
+    """Measures how pyScript performs on synthetic flows (see FlowGenerator) of different shapes and sizes. Usage:
+    python pyScript.py benchmark --out results.json
+    python pyScript.py benchmark --compare old.json new.json
+    python pyScript.py benchmark --async-io 20  (see AsyncIOBenchmark)
+
+    For every case (shape and size) it measures:
+        headless load     - building the script with HeadlessRunner
+        headless exec     - updating the flow's source node, per trigger
+        load              - MainWindow.parse_project() of the project, including building the script's flow
+        save              - Script.get_json_data()
+        exec              - updating the flow's source node in the editor, per trigger
+        paint foreground  - Flow.drawForeground() of the whole scene (all connections)
+        paint nodes       - NodeInstance.paint() of all NIs
+        peak memory       - peak RSS of the process
+    The editor measurements use the offscreen Qt platform, nothing gets shown. Every case runs in its own process by
+    default, so the peak memory is the one of the case and cases don't influence each other. Measurements that fail
+    get recorded as errors.
+
+    Some shapes can't run beyond a certain size with the default execution: every node of a chain or an exec chain
+    nests a few calls (so long ones exceed the recursion limit) and every diamond doubles the updates of everything
+    after it. Those cases run with the setting that makes them work (see get_required_setting()), which gets printed
+    and recorded as 'required setting' in their results.
+
+    Results get saved as JSON together with the execution settings and the git commit, so the results of two commits
+    can be compared."""
+
+    exec_min_time = 0.5  # seconds; the source gets triggered repeatedly until this time has passed ...
+    exec_max_triggers = 1000  # ... or that many triggers have been done
+    frames_per_hop = 8  # nested Python calls per node of a chain without glitch-free push / trampolined exec
+    max_diamonds = 10  # diamonds in a row without glitch-free push, the last join gets updated 2^max_diamonds times
+
+    def __init__(self, gui=True):
+        self.gui = gui
+        self.generator = FlowGenerator()
+        self.app = None
+        self.main_window = None
+
+    def run_case(self, shape, size):
+        project, source_index = self.generator.generate(shape, size)
+        flow_config = project['scripts'][0]['flow']
+        result = {'shape': shape,
+                  'size': size,
+                  'nodes': len(flow_config['nodes']),
+                  'connections': len(flow_config['connections'])}
+
+        required_setting = self.get_required_setting(shape, size)
+        if required_setting is not None:
+            setattr(ExecutionSettings, required_setting[0], True)
+            result['required setting'] = required_setting[1]
+        try:
+            self.measure_headless(project, source_index, result)
+            if self.gui:
+                self.measure_gui(project, source_index, result)
+        finally:
+            if required_setting is not None:
+                setattr(ExecutionSettings, required_setting[0], False)
+
+        result['peak memory kb'] = get_peak_memory_kb()
+        return result
+
+    def get_required_setting(self, shape, size):
+        """Returns (ExecutionSettings attribute, name) of the setting the case can't run without, or None if it runs
+        with the current settings."""
+        if shape == 'chain' or shape == 'diamonds':
+            if ExecutionSettings.glitch_free_push:
+                return None
+            if shape == 'chain' and size*BenchmarkRunner.frames_per_hop < sys.getrecursionlimit() or \
+                    shape == 'diamonds' and (size-1)//3 <= BenchmarkRunner.max_diamonds:
+                return None
+            return 'glitch_free_push', 'glitch-free push'
+        if shape == 'exec-chain':
+            if ExecutionSettings.trampolined_exec or size*BenchmarkRunner.frames_per_hop < sys.getrecursionlimit():
+                return None
+            return 'trampolined_exec', 'trampolined exec'
+        return None
+
+    def measure_headless(self, project, source_index, result):
+        runner = HeadlessRunner()
+        runner.project = project
+        t = time.perf_counter()
+        script = runner.create_script(None, self.generator.get_package_files())
+        result['headless load ms'] = (time.perf_counter()-t)*1000
+
+        self.measure_exec(result, 'headless exec', lambda: runner.trigger(script, source_index),
+                          runner.wait_for_pending_work, script.flow)
+
+    def measure_gui(self, project, source_index, result):
+        self.setup_gui()
+
+        t = time.perf_counter()
+        self.main_window.parse_project(project)
+        script = self.main_window.scripts[-1]
+        script.build_flow()  # in case its tab isn't the current one
+        result['load ms'] = (time.perf_counter()-t)*1000
+        flow = script.flow
+
+        t = time.perf_counter()
+        script.get_json_data()
+        result['save ms'] = (time.perf_counter()-t)*1000
+
+        ni = flow.all_node_instances[source_index]
+        self.measure_exec(result, 'exec', lambda: ni.update(), flow.streaming_pipeline.wait, flow)
+        self.measure_paint(flow, result)
+
+        self.main_window.delete_script(script)
+
+    def measure_exec(self, result, name, trigger, wait, flow):
+        """The generated flows end with the sink NI, so if its last output didn't get set, the flow didn't run
+        completely - exceptions in update_event()s (like a RecursionError) don't get through to here.
+        The sources' inputs never change, so the pure NIs' memos get cleared before each trigger, otherwise nothing
+        would run after the first one (see PureMemo)."""
+        sink = flow.all_node_instances[-1]
+        triggers = 0
+        t = time.perf_counter()
+        try:
+            while triggers < BenchmarkRunner.exec_max_triggers:
+                sink.outputs[-1].val = None
+                flow.pure_memo.clear()
+                trigger()
+                wait()
+                if sink.outputs[-1].val is None:
+                    raise RuntimeError('the flow didn\'t run completely')
+                triggers += 1
+                if time.perf_counter()-t >= BenchmarkRunner.exec_min_time:
+                    break
+        except Exception as e:
+            result[name+' error'] = type(e).__name__+': '+str(e)
+            return
+        duration = time.perf_counter()-t
+        result[name+' ms per trigger'] = duration/triggers*1000
+        result[name+' triggers'] = triggers
+
+    def measure_paint(self, flow, result):
+        from PySide2.QtCore import QRectF
+        from PySide2.QtGui import QImage, QPainter
+        from PySide2.QtWidgets import QStyleOptionGraphicsItem
+
+        image = QImage(1920, 1080, QImage.Format_ARGB32_Premultiplied)
+        painter = QPainter(image)
+        scene_rect = QRectF(flow.sceneRect())
+
+        t = time.perf_counter()
+        flow.drawForeground(painter, scene_rect)
+        result['paint foreground ms'] = (time.perf_counter()-t)*1000
+
+        option = QStyleOptionGraphicsItem()
+        t = time.perf_counter()
+        for ni in flow.all_node_instances:
+            painter.save()
+            painter.translate(ni.pos())
+            ni.paint(painter, option)
+            painter.restore()
+        result['paint nodes ms'] = (time.perf_counter()-t)*1000
+
+        painter.end()
+
+    def setup_gui(self):
+        if self.main_window is not None:
+            return
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PySide2.QtWidgets import QApplication
+        self.app = QApplication.instance() or QApplication(sys.argv[:1])
+        from custom_src.MainWindow import MainWindow
+        self.main_window = MainWindow({'config': 'open project',
+                                       'required packages': self.generator.get_package_files(),
+                                       'content': {'general info': {'type': 'pyScriptFP project file'},
+                                                   'scripts': []}})
+
+
+def get_general_info(args):
+    commit = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return {'type': 'pyScript benchmark results',
+            'commit': commit,
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'settings': {'memoized pull': args.memoized_pull,
+                         'glitch-free push': args.glitch_free_push,
+                         'trampolined exec': args.trampolined_exec,
+                         'pure memo': args.pure_memo,
+                         'eval input expressions': args.eval_input_expressions,
+                         'compiled exec': args.compiled_exec,
+                         'parallel fan-out': args.parallel_fan_out,
+                         'streaming pipelines': args.streaming_pipelines,
+                         'backpressure': args.backpressure,
+                         'gui': not args.no_gui}}
+
+
+def run_case_in_process(argv, shape, size):
+    """Runs the case in a new process (with the same options) and returns its result."""
+    f, file_path = tempfile.mkstemp(suffix='.json')
+    os.close(f)
+    try:
+        subprocess.run([sys.executable, sys.argv[0], 'benchmark']+argv+['--single', shape, str(size),
+                                                                         '--out', file_path], check=True)
+        f = open(file_path)
+        result = json.load(f)
+        f.close()
+        return result
+    except subprocess.CalledProcessError as e:
+        return {'shape': shape, 'size': size, 'error': 'benchmark process failed with exit code '+str(e.returncode)}
+    finally:
+        os.remove(file_path)
+
+
+def compare(old_file_path, new_file_path):
+    """Prints all measurements of two results files side by side."""
+    f = open(old_file_path)
+    old = json.load(f)
+    f.close()
+    f = open(new_file_path)
+    new = json.load(f)
+    f.close()
+
+    print('old:', old['general info']['commit'], old['general info']['date'], old['general info']['settings'])
+    print('new:', new['general info']['commit'], new['general info']['date'], new['general info']['settings'])
+    for case, new_result in new['results'].items():
+        old_result = old['results'].get(case)
+        print('\n'+case)
+        if old_result is None:
+            print('    (not in old results)')
+            continue
+        keys = list(new_result.keys())+[k for k in old_result.keys() if k not in new_result]
+        for key in keys:
+            if key in ('shape', 'size', 'nodes', 'connections') or key.endswith(' triggers'):
+                continue
+            old_val = old_result.get(key)
+            new_val = new_result.get(key)
+            if isinstance(new_val, (int, float)) and isinstance(old_val, (int, float)):
+                change = (new_val-old_val)/old_val*100 if old_val != 0 else 0
+                print('    %-28s %12.2f %12.2f %+8.1f%%' % (key, old_val, new_val, change))
+            else:
+                print('    %-28s %12s %12s' % (key, format_val(old_val), format_val(new_val)))
+
+
+def format_val(val):
+    if isinstance(val, (int, float)):
+        return '%.2f' % val
+    return str(val)[:12]
+
+
+def run_from_command_line(args):
+    parser = argparse.ArgumentParser(prog='pyScript.py benchmark',
+                                     description='Measures pyScript\'s performance on synthetic flows.')
+    parser.add_argument('--shapes', nargs='*', choices=list(SHAPES.keys()), default=list(SHAPES.keys()),
+                        help='flow shapes to generate (default: all)')
+    parser.add_argument('--sizes', nargs='*', type=int, default=[1000, 10000], metavar='NODES',
+                        help='numbers of nodes of the generated flows, like 1000 to 50000 (default: 1000 10000)')
+    parser.add_argument('--out', default='benchmark_results.json', metavar='FILE',
+                        help='where to save the results (default: benchmark_results.json)')
+    parser.add_argument('--no-gui', action='store_true', help='only measure headless execution')
+    parser.add_argument('--in-process', action='store_true',
+                        help='run all cases in this process (the peak memory is the one of all cases so far then)')
+    parser.add_argument('--compare', nargs=2, default=None, metavar=('OLD', 'NEW'),
+                        help='compare two results files instead of running the benchmarks')
+    parser.add_argument('--async-io', type=int, default=None, metavar='NODES',
+                        help='instead of the flow shapes, measure that many async NIs waiting for a local stand-in '
+                             'server at the same time')
+    parser.add_argument('--single', nargs=2, default=None, metavar=('SHAPE', 'SIZE'), help=argparse.SUPPRESS)
+    add_execution_settings_arguments(parser)
+    argv = args
+    args = parser.parse_args(args)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    apply_execution_settings(args)
+    benchmark_runner = BenchmarkRunner(gui=not args.no_gui)
+
+    if args.single:  # running a case for run_case_in_process()
+        result = benchmark_runner.run_case(args.single[0], int(args.single[1]))
+        f = open(args.out, 'w')
+        json.dump(result, f)
+        f.close()
+        ProcessPool.shutdown()
+        return 0
+
+    results = {}
+    if args.async_io is not None:
+        cases = [('async-io', args.async_io)]
+    else:
+        cases = [(shape, size) for shape in args.shapes for size in args.sizes]
+    for shape, size in cases:
+        print('running', shape, size, '...', file=sys.stderr)
+        if shape == 'async-io':
+            result = AsyncIOBenchmark(size).run()
+        elif args.in_process:
+            result = benchmark_runner.run_case(shape, size)
+        else:
+            result = run_case_in_process(argv, shape, size)
+        results[shape+' '+str(size)] = result
+        print('   ', ', '.join(k+': '+('%.2f' % v if isinstance(v, float) else str(v))
+                               for k, v in result.items() if k not in ('shape', 'size')), file=sys.stderr)
+
+    ProcessPool.shutdown()
+
+    f = open(args.out, 'w')
+    json.dump({'general info': get_general_info(args), 'results': results}, f, indent=4)
+    f.close()
+    print('results saved to', args.out, file=sys.stderr)
+    return 0
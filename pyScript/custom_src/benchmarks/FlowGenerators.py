@@ -0,0 +1,141 @@
+import json
+import math
+
+
+class FlowGenerator:
+    """Builds synthetic pyScript projects (the same dicts as in *.pypro files) out of nodes of the std and math
+    packages, for the benchmarks. The node configs get created from the nodes' definitions in the package files, so
+    they look exactly like the ones the editor saves.
+
+    Every generator returns a project and the index of the node that gets updated to run it (see
+    BenchmarkRunner)."""
+
+    state_data = {'+': {'num inputs': 2}}  # NIs whose set_data() expects something
+
+    def __init__(self, packages_dir='../packages'):
+        self.packages_dir = packages_dir
+        self.node_definitions = {}  # {(package, title): node dict of the package file}
+        for package in ('std', 'math'):
+            f = open(self.get_package_file(package))
+            package_config = json.loads(f.read())
+            f.close()
+            for n in package_config['nodes']:
+                self.node_definitions[(package, n['title'])] = n
+
+    def get_package_file(self, package):
+        return self.packages_dir+'/'+package+'/'+package+'.pypac'
+
+    def get_package_files(self):
+        return [self.get_package_file(p) for p in ('std', 'math')]
+
+    def node(self, package, title, pos, widget_data=None):
+        """Returns the config of a node instance of the given node as the editor would save it. widget_data is a
+        list of values for the input widgets."""
+        definition = self.node_definitions[(package, title)]
+        inputs = []
+        for i in range(len(definition['inputs'])):
+            inp = definition['inputs'][i]
+            input_config = {'label': inp['label'], 'type': inp['type'], 'has widget': inp.get('has widget', False)}
+            if input_config['has widget']:
+                input_config['widget type'] = inp['widget type']
+                input_config['widget name'] = inp.get('widget name', '')
+                input_config['widget data'] = widget_data[i] if widget_data is not None else ''
+                input_config['widget position'] = inp['widget position']
+            inputs.append(input_config)
+
+        node_config = {'parent node title': title,
+                       'parent node type': definition['type'],
+                       'parent node package': package,
+                       'parent node description': definition['description'],
+                       'position x': pos[0],
+                       'position y': pos[1]}
+        if definition['has main widget']:
+            node_config['main widget data'] = {}
+        node_config['state data'] = FlowGenerator.state_data.get(title, {})
+        node_config['special actions'] = {}
+        node_config['inputs'] = inputs
+        node_config['outputs'] = [{'label': o['label'], 'type': o['type']} for o in definition['outputs']]
+        return node_config
+
+    def connection(self, parent_index, output_index, child_index, input_index):
+        return {'parent node instance index': parent_index,
+                'output port index': output_index,
+                'connected node instance': child_index,
+                'connected input port index': input_index}
+
+    def project(self, name, nodes, connections, variables=None):
+        return {'general info': {'type': 'pyScriptFP project file'},
+                'scripts': [{'name': name,
+                             'variables': variables or {},
+                             'flow': {'nodes': nodes, 'connections': connections, 'drawings': []}}]}
+
+    #   SHAPES
+
+    def chain(self, size):
+        """A '+' node feeding a chain of sin nodes, size nodes in total. Updating the '+' pushes a value through the
+        whole chain."""
+        nodes = [self.node('std', '+', grid_pos(0, size), ['0.5', '0.5'])]
+        connections = []
+        for i in range(1, size):
+            nodes.append(self.node('math', 'sin', grid_pos(i, size)))
+            connections.append(self.connection(i-1, 0, i, 0))
+        return self.project('chain '+str(size), nodes, connections), 0
+
+    def fan_out(self, size, width=None):
+        """A tree of sin nodes with a '+' node as root, where every node feeds width others. The default width makes
+        the root feed all the other nodes (the widest possible fan-out)."""
+        if width is None:
+            width = max(size-1, 1)
+        nodes = [self.node('std', '+', grid_pos(0, size), ['0.5', '0.5'])]
+        connections = []
+        for i in range(1, size):
+            nodes.append(self.node('math', 'sin', grid_pos(i, size)))
+            connections.append(self.connection((i-1) // width, 0, i, 0))
+        return self.project('fan-out '+str(size), nodes, connections), 0
+
+    def diamonds(self, size):
+        """A '+' node feeding a chain of diamonds: a sin and a cos node joined by a '+' node, which feeds the next
+        diamond. Without glitch-free push the joins get updated once per branch, so the number of updates doubles with
+        every diamond (see BenchmarkRunner.get_required_setting())."""
+        nodes = [self.node('std', '+', grid_pos(0, size), ['0.5', '0.5'])]
+        connections = []
+        source = 0
+        while len(nodes)+3 <= size:
+            index = len(nodes)
+            nodes.append(self.node('math', 'sin', grid_pos(index, size)))
+            nodes.append(self.node('math', 'cos', grid_pos(index+1, size)))
+            nodes.append(self.node('std', '+', grid_pos(index+2, size)))
+            connections.append(self.connection(source, 0, index, 0))
+            connections.append(self.connection(source, 0, index+1, 0))
+            connections.append(self.connection(index, 0, index+2, 0))
+            connections.append(self.connection(index+1, 0, index+2, 1))
+            source = index+2
+        return self.project('diamonds '+str(size), nodes, connections), 0
+
+    def exec_chain(self, size):
+        """A button executing a chain of inc nodes incrementing the same script variable, size nodes in total.
+        Without trampolined exec scheduling every exec hop is a nested call, so long chains exceed the recursion
+        limit."""
+        nodes = [self.node('std', 'button', grid_pos(0, size))]
+        connections = []
+        for i in range(1, size):
+            nodes.append(self.node('std', 'inc', grid_pos(i, size), ['', 'n']))
+            connections.append(self.connection(i-1, 0, i, 0))
+        return self.project('exec chain '+str(size), nodes, connections, variables={'n': 0}), 0
+
+    def generate(self, shape, size):
+        return getattr(self, SHAPES[shape])(size)
+
+
+SHAPES = {  # {shape name: FlowGenerator method}
+    'chain': 'chain',
+    'fan-out': 'fan_out',
+    'diamonds': 'diamonds',
+    'exec-chain': 'exec_chain',
+}
+
+
+def grid_pos(index, size):
+    """Lays the nodes out in a square grid, in the order they got created."""
+    columns = max(int(math.sqrt(size)), 1)
+    return 300 * (index % columns), 200 * (index // columns)
@@ -70,7 +70,7 @@ class ScriptsList_ScriptWidget(QWidget):
 
 
     def event(self, event):
-        if event.type() == QEvent.ToolTip:
+        if event.type() == QEvent.ToolTip and self.script.flow is not None:  # no thumbnail before it got built
             img: QImage = self.script.flow.get_viewport_img()
             self.script.thumbnail_source = 'temp/script_'+self.script.name+'_thumbnail.png'
             img.save(self.script.thumbnail_source)
@@ -0,0 +1,29 @@
+from custom_src.NodeInstance import NodeInstance
+from custom_src.Node import Node
+
+
+# USEFUL
+# self.input(index)                    <- access to input data
+# self.outputs[index].set_val(val)    <- set output data port value
+# self.main_widget                    <- access to main widget
+
+
+class SubFlow_NodeInstance(NodeInstance):
+    """Executes its sub flow's plan, see SubFlowDefinition. Only the values of its own ports belong to the NI."""
+
+    def __init__(self, parent_node: Node, flow, configuration=None):
+        super(SubFlow_NodeInstance, self).__init__(parent_node, flow, configuration)
+
+        self.initialized()
+
+    def update_event(self, input_called=-1):
+        self.parent_node.definition.run(self, input_called)
+
+    def removed(self):
+        pass
+
+    def get_data(self):
+        return {}
+
+    def set_data(self, data):
+        pass
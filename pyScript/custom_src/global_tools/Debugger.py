@@ -8,8 +8,11 @@ class Debugger:
         Debugger.enabled = False
 
     def debug(*args):
+        """Calls in hot paths should be guarded by 'if Debugger.enabled:', so the arguments don't even get put
+        together when debugging is disabled."""
+        if not Debugger.enabled:
+            return
         s = ''
         for arg in args:
             s += ' '+str(arg)
-        if Debugger.enabled:
-            print('        --> DEBUG:', s)
\ No newline at end of file
+        print('        --> DEBUG:', s)
@@ -0,0 +1,96 @@
+import threading
+from collections import deque
+
+from PySide2.QtCore import QObject, Signal, Qt
+
+
+class GUIThread:
+    """Runs functions in the GUI thread when called from another thread (like a ScriptExecutor's worker thread).
+    The calls get queued and a queued signal makes the GUI thread run them. init() has to be called from the GUI
+    thread. Without invoker (headless) calls just run in the calling thread."""
+
+    invoker = None
+    pending = deque()  # GUICalls waiting to be run in the GUI thread
+
+    def init():
+        if GUIThread.invoker is None:
+            GUIThread.invoker = GUICallInvoker()
+
+    def is_current():
+        return threading.current_thread() is threading.main_thread()
+
+    def call(func, *args, wait=True, **kwargs):
+        """Calls func in the GUI thread. If wait is True, it blocks until the call returned and returns the result
+        (or raises the exception)."""
+        if GUIThread.invoker is None or GUIThread.is_current():
+            return func(*args, **kwargs)
+
+        call = GUICall(func, args, kwargs, wait)
+        GUIThread.pending.append(call)
+        GUIThread.invoker.call_requested.emit()
+        if wait:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+    def process_pending_calls():
+        """Runs all queued calls right now. Called from the GUI thread by the invoker, and by code that blocks the GUI
+        thread while waiting for other threads which might need it (see BranchFanOut.wait())."""
+        while True:
+            try:
+                call = GUIThread.pending.popleft()
+            except IndexError:
+                return
+            call.run()
+
+
+class GUICallInvoker(QObject):
+    call_requested = Signal()
+
+    def __init__(self):
+        super(GUICallInvoker, self).__init__()
+        self.call_requested.connect(self.run_call, Qt.QueuedConnection)
+
+    def run_call(self):
+        GUIThread.process_pending_calls()
+
+
+class GUICall:
+    def __init__(self, func, args, kwargs, wait):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.done = threading.Event() if wait else None
+        self.result = None
+        self.exception = None
+
+    def run(self):
+        try:
+            self.result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            self.exception = e
+        finally:
+            if self.done is not None:
+                self.done.set()
+
+
+class GUIThreadProxy:
+    """Wraps an object living in the GUI thread (like a main widget). All method calls made on the proxy are run in
+    the GUI thread, the caller waits for the result. Setting attributes on the proxy sets them on the object, also in
+    the GUI thread."""
+
+    def __init__(self, obj):
+        object.__setattr__(self, '_obj', obj)
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if callable(attr):
+            return lambda *args, **kwargs: GUIThread.call(attr, *args, **kwargs)
+        return attr
+
+    def __setattr__(self, name, value):
+        GUIThread.call(setattr, self._obj, name, value)
+
+    def __bool__(self):
+        return True
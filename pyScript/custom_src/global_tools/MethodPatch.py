@@ -0,0 +1,30 @@
+class MethodPatch:
+    """Replaces a method of a class by a wrapper around it, for tools recording what's going on during execution
+    (see ExecutionTrace, HeatOverlay) - so they don't cost anything while they are off.
+    make_wrapper gets the original function and returns the wrapper. Patches of the same method can be stacked and
+    removed in any order: if another patch got put on top of this one, this one can't be taken out anymore and just
+    passes the calls through from then on."""
+
+    def __init__(self, cls, name, make_wrapper):
+        self.cls = cls
+        self.name = name
+        self.original = cls.__dict__[name]
+        self.active = True
+
+        original = self.original
+        wrapper = make_wrapper(original)
+
+        def patched(*args, **kwargs):
+            if self.active:
+                return wrapper(*args, **kwargs)
+            return original(*args, **kwargs)
+
+        patched.__name__ = original.__name__
+        patched.__doc__ = original.__doc__
+        self.patched = patched
+        setattr(cls, name, patched)
+
+    def remove(self):
+        self.active = False
+        if self.cls.__dict__.get(self.name) is self.patched:
+            setattr(self.cls, self.name, self.original)
@@ -0,0 +1,85 @@
+from custom_src.BranchFanOut import BranchFanOut
+from custom_src.ExecScheduler import ExecScheduler
+from custom_src.Execution import ExecPulse
+from custom_src.FlowCompiler import FlowCompiler
+from custom_src.PropagationEngine import PropagationEngine
+from custom_src.PureMemo import PureMemo
+from custom_src.StreamingPipeline import StreamingPipeline
+from custom_src.global_tools.Debugger import Debugger
+from custom_src.headless.HeadlessNodeInstance import headless_node_instance_class
+
+
+class HeadlessFlow:
+    """Holds only the node instances and their connections of a script - no scene, no items, no widgets.
+    The configs are the same as for Flow, see Flow.place_nodes_from_config() and Flow.connect_nodes_from_config()."""
+
+    def __init__(self, runner, parent_script, config=None):
+        self.parent_script = parent_script
+        self.all_node_instances = []
+        self.all_nodes = runner.all_nodes  # ref
+        self.all_node_instance_classes = runner.all_node_instance_classes  # ref
+        self.headless_node_instance_classes = runner.headless_node_instance_classes  # ref (cache)
+        self.exec_pulse = ExecPulse()
+        self.propagation_engine = PropagationEngine(self)
+        self.exec_scheduler = ExecScheduler(self)
+        self.branch_fan_out = BranchFanOut(self)
+        self.streaming_pipeline = StreamingPipeline(self)
+        self.pure_memo = PureMemo(self)
+        self.flow_compiler = FlowCompiler(self)
+
+        if config:
+            node_instances = self.place_nodes_from_config(config['nodes'])
+            self.connect_nodes_from_config(node_instances, config['connections'])
+
+    def create_node_instance(self, node, config):
+        ni_class = self.all_node_instance_classes[node]
+        if ni_class not in self.headless_node_instance_classes:
+            self.headless_node_instance_classes[ni_class] = headless_node_instance_class(ni_class)
+        return self.headless_node_instance_classes[ni_class](node, self, config)
+
+    def place_nodes_from_config(self, nodes_config):
+        new_node_instances = []
+
+        for n_c in nodes_config:
+            parent_node = None
+            for pn in self.all_nodes:
+                if pn.title == n_c['parent node title'] and pn.package == n_c['parent node package']:
+                    parent_node = pn
+                    break
+
+            if parent_node is None:
+                raise LookupError('node \''+n_c['parent node title']+'\' of package \''+n_c['parent node package'] +
+                                  '\' not found - did you import all required packages?')
+
+            new_NI = self.create_node_instance(parent_node, n_c)
+            self.all_node_instances.append(new_NI)
+            new_node_instances.append(new_NI)
+
+        return new_node_instances
+
+    def connect_nodes_from_config(self, node_instances, connections_config):
+        for c in connections_config:
+            if c['connected node instance'] is None:
+                continue
+
+            parent_node_instance = node_instances[c['parent node instance index']]
+            connected_node_instance = node_instances[c['connected node instance']]
+
+            self.connect_ports(parent_node_instance.outputs[c['output port index']],
+                               connected_node_instance.inputs[c['connected input port index']])
+
+    def connect_ports(self, parent_port_instance, child_port_instance):
+        """Connects or disconnects (if they already are connected) two port instances. Same as Flow.connect_gates()
+        but for ports."""
+        if child_port_instance in parent_port_instance.connected_port_instances:
+            parent_port_instance.connected_port_instances.remove(child_port_instance)
+            child_port_instance.connected_port_instances.remove(parent_port_instance)
+            parent_port_instance.disconnected()
+            child_port_instance.disconnected()
+        else:
+            Debugger.debug('connecting', parent_port_instance.parent_node_instance.parent_node.title, 'and',
+                           child_port_instance.parent_node_instance.parent_node.title)
+            parent_port_instance.connected_port_instances.append(child_port_instance)
+            child_port_instance.connected_port_instances.append(parent_port_instance)
+            parent_port_instance.connected()
+            child_port_instance.connected()
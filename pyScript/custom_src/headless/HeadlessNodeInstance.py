@@ -0,0 +1,211 @@
+import sys
+import types
+
+from custom_src.NodeInstance import NodeInstance
+from custom_src.global_tools.Debugger import Debugger
+from custom_src.headless.HeadlessPortInstance import HeadlessPortInstance
+
+
+class HeadlessNodeInstance:
+    """The counterpart of NodeInstance for the headless runner. It isn't a QGraphicsItem, it has no main widget and
+    no ports' gates/labels/widgets. All the algorithm and API methods (update(), input(), set_output_val(),
+    exec_output(), ...) are taken directly from NodeInstance, so the execution behaves exactly the same.
+    Subclasses don't get written by hand, see headless_node_instance_class() below."""
+
+    def __init__(self, parent_node, flow, config=None):
+        # GENERAL ATTRIBUTES
+        self.id = next(NodeInstance.ids)
+        self.parent_node = parent_node
+        self.flow = flow
+        self.inputs = []
+        self.outputs = []
+        self.active = False
+        self.main_widget = None
+        self.gen_data_on_request = False
+        self.computed_in_pulse = -1
+        self.stream_stage = None
+        self.stream_input_vals = None
+        self.personal_logs = []
+        self.special_actions = {}
+        self.default_actions = {}
+
+        self.initializing = True
+
+        self.temp_state_data = None
+
+        if self.parent_node.has_main_widget:
+            self.main_widget = HeadlessMainWidget()
+
+        if config:
+            self.setup_ports(config['inputs'], config['outputs'])
+            if self.main_widget:
+                self.main_widget.set_data(config.get('main widget data'))
+            self.special_actions = self.set_special_actions_data(config['special actions'])
+            self.temp_state_data = config['state data']
+        else:
+            self.setup_ports()
+
+        self.initializing = False
+
+    # ALGORITHM AND API - see NodeInstance
+    update = NodeInstance.update
+    dispatch_update = NodeInstance.dispatch_update
+    run_update_event = NodeInstance.run_update_event
+    update_event = NodeInstance.update_event
+    data_outputs_updated = NodeInstance.data_outputs_updated
+    input = NodeInstance.input
+    set_output_val = NodeInstance.set_output_val
+    stream_output_val = NodeInstance.stream_output_val
+    exec_output = NodeInstance.exec_output
+    new_log = NodeInstance.new_log
+    disable_personal_logs = NodeInstance.disable_personal_logs
+    enable_personal_logs = NodeInstance.enable_personal_logs
+    log_message = NodeInstance.log_message
+    get_data = NodeInstance.get_data
+    set_data = NodeInstance.set_data
+    removing = NodeInstance.removing
+    action_exec_input = NodeInstance.action_exec_input
+    get_special_actions_data = NodeInstance.get_special_actions_data
+    set_special_actions_data = NodeInstance.set_special_actions_data
+    is_active = NodeInstance.is_active
+    ports_changed = NodeInstance.ports_changed
+
+    def about_to_remove_from_scene(self):
+        self.removing()
+        self.disable_personal_logs()
+
+    def initialized(self):
+        """Other than in NodeInstance, a failing set_data() doesn't abort the whole flow. Nodes that rely on their
+        main widget to restore their state can't do so without GUI."""
+        if self.temp_state_data is not None:
+            try:
+                self.set_data(self.temp_state_data)
+            except Exception as e:
+                self.log_message('couldn\'t restore the state of ' + self.parent_node.title + ': ' + str(e), 'error')
+        self.update()
+
+    # PORTS
+    def setup_ports(self, inputs_config=None, outputs_config=None):
+        if not inputs_config and not outputs_config:
+            for inp in self.parent_node.inputs:
+                self.create_new_input(inp.type_, inp.label,
+                                      widget_type=inp.widget_type,
+                                      widget_name=inp.widget_name,
+                                      widget_pos=inp.widget_pos)
+
+            for out in self.parent_node.outputs:
+                self.create_new_output(out.type_, out.label)
+        else:
+            for input_config in inputs_config:
+                self.inputs.append(HeadlessPortInstance(self, 'input', configuration=input_config))
+
+            for output_config in outputs_config:
+                self.outputs.append(HeadlessPortInstance(self, 'output', configuration=output_config))
+            self.ports_changed()
+
+    def create_new_input(self, type_, label, widget_type='', widget_name='', widget_pos='under', pos=-1,
+                         append=True):
+        pi = HeadlessPortInstance(self, 'input', type_, label,
+                                  widget_type=widget_type,
+                                  widget_name=widget_name,
+                                  widget_pos=widget_pos)
+        if pos == -1:
+            self.inputs.append(pi)
+        else:
+            self.inputs.insert(pos, pi)
+        self.ports_changed()
+
+    def create_new_output(self, type_, label, pos=-1, append=True):
+        pi = HeadlessPortInstance(self, 'output', type_, label)
+        if pos == -1:
+            self.outputs.append(pi)
+        else:
+            self.outputs.insert(pos, pi)
+        self.ports_changed()
+
+    def delete_input(self, i):
+        if type(i) == int:
+            i = self.inputs[i]
+        for cpi in i.connected_port_instances.copy():
+            self.flow.connect_ports(cpi, i)
+        self.inputs.remove(i)
+        self.ports_changed()
+
+    def delete_output(self, o):
+        if type(o) == int:
+            o = self.outputs[o]
+        for cpi in o.connected_port_instances.copy():
+            self.flow.connect_ports(o, cpi)
+        self.outputs.remove(o)
+        self.ports_changed()
+
+    # SHAPE - there is none
+    def update_shape(self):
+        pass
+
+    def compute_content_positions(self):
+        pass
+
+
+class HeadlessMainWidget:
+    """Stands in for a node's main widget when running headless. It keeps the widget data from the project file and
+    silently accepts everything else (like self.main_widget.clicked.connect(...)) - calls just return None."""
+
+    def __init__(self):
+        self.data = None
+
+    def get_data(self):
+        return self.data
+
+    def set_data(self, data):
+        self.data = data
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return None
+
+    def __bool__(self):
+        return True
+
+
+def headless_node_instance_class(ni_class):
+    """Creates a HeadlessNodeInstance subclass running the very same code as the given NodeInstance subclass.
+    The functions of the NI class get copied with slightly modified globals: the NI class' name and 'NodeInstance'
+    refer to the new headless classes, so super(XY_NodeInstance, self).__init__(...) in the node's source just works.
+    """
+
+    if ni_class is NodeInstance:
+        return HeadlessNodeInstance
+
+    headless_class = type(ni_class.__name__, (HeadlessNodeInstance,), {'__module__': ni_class.__module__})
+
+    # all classes between the NI class and NodeInstance, base classes first
+    node_classes = [c for c in ni_class.__mro__ if issubclass(c, NodeInstance) and c is not NodeInstance]
+    for node_class in reversed(node_classes):
+        node_globals = dict(sys.modules[node_class.__module__].__dict__)
+        node_globals['NodeInstance'] = HeadlessNodeInstance
+        for c in node_classes:
+            node_globals[c.__name__] = headless_class
+
+        for name, member in node_class.__dict__.items():
+            if name in ('__module__', '__dict__', '__weakref__', '__doc__', '__qualname__'):
+                continue
+            if isinstance(member, types.FunctionType):
+                member = copy_function(member, node_globals, headless_class)
+            setattr(headless_class, name, member)
+
+    Debugger.debug('created headless class for', ni_class.__name__)
+    return headless_class
+
+
+def copy_function(f, f_globals, cls):
+    closure = f.__closure__
+    if closure and '__class__' in f.__code__.co_freevars:  # zero argument super() needs the new class
+        closure = tuple(types.CellType(cls) if name == '__class__' else cell
+                        for name, cell in zip(f.__code__.co_freevars, closure))
+    new_f = types.FunctionType(f.__code__, f_globals, f.__name__, f.__defaults__, closure)
+    new_f.__kwdefaults__ = f.__kwdefaults__
+    new_f.__qualname__ = f.__qualname__
+    return new_f
@@ -0,0 +1,95 @@
+from custom_src.InputValue import InputValue
+from custom_src.PortInstance import PortInstance, PortConnections
+
+
+class HeadlessPortInstance(PortInstance):
+    """A PortInstance without gate, label and widget proxy, used by the headless runner. Everything concerning the
+    actual data and exec flow is inherited from PortInstance."""
+
+    __slots__ = ()
+
+    def __init__(self, parent_node_instance, direction, type_='', label_str='',
+                 configuration=None, widget_type='', widget_name=None, widget_pos=''):
+        # GENERAL ATTRIBUTES
+        self.id = next(PortInstance.ids)
+        self.index = -1  # set by the NI
+        self.val = None
+        self.parent_node_instance = parent_node_instance
+        self.direction = direction
+        self.type_ = type_
+        self.label_str = label_str
+        self.connected_port_instances = PortConnections()  # connections stored here
+
+        # CONTENTS
+        self.gate = None
+        self.label = None
+        self.widget: HeadlessPortInstanceWidget = None
+        self.proxy = None
+        self.widget_type = widget_type
+        self.widget_name = widget_name
+        self.widget_pos = widget_pos
+
+        if configuration:
+            self.type_ = configuration['type']
+            self.label_str = configuration['label']
+
+            if direction == 'input':
+                if configuration['has widget']:
+                    self.widget_type = configuration['widget type']
+                    self.widget_name = configuration['widget name']
+                    self.widget_pos = configuration['widget position']
+
+                    if configuration['widget data'] != None:
+                        self.create_widget()
+                        self.widget.set_data(configuration['widget data'])
+        else:
+            self.create_widget()
+
+    def create_widget(self, configuration=None):
+        if self.direction == 'input' and (
+                self.type_ and self.type_ == 'data' or configuration and configuration['type'] == 'data'):
+            if self.widget_type in ('std line edit', 'std spin box', 'custom widget'):
+                self.widget = HeadlessPortInstanceWidget(self.widget_type)
+
+    def connected(self):
+        if self.direction == 'input' and self.type_ == 'data':
+            self.parent_node_instance.flow.propagation_engine.input_connected(self)
+        self.parent_node_instance.flow.branch_fan_out.connections_changed()
+        self.parent_node_instance.flow.streaming_pipeline.connections_changed()
+        self.parent_node_instance.flow.flow_compiler.flow_changed()
+        if self.direction == 'input' and self.type_ == 'data':
+            self.update()
+
+    def disconnected(self):
+        self.parent_node_instance.flow.branch_fan_out.connections_changed()
+        self.parent_node_instance.flow.streaming_pipeline.connections_changed()
+        self.parent_node_instance.flow.flow_compiler.flow_changed()
+
+
+class HeadlessPortInstanceWidget:
+    """Replaces an input widget when running headless. It only holds the widget data that was stored in the project
+    file and returns the same value the real widget would return in get_val()."""
+
+    def __init__(self, widget_type):
+        self.widget_type = widget_type
+        self.data = None
+        self.value = InputValue()
+
+    def get_val(self):
+        if self.widget_type == 'std line edit':
+            return self.value.get_val()
+        elif self.widget_type == 'std spin box':
+            return self.data if self.data is not None else 0
+        else:  # custom widgets - the best I can do is to return their data
+            return self.data
+
+    def get_data(self):
+        return self.data
+
+    def set_data(self, data):
+        self.data = data
+        if self.widget_type == 'std line edit' and type(data) == str:
+            self.value.set_text(data)
+
+    def removing(self):
+        pass
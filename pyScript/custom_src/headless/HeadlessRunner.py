@@ -0,0 +1,227 @@
+import argparse
+import os
+import sys
+import time
+
+from custom_src.AsyncLoop import AsyncLoop
+from custom_src.Execution import ExecutionSettings
+from custom_src.ExecutionTrace import ExecutionTrace
+from custom_src.FlowCompiler import CompileError
+from custom_src.Node import SetVariable_Node, GetVariable_Node
+from custom_src.NodePackagesImporter import NodePackagesImporter
+from custom_src.ProcessPool import ProcessPool
+from custom_src.ProjectFile import read_project_file
+from custom_src.custom_nodes.GetVar_NodeInstance import GetVar_NodeInstance
+from custom_src.custom_nodes.SetVar_NodeInstance import SetVar_NodeInstance
+from custom_src.global_tools.Debugger import Debugger
+from custom_src.headless.HeadlessScript import HeadlessScript
+
+
+class HeadlessRunner(NodePackagesImporter):
+    """Executes scripts of a project without any GUI. Only the data and exec graph gets built from the project's
+    'nodes' and 'connections' - no QApplication, no scene, no widgets. Usage:
+    python pyScript.py run project.pypb --script NAME --trigger NODE_INDEX"""
+
+    def __init__(self):
+        self.custom_nodes = []
+        self.all_nodes = [SetVariable_Node(), GetVariable_Node()]
+        self.all_node_instance_classes = {
+            self.all_nodes[0]: SetVar_NodeInstance,
+            self.all_nodes[1]: GetVar_NodeInstance
+        }
+        self.headless_node_instance_classes = {}  # {NI subclass: headless NI subclass}, filled by HeadlessFlow
+        self.custom_node_input_widget_classes = {}
+        self.sub_flows = []
+        self.imported_packages = []
+
+        self.project = None
+        self.scripts = []
+
+    def load_project(self, file_path, script_names=None):
+        """Of binary project files, only the scripts in script_names get read (all if it's None), see
+        read_project_file()."""
+        self.project = read_project_file(file_path, script_names)
+
+    def get_script_config(self, name=None):
+        for s_config in self.project['scripts']:
+            if name is None or s_config['name'] == name:
+                return s_config
+        raise LookupError('there is no script \''+str(name)+'\' in the project')
+
+    def import_required_packages(self, script_config, package_file_paths=None):
+        """Imports the given package files and searches the remaining packages required by the script in the
+        standard packages directory, see SelectPackages_Dialog."""
+        for p in (package_file_paths or []):
+            self.import_package(p)
+
+        nodes = list(script_config['flow']['nodes'])
+        for sub_flow_config in self.project.get('sub flows', []):
+            nodes += sub_flow_config['nodes']
+        for n in nodes:
+            package = n['parent node package']
+            if package not in ('built in', 'sub flows') and package not in self.imported_packages:
+                self.import_package(self.find_package_file('../packages', package))
+
+    def find_package_file(self, packages_dir, package_name):
+        for dir_path, dir_names, file_names in os.walk(packages_dir):
+            if package_name+'.pypac' in file_names:
+                return os.path.join(dir_path, package_name+'.pypac')
+        raise FileNotFoundError('couldn\'t find package \''+package_name+'\' in '+packages_dir)
+
+    def import_package(self, file_path):
+        self.import_nodes_package_from_file(file_path)
+        self.imported_packages.append(os.path.splitext(os.path.basename(file_path))[0])
+
+    def create_script(self, name=None, package_file_paths=None):
+        """Imports the required packages and builds the script with the given name (or the first one)."""
+        script_config = self.get_script_config(name)
+        self.import_required_packages(script_config, package_file_paths)
+        self.import_sub_flows(self.project.get('sub flows', []))
+        script = HeadlessScript(self, script_config)
+        self.scripts.append(script)
+        return script
+
+    def trigger(self, script, node_index, input_index=None):
+        """Fires an exec input of the node instance at the given index (index in the project's nodes list). If no
+        input is specified, the node's first exec input is used, or, if it has none (like a button), the node just
+        gets updated."""
+        ni = script.flow.all_node_instances[node_index]
+        if input_index is None:
+            input_index = -1
+            for i in range(len(ni.inputs)):
+                if ni.inputs[i].type_ == 'exec':
+                    input_index = i
+                    break
+        ni.update(input_index)
+
+    def wait_for_pending_work(self):
+        """Async update_events, process pool jobs and streaming pipeline stages finish after the trigger returned.
+        They can cause each other, so wait until all of them are idle."""
+        while True:
+            AsyncLoop.wait()
+            ProcessPool.wait()
+            for script in self.scripts:
+                script.flow.streaming_pipeline.wait()
+            if len(AsyncLoop.tasks) == 0 and len(ProcessPool.running) == 0:
+                break
+
+
+def get_peak_memory_kb():
+    """Peak resident set size of this process in KB or None where the resource module isn't available (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform == 'darwin' else peak  # macOS reports bytes
+
+
+def add_execution_settings_arguments(parser):
+    """The options for ExecutionSettings, shared by the headless runner and the benchmarks."""
+    parser.add_argument('--memoized-pull', action='store_true',
+                        help='compute nodes that generate data on request at most once per exec pulse')
+    parser.add_argument('--glitch-free-push', action='store_true',
+                        help='push data changes in topological order, updating every node once per change')
+    parser.add_argument('--trampolined-exec', action='store_true',
+                        help='process exec signals with a work stack instead of recursion')
+    parser.add_argument('--pure-memo', action='store_true',
+                        help='skip nodes declared pure if their inputs didn\'t change')
+    parser.add_argument('--eval-input-expressions', action='store_true',
+                        help='evaluate input texts that aren\'t Python literals as Python expressions (like 2*3)')
+    parser.add_argument('--compiled-exec', action='store_true',
+                        help='compile exec chains into Python functions the first time they run')
+    parser.add_argument('--parallel-fan-out', action='store_true',
+                        help='run independent branches of an exec output concurrently on a thread pool')
+    parser.add_argument('--streaming-pipelines', action='store_true',
+                        help='process the values of stream sources in a pipeline with one thread per node')
+    parser.add_argument('--backpressure', choices=['drop-oldest', 'drop-newest', 'block'], default='drop-oldest',
+                        help='what a pipeline stage does when its queue is full (default: drop-oldest)')
+
+
+def apply_execution_settings(args):
+    ExecutionSettings.memoized_pull = args.memoized_pull
+    ExecutionSettings.glitch_free_push = args.glitch_free_push
+    ExecutionSettings.trampolined_exec = args.trampolined_exec
+    ExecutionSettings.pure_memo = args.pure_memo
+    ExecutionSettings.eval_input_expressions = args.eval_input_expressions
+    ExecutionSettings.compiled_exec = args.compiled_exec
+    ExecutionSettings.parallel_fan_out = args.parallel_fan_out
+    ExecutionSettings.streaming_pipelines = args.streaming_pipelines
+    ExecutionSettings.stream_backpressure = args.backpressure.replace('-', ' ')
+
+
+def run_from_command_line(args):
+    parser = argparse.ArgumentParser(prog='pyScript.py run',
+                                     description='Executes a script of a pyScript project without GUI.')
+    parser.add_argument('project', help='the project file (*.pypb or *.pypro)')
+    parser.add_argument('--script', default=None, help='name of the script to run (default: the first one)')
+    parser.add_argument('--trigger', type=int, action='append', default=[], metavar='NODE_INDEX',
+                        help='index of the node instance whose exec input gets fired (can be used multiple times)')
+    parser.add_argument('--input', type=int, default=None, metavar='INPUT_INDEX',
+                        help='the exec input to fire (default: the first exec input of the node)')
+    parser.add_argument('--packages', nargs='*', default=[], metavar='PYPAC',
+                        help='package files; missing ones are searched in ../packages')
+    add_execution_settings_arguments(parser)
+    parser.add_argument('--trace', default=None, metavar='FILE',
+                        help='record the execution and save it as Chrome trace JSON (can be opened in Perfetto)')
+    parser.add_argument('--export-compiled', default=None, metavar='FILE',
+                        help='save the exec chains of the script\'s buttons (and other exec sources) as a Python '
+                             'module which runs without pyScript')
+    parser.add_argument('--debug', action='store_true', help='print debugging messages')
+    args = parser.parse_args(args)
+
+    if args.debug:
+        Debugger.enable()
+    apply_execution_settings(args)
+
+    t_start = time.perf_counter()
+
+    runner = HeadlessRunner()
+    runner.load_project(args.project, [args.script] if args.script is not None else None)
+    script = runner.create_script(args.script, args.packages)
+
+    if args.export_compiled:
+        try:
+            script.flow.flow_compiler.export(args.export_compiled)
+        except CompileError as e:
+            print('couldn\'t export the script:', e, file=sys.stderr)
+            return 1
+
+    t_loaded = time.perf_counter()
+
+    if args.trace:
+        ExecutionTrace.start()
+    for node_index in args.trigger:
+        runner.trigger(script, node_index, args.input)
+    runner.wait_for_pending_work()
+    if args.trace:
+        ExecutionTrace.stop()
+        ExecutionTrace.save(args.trace)
+
+    t_finished = time.perf_counter()
+
+    peak_memory = get_peak_memory_kb()
+    ProcessPool.shutdown()
+
+    print('--- pyScript headless run ---', file=sys.stderr)
+    print('script:            ', script.name, '('+str(len(script.flow.all_node_instances))+' nodes)', file=sys.stderr)
+    print('startup time:       %.1f ms' % ((t_loaded-t_start)*1000), file=sys.stderr)
+    print('execution time:     %.1f ms' % ((t_finished-t_loaded)*1000), file=sys.stderr)
+    if args.trace:
+        print('trace:             ', len(ExecutionTrace.events), 'events saved to', args.trace, file=sys.stderr)
+    print('peak memory (RSS): ', ('%.1f MB' % (peak_memory/1024)) if peak_memory is not None else 'n/a',
+          file=sys.stderr)
+    if ExecutionSettings.glitch_free_push:
+        print('propagation:       ', script.flow.propagation_engine.get_stats_str(), file=sys.stderr)
+    if ExecutionSettings.trampolined_exec:
+        print('exec scheduler:    ', script.flow.exec_scheduler.get_stats_str(), file=sys.stderr)
+    if ExecutionSettings.pure_memo and len(script.flow.pure_memo.memos) > 0:
+        print('pure memo:         ', script.flow.pure_memo.get_stats_str(), file=sys.stderr)
+    if ExecutionSettings.compiled_exec:
+        print('compiled exec:     ', script.flow.flow_compiler.get_stats_str(), file=sys.stderr)
+    if ExecutionSettings.parallel_fan_out:
+        print('fan-out:           ', script.flow.branch_fan_out.get_stats_str(), file=sys.stderr)
+    if ExecutionSettings.streaming_pipelines:
+        print('streaming:         ', script.flow.streaming_pipeline.get_stats_str(), file=sys.stderr)
+
+    return 0
@@ -0,0 +1,90 @@
+import sys
+
+from custom_src.headless.HeadlessFlow import HeadlessFlow
+from custom_src.script_variables.Variable import Variable
+
+
+class HeadlessScript:
+    """Counterpart of Script for the headless runner: a flow, the variables and the logs (which get printed)."""
+
+    def __init__(self, runner, config):
+        self.runner = runner
+        self.name = config['name']
+        self.logger = HeadlessLogger(self)
+        self.variables_handler = HeadlessVariablesHandler(self, config['variables'])
+        self.flow = HeadlessFlow(runner, self, config['flow'])
+        self.variables_handler.flow = self.flow
+
+
+class HeadlessVariablesHandler:
+    """Same interface as VariablesHandler (the parts used by nodes), without the list widget."""
+
+    def __init__(self, script, config_vars=None):
+        self.script = script
+        self.flow = None
+
+        self.variables = []
+        if config_vars is not None:
+            for name in list(config_vars.keys()):
+                self.variables.append(Variable(name, config_vars[name]))
+
+    def get_var(self, name):
+        for v in self.variables:
+            if v.name == name:
+                return v
+        return None
+
+    def set_var(self, name, val):
+        var = self.get_var(name)
+        if var is None:
+            return False
+
+        var.val = val
+        self.update_variable_usages(var)
+        return True
+
+    def update_variable_usages(self, v):
+        for ni in self.flow.all_node_instances:
+            if ni.parent_node.type_ == 'get variable node' and ni.get_current_var_name() == v.name:
+                ni.update()
+
+    def get_json_data(self):
+        vars_dict = {}
+        for v in self.variables:
+            vars_dict[v.name] = v.val
+        return vars_dict
+
+
+class HeadlessLogger:
+    """Prints all log messages to stderr, so stdout stays free for whatever the flow prints."""
+
+    def __init__(self, script):
+        self.script = script
+
+    def log_message(self, sender, message: str, target=''):
+        print('['+self.script.name+' | '+target+']', message, file=sys.stderr)
+
+    def new_log(self, new_sender, title):
+        return HeadlessLog(self.script, title)
+
+
+class HeadlessLog:
+    def __init__(self, script, title=''):
+        self.script = script
+        self.title = title
+        self.enabled = True
+
+    def log(self, *args):
+        s = ''
+        for arg in args:
+            s += ' '+str(arg)
+        print('['+self.script.name+' | '+self.title+']', s, file=sys.stderr)
+
+    def clear(self):
+        pass
+
+    def disable(self):
+        self.enabled = False
+
+    def enable(self):
+        self.enabled = True
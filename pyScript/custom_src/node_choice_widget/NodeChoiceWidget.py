@@ -108,6 +108,11 @@ class NodeChoiceWidget(QWidget):
     def reset_list(self):
         self.nodes = self.all_nodes
 
+    def update_all_nodes(self, nodes):
+        """Called when nodes got added after the widget was created (like sub flows)."""
+        self.all_nodes = sort_nodes(nodes)
+        self.reset_list()
+
 
     def update_view(self, text=''):
         text = text.lower()
@@ -64,6 +64,8 @@ class VariablesHandler:
             self.update_variable_usages(v)
 
     def update_variable_usages(self, v):
+        if self.flow is None:  # not built yet, see Script
+            return
         get_var_NIs = []
         for ni in self.flow.all_node_instances:
             if find_type_in_object(ni, GetVar_NodeInstance):
@@ -2,6 +2,7 @@ from PySide2.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QT
 from PySide2.QtGui import QIcon
 
 from custom_src.global_tools.Debugger import Debugger
+from custom_src.ProjectFile import read_project_file, JSON_SUFFIX, BINARY_SUFFIX
 from custom_src.startup_dialog.SelectPackages_Dialog import SelectPackages_Dialog
 
 
@@ -77,35 +78,27 @@ class StartupDialog(QDialog):
 
     def load_project_button_clicked(self):
         self.editor_startup_configuration['config'] = 'open project'
-        import json
 
-        file_name = QFileDialog.getOpenFileName(self, 'select project file', '../saves', 'PyScript Project(*.pypro)')[0]
-        j_str = ''
-        try:
-            f = open(file_name)
-            j_str = f.read()
-            f.close()
-        except FileNotFoundError:
-            Debugger.debug('couldn\'t open file')
+        file_name = QFileDialog.getOpenFileName(self, 'select project file', '../saves',
+                                                'PyScript Project(*'+BINARY_SUFFIX+' *'+JSON_SUFFIX+')')[0]
+        if file_name == '':
             return
-
-
-        # strict=False has to be to allow 'control characters' like '\n' for newline when loading the json
-        j_obj = json.loads(j_str, strict=False)
-
-        if j_obj['general info']['type'] != 'pyScriptFP project file':
+        try:
+            j_obj = read_project_file(file_name)
+        except (OSError, ValueError) as e:
+            Debugger.debug('couldn\'t open project:', e)
             return
 
         # scan for all required packages
         packages = []
         package_file_paths = []
 
-        scripts = j_obj['scripts']
-        for script in scripts:
-            flow = script['flow']
+        flows = [script['flow'] for script in j_obj['scripts']]
+        flows += j_obj.get('sub flows', [])  # the inner nodes of sub flows
+        for flow in flows:
             for n in flow['nodes']:
                 package = n['parent node package']
-                if package != 'built in' and not packages.__contains__(package):
+                if package not in ('built in', 'sub flows') and not packages.__contains__(package):
                     packages.append(package)
 
 
@@ -117,5 +110,6 @@ class StartupDialog(QDialog):
 
         self.editor_startup_configuration['required packages'] = package_file_paths
         self.editor_startup_configuration['content'] = j_obj
+        self.editor_startup_configuration['file path'] = file_name
 
         self.accept()
\ No newline at end of file
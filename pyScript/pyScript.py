@@ -1,10 +1,19 @@
 import sys
 
-from custom_src.startup_dialog.StartupDialog import StartupDialog
-from custom_src.MainWindow import MainWindow
-from PySide2.QtWidgets import QApplication
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'run':
+        # headless - no QApplication, see HeadlessRunner
+        from custom_src.headless.HeadlessRunner import run_from_command_line
+        sys.exit(run_from_command_line(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        from custom_src.benchmarks.BenchmarkRunner import run_from_command_line
+        sys.exit(run_from_command_line(sys.argv[2:]))
+
+    from custom_src.startup_dialog.StartupDialog import StartupDialog
+    from custom_src.MainWindow import MainWindow
+    from PySide2.QtWidgets import QApplication
+
     app = QApplication(sys.argv)
 
     sw = StartupDialog()
@@ -14,4 +23,4 @@ if __name__ == '__main__':
         mw = MainWindow(sw.editor_startup_configuration)
         mw.show()
 
-        sys.exit(app.exec_())
\ No newline at end of file
+        sys.exit(app.exec_())